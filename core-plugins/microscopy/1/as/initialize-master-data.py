@@ -65,6 +65,14 @@ data_set_type_MICROSCOPY_IMG_THUMBNAIL.setMainDataSetPattern(None)
 data_set_type_MICROSCOPY_IMG_THUMBNAIL.setMainDataSetPath(None)
 data_set_type_MICROSCOPY_IMG_THUMBNAIL.setDeletionDisallowed(False)
 
+# MICROSCOPY_EXPERIMENT_ATTACHMENT
+data_set_type_MICROSCOPY_EXPERIMENT_ATTACHMENT = tr.getOrCreateNewDataSetType('MICROSCOPY_EXPERIMENT_ATTACHMENT')
+data_set_type_MICROSCOPY_EXPERIMENT_ATTACHMENT.setDescription('Experiment attachment too large to be stored as an openBIS attachment.')
+data_set_type_MICROSCOPY_EXPERIMENT_ATTACHMENT.setDataSetKind('PHYSICAL')
+data_set_type_MICROSCOPY_EXPERIMENT_ATTACHMENT.setMainDataSetPattern(None)
+data_set_type_MICROSCOPY_EXPERIMENT_ATTACHMENT.setMainDataSetPath(None)
+data_set_type_MICROSCOPY_EXPERIMENT_ATTACHMENT.setDeletionDisallowed(False)
+
 # MICROSCOPY_SAMPLE_TYPE
 samp_type_MICROSCOPY_SAMPLE_TYPE = tr.getOrCreateNewSampleType('MICROSCOPY_SAMPLE_TYPE')
 samp_type_MICROSCOPY_SAMPLE_TYPE.setDescription('Sample type for microscopy data sets.')
@@ -130,6 +138,18 @@ prop_type_MICROSCOPY_SAMPLE_SIZE_IN_BYTES.setLabel('Size')
 prop_type_MICROSCOPY_SAMPLE_SIZE_IN_BYTES.setManagedInternally(False)
 prop_type_MICROSCOPY_SAMPLE_SIZE_IN_BYTES.setInternalNamespace(False)
 
+# MICROSCOPY_SAMPLE_CHECKSUMS
+prop_type_MICROSCOPY_SAMPLE_CHECKSUMS = tr.getOrCreateNewPropertyType('MICROSCOPY_SAMPLE_CHECKSUMS', DataType.MULTILINE_VARCHAR)
+prop_type_MICROSCOPY_SAMPLE_CHECKSUMS.setLabel('Checksums')
+prop_type_MICROSCOPY_SAMPLE_CHECKSUMS.setManagedInternally(False)
+prop_type_MICROSCOPY_SAMPLE_CHECKSUMS.setInternalNamespace(False)
+
+# MICROSCOPY_SAMPLE_DUPLICATE_OF
+prop_type_MICROSCOPY_SAMPLE_DUPLICATE_OF = tr.getOrCreateNewPropertyType('MICROSCOPY_SAMPLE_DUPLICATE_OF', DataType.VARCHAR)
+prop_type_MICROSCOPY_SAMPLE_DUPLICATE_OF.setLabel('Duplicate of data set')
+prop_type_MICROSCOPY_SAMPLE_DUPLICATE_OF.setManagedInternally(False)
+prop_type_MICROSCOPY_SAMPLE_DUPLICATE_OF.setInternalNamespace(False)
+
 # MICROSCOPY_EXPERIMENT_VERSION
 prop_type_MICROSCOPY_EXPERIMENT_VERSION = tr.getOrCreateNewPropertyType('MICROSCOPY_EXPERIMENT_VERSION', DataType.INTEGER)
 prop_type_MICROSCOPY_EXPERIMENT_VERSION.setLabel('Version')
@@ -240,6 +260,18 @@ assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_SIZE_IN_BYTES.setSect
 assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_SIZE_IN_BYTES.setPositionInForms(3)
 assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_SIZE_IN_BYTES.setShownEdit(False)
 
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_CHECKSUMS = tr.assignPropertyType(samp_type_MICROSCOPY_SAMPLE_TYPE, prop_type_MICROSCOPY_SAMPLE_CHECKSUMS)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_CHECKSUMS.setMandatory(False)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_CHECKSUMS.setSection(None)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_CHECKSUMS.setPositionInForms(4)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_CHECKSUMS.setShownEdit(False)
+
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_DUPLICATE_OF = tr.assignPropertyType(samp_type_MICROSCOPY_SAMPLE_TYPE, prop_type_MICROSCOPY_SAMPLE_DUPLICATE_OF)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_DUPLICATE_OF.setMandatory(False)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_DUPLICATE_OF.setSection(None)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_DUPLICATE_OF.setPositionInForms(5)
+assignment_SAMPLE_MICROSCOPY_SAMPLE_TYPE_MICROSCOPY_SAMPLE_DUPLICATE_OF.setShownEdit(False)
+
 assignment_EXPERIMENT_MICROSCOPY_EXPERIMENT_MICROSCOPY_EXPERIMENT_VERSION = tr.assignPropertyType(exp_type_MICROSCOPY_EXPERIMENT, prop_type_MICROSCOPY_EXPERIMENT_VERSION)
 assignment_EXPERIMENT_MICROSCOPY_EXPERIMENT_MICROSCOPY_EXPERIMENT_VERSION.setMandatory(False)
 assignment_EXPERIMENT_MICROSCOPY_EXPERIMENT_MICROSCOPY_EXPERIMENT_VERSION.setSection(None)
@@ -14,6 +14,81 @@ from xml.etree import ElementTree as ET
 import ch.ethz.scu.obit.microscopy.readers.MicroscopyReader as MicroscopyReader
 import java.io.File
 import java.util.Arrays
+from SeriesMetadataTable import SeriesMetadataTable
+
+
+def installed_bioformats_version():
+    """Return the version of the bio-formats library on the class path
+    without opening any file."""
+
+    return str(FormatTools.VERSION)
+
+
+class LazySeriesMetadata:
+    """List-like access to the metadata of all series in a file, that converts
+    the Java attribute map of a series to Python only when the series is
+    accessed.
+
+    Series are converted in ascending order (accessing series i converts all
+    series up to i that were not converted yet), so that the order of the
+    series can still be checked and the converted series are kept in a
+    SeriesMetadataTable."""
+
+    def __init__(self, attributes, logger):
+        """Constructor.
+
+        @param attributes Java map from "series_<i>" to the Java map of
+                          metadata attributes of series i, as returned by
+                          MicroscopyReader.getAttributes().
+        @param logger Logger object
+        """
+
+        self._attributes = attributes
+        self._logger = logger
+        self._numSeries = len(attributes)
+        self._table = SeriesMetadataTable()
+
+    def __len__(self):
+        return self._numSeries
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._numSeries
+        if i < 0 or i >= self._numSeries:
+            raise IndexError("series index out of range")
+        while len(self._table) <= i:
+            self._convert(len(self._table))
+        return self._table[i]
+
+    def __iter__(self):
+        for i in range(self._numSeries):
+            yield self[i]
+
+    def convertAll(self):
+        """Convert all remaining series and return the SeriesMetadataTable."""
+
+        while len(self._table) < self._numSeries:
+            self._convert(len(self._table))
+        return self._table
+
+    def _convert(self, i):
+        """Convert the metadata of series i and append it to the table."""
+
+        # Get metadata attributes for current series
+        d = self._attributes.get("series_" + str(i))
+
+        # Assertion
+        nSeries = None
+        if d is not None:
+            nSeries = d.get("numSeries")
+        if nSeries is None or int(nSeries) != i:
+            err = "Series " + str(i) + ": expected numSeries = " + \
+            str(i) + "; found = " + str(nSeries)
+            self._logger.error(err)
+            raise Exception(err)
+
+        self._table.appendItems([(key, d.get(key)) for key in d.keySet()])
+
 
 class BioFormatsProcessor:
     """The BioFormatsProcessor class scans a file using the bio-formats library and
@@ -57,51 +132,46 @@ class BioFormatsProcessor:
 
     def getMetadata(self, asXML=False):
         """
-        Return the series metadata in a list.
+        Return the series metadata in a list (of XML strings if asXML is True)
+        or in a SeriesMetadataTable.
         """
 
-        # Get the metadata from the MicroscopyReader
-        metadata = self._microscopyReader.getAttributes()
+        # Convert all series (in ascending order)
+        if asXML is True:
+            return list(self.iterMetadata(asXML=True))
+        return self.getLazyMetadata().convertAll()
 
-        # Instantiate metadata list
-        seriesMetadataArray = []
 
-        # Process all series. Important, make sure to extract the metadata
-        # per series in ascending order!
-        for i in range(len(metadata)):
-        
-            # Create an XML node
-            node = ET.Element("MicroscopyFileSeries")
+    def getLazyMetadata(self):
+        """
+        Return the series metadata as a LazySeriesMetadata object: the
+        attributes of a series are converted from Java only when the series
+        is accessed.
+        """
 
-            # Current key
-            key = "series_" + str(i)
+        return LazySeriesMetadata(self._microscopyReader.getAttributes(),
+                                  self._logger)
 
-            # Get metadata attributes for current series
-            d = metadata.get(key)
 
-            # Assertion
-            nSeries = d.get("numSeries")
-            if nSeries is None or int(nSeries) != i:
-                err = "Series " + str(i) + ": expected numSeries = " + \
-                str(i) + "; found = " + str(nSeries)
-                self._logger.error(err)
-                raise Exception(err)
-
-            # Add all attributes to the XML node (make sure to encode 
-            # everything as unicode).
-            metadataKeys = d.keySet()
-            for key in metadataKeys:
-                value = d.get(key)
-                node.set(key, value)
-
-            # Convert to XML string if needed or append as is
+    def iterMetadata(self, asXML=False):
+        """
+        Yield the metadata of the series (as XML strings if asXML is True)
+        in ascending order, converting one series at a time.
+        """
+
+        lazyMetadata = self.getLazyMetadata()
+        for seriesMetadata in lazyMetadata:
             if asXML is True:
-                seriesMetadataArray.append(ET.tostring(node, encoding="UTF-8"))
-            else:
-                seriesMetadataArray.append(node.attrib)
 
-        # Return the list of metadata entries per series
-        return seriesMetadataArray
+                # Add all attributes to an XML node (make sure to encode
+                # everything as unicode).
+                node = ET.Element("MicroscopyFileSeries")
+                for key, value in seriesMetadata.iteritems():
+                    node.set(key, value)
+                yield ET.tostring(node, encoding="UTF-8")
+
+            else:
+                yield seriesMetadata
 
 
     def getNumSeries(self):
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import threading
+import time
+from java.io import FileInputStream
+from java.nio import ByteBuffer
+from java.security import MessageDigest
+from java.util.concurrent import Callable
+from java.util.concurrent import ExecutionException
+from java.util.concurrent import Executors
+from java.util.zip import CRC32
+
+
+# Name of the sidecar manifest stored in checksummed folders
+MANIFEST_FILE_NAME = ".content_checksums.txt"
+
+# First line of the sidecar manifest (with format version)
+MANIFEST_HEADER = "# ContentChecksums 1 (crc32 sha256 size path)"
+
+# Size of the blocks read from the files
+BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def file_checksums(fileName, blockSize=BLOCK_SIZE):
+    """Compute the CRC32 and SHA-256 checksums of a file in a single
+    streaming pass.
+
+    @param fileName Full path to the file
+    @param blockSize Size in bytes of the blocks read from the file
+    @return tuple (crc32, sha256, size) with the checksums as hexadecimal
+            strings
+    """
+
+    crc = CRC32()
+    digest = MessageDigest.getInstance("SHA-256")
+    buffer = ByteBuffer.allocate(blockSize)
+    array = buffer.array()
+    size = 0
+
+    channel = FileInputStream(fileName).getChannel()
+    try:
+        while True:
+            buffer.clear()
+            n = channel.read(buffer)
+            if n < 0:
+                break
+            crc.update(array, 0, n)
+            digest.update(array, 0, n)
+            size += n
+    finally:
+        channel.close()
+
+    sha256 = "".join(["%02x" % (b & 0xff) for b in digest.digest()])
+    return "%08x" % crc.getValue(), sha256, size
+
+
+def write_manifest(folder, checksums):
+    """Write the checksums of the files of a folder to its sidecar manifest.
+
+    @param folder Full path to the folder
+    @param checksums List of tuples (relativePath, crc32, sha256, size)
+    @return the SHA-256 checksum of the manifest
+    """
+
+    lines = [MANIFEST_HEADER]
+    for relativePath, crc32, sha256, size in checksums:
+        lines.append(crc32 + " " + sha256 + " " + str(size) + " " +
+                     relativePath)
+
+    fileName = os.path.join(folder, MANIFEST_FILE_NAME)
+    f = open(fileName, "w")
+    try:
+        f.write("\n".join(lines).encode("UTF-8") + "\n")
+    finally:
+        f.close()
+
+    return file_checksums(fileName)[1]
+
+
+class _ChecksumTask(Callable):
+    """Checksum a file or all files of a folder."""
+
+    def __init__(self, checksummer, path):
+        self._checksummer = checksummer
+        self._path = path
+
+    def call(self):
+        return self._checksummer.computeChecksums(self._path)
+
+
+class ContentChecksums:
+    """Compute the CRC32 and SHA-256 checksums of the files being registered.
+
+    None of the registration stages reads the whole content of the files
+    (metadata extraction and thumbnail generation read headers and a few
+    planes), so the files are read in a read-ahead pass by a small pool of
+    threads: a file is submitted as soon as its registration starts and its
+    checksums are collected right before it is stored, while the metadata
+    and thumbnails are processed in parallel."""
+
+    def __init__(self, numThreads, logger):
+        """Constructor.
+
+        @param numThreads Number of files read at the same time
+        @param logger Logger object
+        """
+
+        self._logger = logger
+
+        # The threads are started by the first call to submit()
+        self._numThreads = max(1, int(numThreads))
+        self._executor = None
+        self._pending = {}
+
+        # Statistics
+        self._lock = threading.Lock()
+        self._numFiles = 0
+        self._numBytes = 0
+        self._seconds = 0.0
+
+    def submit(self, path):
+        """Start checksumming a file or all files of a folder.
+
+        @param path Full path to the file or folder
+        """
+
+        if self._executor is None:
+            self._executor = Executors.newFixedThreadPool(self._numThreads)
+        if path not in self._pending:
+            self._pending[path] = self._executor.submit(
+                _ChecksumTask(self, path))
+
+    def get(self, path):
+        """Return the checksums of a file or folder, waiting for the
+        read-ahead pass to complete (or computing them right away if the path
+        was not submitted).
+
+        @param path Full path to the file or folder
+        @return tuple (checksums, numBytes, seconds), where checksums is a
+                list of tuples (relativePath, crc32, sha256, size) with the
+                paths relative to path (the file name for a file), numBytes
+                the number of bytes read and seconds the time spent reading
+                and hashing
+        """
+
+        future = self._pending.pop(path, None)
+        if future is None:
+            return self.computeChecksums(path)
+
+        try:
+            return future.get()
+        except ExecutionException, e:
+            raise Exception("Could not checksum " + path + ": " +
+                            str(e.getCause()))
+
+    def computeChecksums(self, path):
+        """Compute the checksums of a file or all files of a folder.
+
+        @see get()
+        """
+
+        start = time.time()
+        checksums = []
+        numBytes = 0
+        if os.path.isdir(path):
+            path = path.rstrip(os.sep)
+            for root, folders, files in os.walk(path):
+                folders.sort()
+                files.sort()
+                for name in files:
+                    if root == path and name == MANIFEST_FILE_NAME:
+                        continue
+                    fileName = os.path.join(root, name)
+                    crc32, sha256, size = file_checksums(fileName)
+                    checksums.append((fileName[len(path) + 1:], crc32,
+                                      sha256, size))
+                    numBytes += size
+        else:
+            crc32, sha256, size = file_checksums(path)
+            checksums.append((os.path.basename(path), crc32, sha256, size))
+            numBytes += size
+        seconds = time.time() - start
+
+        self._lock.acquire()
+        try:
+            self._numFiles += len(checksums)
+            self._numBytes += numBytes
+            self._seconds += seconds
+        finally:
+            self._lock.release()
+
+        return checksums, numBytes, seconds
+
+    def getStatistics(self):
+        """Return the number of files and bytes checksummed, and the total
+        time in seconds spent reading and hashing them."""
+
+        self._lock.acquire()
+        try:
+            return self._numFiles, self._numBytes, self._seconds
+        finally:
+            self._lock.release()
+
+    def shutdown(self):
+        """Cancel the checksums that were not collected and stop the
+        threads (if they were started)."""
+
+        for future in self._pending.values():
+            future.cancel(True)
+        self._pending = {}
+        if self._executor is not None:
+            self._executor.shutdownNow()
+            self._executor = None
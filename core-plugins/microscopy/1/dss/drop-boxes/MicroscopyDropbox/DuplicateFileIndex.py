@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import threading
+from SeriesMetadataCache import content_fingerprint
+
+
+class DuplicateFileIndex:
+    """Persistent index of the content of the registered microscopy files,
+    used to detect files that are registered again (e.g. resubmitted under
+    a new experiment).
+
+    Files are keyed by their size and a fast partial hash (see
+    content_fingerprint()); each key is stored as one file in the index
+    folder, so a lookup is a single file access whatever the size of the
+    index. A key file lists the registered files with that key, one per
+    line (SHA-256 of the full content, code of the MICROSCOPY_IMG data set
+    and path of the file relative to the incoming folder, tab-separated):
+    a match on the key is confirmed by comparing the full hash.
+
+        entries/<fingerprint>.txt  registered files
+        staged/<name>.txt          files of a registration that is not
+                                   committed yet (key, SHA-256, data set
+                                   code and path, tab-separated)
+
+    As for the ImageRepresentationQueue, the files of a transaction are
+    staged and only added to the index (commitStaged()) once openBIS has
+    committed the registration, so that the index never points to data sets
+    that do not exist. Files staged by the current transaction are found by
+    lookup() as well."""
+
+    # Folder containing the index
+    _indexFolder = ""
+
+    # Logger
+    _logger = None
+
+    def __init__(self, indexFolder, logger):
+        """Constructor.
+
+        @param indexFolder Folder containing the index (created if it does
+                           not exist)
+        @param logger logger object
+        """
+
+        self._indexFolder = indexFolder
+        self._logger = logger
+        self._lock = threading.Lock()
+
+        # Files staged by this instance (key -> list of entries)
+        self._staged = {}
+
+        for subFolder in ["entries", "staged"]:
+            folder = os.path.join(self._indexFolder, subFolder)
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+
+    def getKey(self, fileName):
+        """Return the index key of a file (fingerprint of its size and of
+        sampled blocks of its content).
+
+        @param fileName Full path to the file
+        """
+
+        return content_fingerprint(fileName)[0]
+
+    def lookup(self, key):
+        """Return the registered (or staged) files with the given key.
+
+        @param key Key as returned by getKey()
+        @return list of dictionaries with keys "sha256", "dataSetCode",
+                "relativePath" and "staged" (True for the files staged by
+                this instance); empty if there is none
+        """
+
+        entries = list(self._staged.get(key, []))
+
+        entryFile = self._getEntryFileName(key)
+        if not os.path.exists(entryFile):
+            return entries
+
+        try:
+            f = open(entryFile, "r")
+            try:
+                for line in f:
+                    fields = line.decode("UTF-8").rstrip("\r\n").split("\t")
+                    if len(fields) == 3:
+                        entries.append(self._toEntry(fields, False))
+            finally:
+                f.close()
+        except IOError, e:
+            self._logger.error("DUPLICATEFILEINDEX::lookup(): " +
+                               "Could not read " + entryFile + ": " + str(e))
+        return entries
+
+    def stage(self, stagingName, key, sha256, dataSetCode, relativePath):
+        """Stage a registered file until the registration is committed.
+
+        @param stagingName Name of the registration (e.g. the name of the
+                           incoming folder)
+        @param key Key as returned by getKey()
+        @param sha256 SHA-256 checksum of the content of the file
+        @param dataSetCode Code of the MICROSCOPY_IMG data set of the file
+        @param relativePath Path of the file relative to the incoming folder
+        """
+
+        fields = [sha256, dataSetCode, relativePath]
+        self._staged.setdefault(key, []).append(self._toEntry(fields, True))
+        self._append(self._getStagingFileName(stagingName),
+                     [[key] + fields])
+
+    def discardStaged(self, stagingName):
+        """Discard the files staged by a registration (e.g. by a previous
+        attempt that was rolled back)."""
+
+        stagingFile = self._getStagingFileName(stagingName)
+        if os.path.exists(stagingFile):
+            os.remove(stagingFile)
+
+    def commitStaged(self, stagingName):
+        """Add the files staged by a committed registration to the index.
+
+        @return number of files added
+        """
+
+        stagingFile = self._getStagingFileName(stagingName)
+        if not os.path.exists(stagingFile):
+            return 0
+
+        numFiles = 0
+        f = open(stagingFile, "r")
+        try:
+            for line in f:
+                fields = line.decode("UTF-8").rstrip("\r\n").split("\t")
+                if len(fields) != 4:
+                    continue
+                self._append(self._getEntryFileName(fields[0]), [fields[1:]])
+                numFiles += 1
+        finally:
+            f.close()
+        os.remove(stagingFile)
+
+        self._logger.info("DUPLICATEFILEINDEX::commitStaged(): " +
+                          "Indexed " + str(numFiles) + " files from " +
+                          stagingName + ".")
+        return numFiles
+
+    def _append(self, fileName, rows):
+        """Append tab-separated rows to a file."""
+
+        self._lock.acquire()
+        try:
+            f = open(fileName, "a")
+            try:
+                for row in rows:
+                    f.write("\t".join(row).encode("UTF-8") + "\n")
+            finally:
+                f.close()
+        finally:
+            self._lock.release()
+
+    def _toEntry(self, fields, staged):
+        """Return the dictionary of the fields of an entry."""
+
+        return {"sha256": fields[0], "dataSetCode": fields[1],
+                "relativePath": fields[2], "staged": staged}
+
+    def _getEntryFileName(self, key):
+        """Return the full path of the file storing the entries of a key."""
+
+        return os.path.join(self._indexFolder, "entries", key + ".txt")
+
+    def _getStagingFileName(self, stagingName):
+        """Return the full path of the staging file of a registration."""
+
+        return os.path.join(self._indexFolder, "staged", stagingName + ".txt")
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import shutil
+import threading
+import time
+from java.io import File
+from java.io import FileInputStream
+from java.io import FileOutputStream
+from java.lang import ProcessBuilder
+from java.nio.file import Files
+from java.nio.file import LinkOption
+from java.nio.file import StandardCopyOption
+
+
+# Transfer strategies
+RENAME = "rename"
+HARDLINK = "hardlink"
+REFLINK = "reflink"
+COPY = "copy"
+
+# Strategies that can only work when source and target are on the same
+# device (reflink is not one of them: it can clone across btrfs subvolumes,
+# which have different device ids)
+SAME_DEVICE_STRATEGIES = [RENAME, HARDLINK]
+
+
+def get_device(path):
+    """Return the id of the device (filesystem) of a path, or of its closest
+    existing parent, or None if it cannot be determined."""
+
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+    try:
+        return Files.getAttribute(File(path).toPath(), "unix:dev",
+                                  [LinkOption.NOFOLLOW_LINKS])
+    except Exception:
+        return None
+
+
+class FileTransfer:
+    """Transfer a file or a folder (e.g. a Leica TIFF Series) to another
+    location with the cheapest strategy that works:
+
+        rename    move the source (same mount point only)
+        hardlink  link every file (same mount point only); the source is kept
+        reflink   copy-on-write clone of every file (cp --reflink=always;
+                  needs a filesystem with reflink support, e.g. btrfs or
+                  XFS); the source is kept
+        copy      buffered copy, with progress logged every
+                  progressIntervalInBytes bytes; the source is kept
+
+    The strategies are tried in the configured order. Rename and hardlink
+    are skipped when source and target are on different devices; they can
+    still fail with a cross-device error when the device is the same but
+    the mount points differ (e.g. a bind mount). Reflink is always tried,
+    since cp --reflink=always fails fast when cloning is not possible. A
+    strategy that fails is cleaned up and the next one is tried."""
+
+    # Size of the blocks of the buffered copy
+    _BLOCK_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, logger, strategies=None,
+                 progressIntervalInBytes=1073741824):
+        """Constructor.
+
+        @param logger Logger object
+        @param strategies List of strategies to try in order (default:
+                          hardlink, reflink, copy)
+        @param progressIntervalInBytes Number of bytes between two progress
+                                       messages of the buffered copy
+        """
+
+        if strategies is None:
+            strategies = [HARDLINK, REFLINK, COPY]
+        for strategy in strategies:
+            if strategy not in [RENAME, HARDLINK, REFLINK, COPY]:
+                raise Exception("Unknown transfer strategy '" + str(strategy) +
+                                "'.")
+
+        self._logger = logger
+        self._strategies = strategies
+        self._progressIntervalInBytes = progressIntervalInBytes
+
+        # Statistics: map from strategy to [count, bytes, seconds]
+        self._lock = threading.Lock()
+        self._statistics = {}
+
+    def transfer(self, source, target):
+        """Transfer a file or folder.
+
+        @param source Full path to the file or folder
+        @param target Full path to the target (must not exist; its parent
+                      folder is created)
+        @return the strategy that was used
+        """
+
+        if os.path.exists(target):
+            raise Exception("Transfer target " + target + " already exists.")
+        parent = os.path.dirname(target)
+        if not os.path.exists(parent):
+            os.makedirs(parent)
+
+        sameDevice = get_device(source) is not None and \
+            get_device(source) == get_device(parent)
+
+        numBytes = self._getSize(source)
+        errors = []
+        for strategy in self._strategies:
+            if strategy in SAME_DEVICE_STRATEGIES and not sameDevice:
+                continue
+
+            start = time.time()
+            try:
+                if strategy == RENAME:
+                    Files.move(File(source).toPath(), File(target).toPath(),
+                               [StandardCopyOption.ATOMIC_MOVE])
+                elif strategy == HARDLINK:
+                    self._walk(source, target, self._link)
+                elif strategy == REFLINK:
+                    self._reflink(source, target)
+                else:
+                    self._walk(source, target, self._copy)
+            except Exception, e:
+                errors.append(strategy + ": " + str(e))
+                self._remove(target)
+                continue
+
+            seconds = time.time() - start
+            self._record(strategy, numBytes, seconds)
+            self._logger.info("FILETRANSFER::transfer(): " + strategy + " " +
+                              source + " -> " + target + " (" +
+                              str(numBytes / (1024 * 1024)) + " MiB in " +
+                              ("%.2f" % seconds) + " s).")
+            return strategy
+
+        raise Exception("Could not transfer " + source + " to " + target +
+                        ": " + "; ".join(errors))
+
+    def getStatistics(self):
+        """Return a dictionary mapping each used strategy to a tuple (number
+        of transfers, bytes, seconds)."""
+
+        self._lock.acquire()
+        try:
+            statistics = {}
+            for strategy, (count, numBytes, seconds) in \
+                    self._statistics.iteritems():
+                statistics[strategy] = (count, numBytes, seconds)
+            return statistics
+        finally:
+            self._lock.release()
+
+    def _record(self, strategy, numBytes, seconds):
+        """Add a transfer to the statistics."""
+
+        self._lock.acquire()
+        try:
+            entry = self._statistics.setdefault(strategy, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += numBytes
+            entry[2] += seconds
+        finally:
+            self._lock.release()
+
+    def _walk(self, source, target, transferFile):
+        """Apply transferFile(source, target) to a file, or to all files of
+        a folder (recreating its subfolders)."""
+
+        if not os.path.isdir(source):
+            transferFile(source, target)
+            return
+
+        source = source.rstrip(os.sep)
+        for root, folders, files in os.walk(source):
+            targetRoot = target + root[len(source):]
+            if not os.path.exists(targetRoot):
+                os.makedirs(targetRoot)
+            for name in files:
+                transferFile(os.path.join(root, name),
+                             os.path.join(targetRoot, name))
+
+    def _link(self, source, target):
+        """Create a hard link."""
+
+        Files.createLink(File(target).toPath(), File(source).toPath())
+
+    def _reflink(self, source, target):
+        """Clone a file or folder with cp --reflink=always."""
+
+        builder = ProcessBuilder(["cp", "-R", "--reflink=always",
+                                  source, target])
+        builder.redirectErrorStream(True)
+        process = builder.start()
+        output = process.getInputStream()
+        message = []
+        while True:
+            c = output.read()
+            if c == -1:
+                break
+            message.append(chr(c))
+        exitValue = process.waitFor()
+        if exitValue != 0:
+            raise Exception("cp exited with " + str(exitValue) + ": " +
+                            "".join(message).strip())
+
+    def _copy(self, source, target):
+        """Copy a file in blocks, logging the progress."""
+
+        size = os.path.getsize(source)
+        inputChannel = FileInputStream(source).getChannel()
+        try:
+            outputChannel = FileOutputStream(target).getChannel()
+            try:
+                position = 0
+                nextProgress = self._progressIntervalInBytes
+                while position < size:
+                    position += inputChannel.transferTo(
+                        position, min(self._BLOCK_SIZE, size - position),
+                        outputChannel)
+                    if position >= nextProgress:
+                        self._logger.info("FILETRANSFER::_copy(): " +
+                                          source + ": " +
+                                          str(position / (1024 * 1024)) +
+                                          " of " + str(size / (1024 * 1024)) +
+                                          " MiB copied.")
+                        nextProgress += self._progressIntervalInBytes
+            finally:
+                outputChannel.close()
+        finally:
+            inputChannel.close()
+
+    def _getSize(self, path):
+        """Return the size in bytes of a file or of all files in a folder."""
+
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+
+        size = 0
+        for root, folders, files in os.walk(path):
+            for name in files:
+                size += os.path.getsize(os.path.join(root, name))
+        return size
+
+    def _remove(self, path):
+        """Remove a (partially transferred) file or folder."""
+
+        if os.path.isdir(path):
+            shutil.rmtree(path, True)
+        elif os.path.exists(path):
+            os.remove(path)
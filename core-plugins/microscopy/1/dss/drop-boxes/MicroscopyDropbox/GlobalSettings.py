@@ -23,3 +23,219 @@ class GlobalSettings(object):
     # full the resolution and at 1/4 of the full resolution (in X and Y). Please 
     # notice that a minimum resolution of 128x128 is enforced. 
     ImageResolutions =  []
+
+    # Number of worker threads used to extract the series metadata (via
+    # bio-formats) from all microscopy files in a properties file before
+    # the actual registration starts. Only MicroscopyFile nodes that do
+    # not already carry the series metadata (i.e. that have no children)
+    # are processed. Set to 1 to extract the metadata serially.
+    NumMetadataExtractionWorkers = 4
+
+    # Keep a persistent cache of the series metadata extracted by bio-formats,
+    # so that files that are uploaded again (e.g. after a failed transaction)
+    # do not need to be parsed again. The entries are keyed by a fingerprint
+    # of the content of the file and by the version of bio-formats; a hit
+    # also requires the same file name and modification time. The entries
+    # are stored in the cache/seriesMetadata subfolder of the dropbox. The
+    # least recently used entries are evicted at the end of each
+    # registration (successful or not) as soon as either limit is exceeded.
+    UseSeriesMetadataCache = True
+    SeriesMetadataCacheMaxEntries = 10000
+    SeriesMetadataCacheMaxSizeInBytes = 512 * 1024 * 1024
+
+    # Experiment attachments up to this size (in bytes) are read into memory
+    # and stored as openBIS attachments of the experiment. Larger files are
+    # instead moved (without buffering them) into a dataset of type
+    # MICROSCOPY_EXPERIMENT_ATTACHMENT that is linked to the experiment.
+    MaxAttachmentSizeInBytes = 64 * 1024 * 1024
+
+    # Keep a journal of the registration of each incoming folder in the
+    # cache/journals subfolder of the dropbox. The journal records the series
+    # metadata extracted from each file and the outcome of the registration
+    # of each file: if the registration fails, the retry reuses the already
+    # extracted metadata. The journal is deleted once the registration of
+    # the incoming folder has been committed.
+    UseRegistrationJournal = True
+
+    # Split very large incoming folders into several smaller incoming folders
+    # (shards) that are registered in separate transactions. Each experiment
+    # gets at least one shard of its own, and an experiment is split further
+    # as soon as a shard would exceed ShardMaxFiles files or
+    # ShardMaxSizeInBytes bytes. The shards are created in ShardTargetFolder,
+    # which must be set explicitly to the incoming folder of this dropbox and
+    # must be on the same file system as the incoming data (the files are
+    # renamed). If it is None, no shards are created and incoming folders are
+    # registered as a whole (an error is logged).
+    UseSharding = False
+    ShardMaxFiles = 200
+    ShardMaxSizeInBytes = 100 * 1024 * 1024 * 1024
+    ShardTargetFolder = None
+
+    # Append the time spent in each stage of the registration (XML parsing,
+    # bio-formats parsing, metadata-to-XML conversion, dataset creation and
+    # file moving; per file and per series) to logs/timings.jsonl as JSON
+    # lines, followed by a per-stage summary line for each transaction.
+    WriteStageTimings = True
+
+    # Read the series metadata of plain TIFF and single-file OME-TIFF files
+    # directly from the TIFF header (IFDs and OME-XML description) instead of
+    # parsing the files with bio-formats. Files that cannot be read this way
+    # are still parsed with bio-formats. The first sniffed file of every
+    # registration, and then every VerifyTIFFHeaderSnifferInterval-th one, is
+    # also parsed with bio-formats (every one if VerifyTIFFHeaderSniffer is
+    # True; none of them if the interval is 0): the bio-formats metadata is
+    # used, and if it differs, the differences are logged as errors and the
+    # sniffer is not used for the rest of the registration (see also
+    # benchmark/BenchmarkTIFFHeaderSniffer.py to check a set of files).
+    UseTIFFHeaderSniffer = False
+    VerifyTIFFHeaderSniffer = False
+    VerifyTIFFHeaderSnifferInterval = 100
+
+    # Extract the series metadata with bio-formats in separate worker
+    # processes (JVMs) instead of in the DSS, so that a pathological file
+    # cannot hang or exhaust the heap of the DSS. Each file must be processed
+    # within MetadataWorkerTimeoutInSeconds (including the start of a new
+    # worker); each worker is limited to MetadataWorkerMaxHeapSize of heap
+    # (java -Xmx syntax). A worker that times out or crashes is replaced, and
+    # the file is retried up to MetadataWorkerMaxRetries times. Workers are
+    # also replaced after MetadataWorkerMaxFilesPerProcess files. At most
+    # NumMetadataWorkerProcesses files are processed at the same time (see
+    # also NumMetadataExtractionWorkers).
+    UseMetadataWorkerProcesses = False
+    NumMetadataWorkerProcesses = 2
+    MetadataWorkerTimeoutInSeconds = 600
+    MetadataWorkerMaxHeapSize = "2g"
+    MetadataWorkerMaxFilesPerProcess = 100
+    MetadataWorkerMaxRetries = 1
+
+    # Create the representative image (maximum intensity projection) of a
+    # dataset by streaming the planes of each channel one at a time into a
+    # running maximum (memory bounded by one plane per channel), instead of
+    # using the generic openBIS implementation. The channels are projected by
+    # NumMIPThreads threads in parallel. If the streaming projection fails,
+    # the generic implementation is used.
+    UseStreamingMIP = False
+    NumMIPThreads = 1
+
+    # Write the index of the files of each Leica TIFF Series folder (file
+    # names parsed into series, timepoint, plane and channel) to a
+    # .leica_tiff_series_manifest.txt file inside the folder. Note that the
+    # manifest is written into the user's data in incoming and is therefore
+    # stored with (and becomes part of) the registered dataset. Retries and
+    # the export read it instead of scanning the folder again. Set to False
+    # to store the folders unchanged.
+    WriteLeicaTIFFSeriesManifest = True
+
+    # Planes of a Leica TIFF Series projected into the representative image
+    # (MIP), so that the cost of the thumbnail is bounded independently of
+    # the length of the acquisition. One of:
+    #   "all"             all planes of all timepoints
+    #   "first_timepoint" the planes of the earliest timepoint in the file
+    #                     names
+    #   "every_nth"       every MIPSamplingStep-th plane of each channel
+    #   "byte_budget"     evenly spaced planes, at most MIPSamplingByteBudget
+    #                     bytes in total (at least one plane per channel)
+    MIPSampling = "all"
+    MIPSamplingStep = 10
+    MIPSamplingByteBudget = 256 * 1024 * 1024
+
+    # Register the MICROSCOPY_IMG data sets without image representations
+    # (thumbnails at ImageResolutions and representative MIP), so that the
+    # registration commits as soon as possible, and queue them in the
+    # cache/representationQueue subfolder of the dropbox instead. The queued
+    # data sets are processed in the background by the worker threads of the
+    # microscopy-deferred-image-representations maintenance task; a data
+    # set whose representations could not be rendered and stored
+    # ImageRepresentationMaxAttempts times is moved to the failed/ subfolder
+    # of the queue. The queue depth and processing rate, and the queued data
+    # sets that were not processed for a day (orphaned), are written to
+    # cache/representationQueue/statistics.txt.
+    DeferImageRepresentations = False
+    ImageRepresentationMaxAttempts = 3
+
+    # Generate a power-of-two image pyramid (1/2, 1/4, 1/8, ... of the full
+    # resolution) as image representations of single-file images whose
+    # larger side is at least ImagePyramidMinImageSize pixels, so that the
+    # image viewer can read a level close to the requested display size
+    # instead of scaling the full-resolution image on the fly. The levels
+    # are added to ImageResolutions from ImagePyramidMaxLevelSize pixels
+    # (longer side; larger levels would cost as much as reading the original)
+    # down to ImagePyramidMinLevelSize pixels (shorter side; openBIS enforces
+    # a minimum of 128), and at most ImagePyramidMaxLevels levels are
+    # generated. The levels are generated at registration time, or later if
+    # DeferImageRepresentations is True.
+    GenerateImagePyramid = False
+    ImagePyramidMinImageSize = 2048
+    ImagePyramidMinLevelSize = 128
+    ImagePyramidMaxLevelSize = 4096
+    ImagePyramidMaxLevels = 8
+
+    # Choose the image representations of each dataset from the size of its
+    # images (sizeX, sizeY and number of planes in the series metadata)
+    # instead of generating ImageResolutions for all datasets. The candidates
+    # are ImageResolutions plus, for images larger than
+    # ImagePyramidMinImageSize, the levels of the image pyramid (see above).
+    # No representations are generated for images whose larger side is
+    # smaller than RepresentationPolicyMinImageSize; candidates that would
+    # not downscale the image are dropped, and the largest candidates are
+    # dropped until the estimated size of all representations of a dataset
+    # is at most RepresentationPolicyMaxBytesPerDataset.
+    UseImageRepresentationPolicy = False
+    RepresentationPolicyMinImageSize = 512
+    RepresentationPolicyMaxBytesPerDataset = 256 * 1024 * 1024
+
+    # Render the representative images (MIP) of all series of a file
+    # concurrently with up to NumThumbnailRenderWorkers threads, before the
+    # file is moved into its dataset (requires UseStreamingMIP; set to 1 to
+    # render them one after the other while the datasets are stored). By
+    # default, only the first series of a file gets a representative image;
+    # set GenerateMIPForAllSeries to True to create one for every series.
+    # ThumbnailGenerationMachineLoad (e.g. 1.0), if set, is the machine load
+    # openBIS may use to generate the thumbnails at ImageResolutions of a
+    # dataset in parallel.
+    NumThumbnailRenderWorkers = 1
+    GenerateMIPForAllSeries = False
+    ThumbnailGenerationMachineLoad = None
+
+    # Stage every microscopy file (or Leica TIFF Series folder) into
+    # ZeroCopyStagingFolder before it is moved into its dataset. Set it to a
+    # folder on the filesystem of the openBIS store (e.g. a "staging" folder
+    # next to the store root): when incoming is on the same mount point, the
+    # file is hard-linked instead of copied; on filesystems with reflink
+    # support (e.g. btrfs or XFS) it can otherwise be cloned. openBIS then
+    # moves the staged file into the store with a plain rename. The incoming
+    # copy is left untouched until the registration is committed, so failed
+    # registrations can be retried. StorageTransferStrategies are tried in
+    # order ("rename", "hardlink", "reflink", "copy"); the buffered copy logs
+    # its progress every StorageTransferProgressIntervalInBytes bytes.
+    ZeroCopyStagingFolder = None
+    StorageTransferStrategies = ["hardlink", "reflink", "copy"]
+    StorageTransferProgressIntervalInBytes = 1024 * 1024 * 1024
+
+    # Compute the CRC32 and SHA-256 checksums of all registered files. The
+    # files are read by NumContentChecksumThreads threads in a read-ahead
+    # pass that runs while their metadata and thumbnails are processed. The
+    # checksums of a file are stored in the MICROSCOPY_SAMPLE_CHECKSUMS
+    # property of its sample; for a folder (Leica TIFF Series), the checksums
+    # of its files are written to a .content_checksums.txt sidecar manifest
+    # stored with the dataset, and the property holds the SHA-256 checksum of
+    # the manifest. The hashing time and throughput ("checksum") and the
+    # time the registration waited for it ("checksum_wait") are reported in
+    # the stage timings.
+    ComputeContentChecksums = False
+    NumContentChecksumThreads = 2
+
+    # Detect microscopy files that are identical to files registered before
+    # (e.g. resubmitted under a new experiment) with a persistent index of
+    # the registered files in the cache/duplicateFileIndex subfolder of the
+    # dropbox. Files are matched on their size and a partial hash, and the
+    # match is confirmed with the SHA-256 checksum of the full content (see
+    # ComputeContentChecksums). DuplicateFilePolicy is one of:
+    #   None         do not detect duplicate files
+    #   "warn"       log a warning and register the file as usual
+    #   "skip"       do not register the file
+    #   "reference"  register a sample for the file whose
+    #                MICROSCOPY_SAMPLE_DUPLICATE_OF property references the
+    #                MICROSCOPY_IMG data set of the registered file, without
+    #                extracting metadata or storing the file again
+    DuplicateFilePolicy = None
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+
+class ImageIdentifierIndex:
+    """Index of the image identifiers of a multi-series file, grouped by
+    series.
+
+    openBIS calls extractImagesMetadata() with all image identifiers of the
+    file on the configuration of every series. If all configurations of a
+    file share one index, the identifiers are grouped once and every
+    configuration only touches the identifiers of its own series.
+
+    The identifiers of a series are released when the series takes them; a
+    second request for the same series groups the identifiers again."""
+
+    def __init__(self):
+        """Constructor."""
+
+        # Map from (imagePath, number of identifiers) to a map from series
+        # to the list of (identifier, series, timepoint, plane, channel)
+        self._groups = {}
+
+    def take(self, imagePath, imageIdentifiers, seriesNum):
+        """Return the list of (identifier, series, timepoint, plane, channel)
+        for the requested series of the file.
+
+        @param imagePath Full path to the file
+        @param imageIdentifiers Array of ImageIdentifier's for the whole file
+        @param seriesNum Index of the series
+        """
+
+        key = (imagePath, len(imageIdentifiers))
+        groups = self._groups.get(key)
+        if groups is None or seriesNum not in groups:
+            groups = self.group(imageIdentifiers)
+            self._groups[key] = groups
+
+        entries = groups.pop(seriesNum, [])
+        if len(groups) == 0:
+            del self._groups[key]
+        return entries
+
+    def group(self, imageIdentifiers):
+        """Group the image identifiers by series.
+
+        @param imageIdentifiers Array of ImageIdentifier's
+        @return map from series to the list of (identifier, series,
+                timepoint, plane, channel)
+        """
+
+        groups = {}
+        for id in imageIdentifiers:
+            series = int(id.seriesIndex)
+            entry = (id, series, int(id.timeSeriesIndex),
+                     int(id.focalPlaneIndex), int(id.colorChannelIndex))
+            try:
+                groups[series].append(entry)
+            except KeyError:
+                groups[series] = [entry]
+        return groups
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Power-of-two image pyramids for the image viewer: for large images, the
+viewer can read the stored representation closest to the requested display
+size instead of scaling the full-resolution image on the fly.
+"""
+
+
+def image_size(seriesMetadata):
+    """Return the size of the largest image of a list of series.
+
+    @param seriesMetadata List of the metadata of the series (sizeX and
+                          sizeY are used; missing sizes count as 0)
+    @return tuple (sizeX, sizeY) with the largest width and height in pixels
+    """
+
+    sizeX = max([int(m.get("sizeX", "0")) for m in seriesMetadata])
+    sizeY = max([int(m.get("sizeY", "0")) for m in seriesMetadata])
+    return sizeX, sizeY
+
+
+def pyramid_resolutions(sizeX, sizeY, minSize=128, maxSize=4096, maxLevels=8):
+    """Return the resolutions of the power-of-two pyramid levels of an image.
+
+    Level k has size ceil(sizeX / 2^k) x ceil(sizeY / 2^k); the full
+    resolution (level 0) is read from the original file and not included,
+    and so are the levels whose longer side exceeds maxSize (they would be
+    as expensive to generate as to read the original). Levels are added
+    until the shorter side would be smaller than minSize (the minimum
+    resolution supported by openBIS) or maxLevels levels were added.
+
+    @param sizeX Width of the image in pixels
+    @param sizeY Height of the image in pixels
+    @param minSize Minimum size in pixels of the shorter side of a level
+    @param maxSize Maximum size in pixels of the longer side of a level
+    @param maxLevels Maximum number of levels
+    @return list of resolutions as "WxH" strings, largest first
+    """
+
+    resolutions = []
+    sizeX = int(sizeX)
+    sizeY = int(sizeY)
+    level = 1
+    while len(resolutions) < maxLevels:
+        factor = 2 ** level
+        width = (sizeX + factor - 1) / factor
+        height = (sizeY + factor - 1) / factor
+        if min(width, height) < minSize:
+            break
+        if max(width, height) <= maxSize:
+            resolutions.append(str(width) + "x" + str(height))
+        level += 1
+    return resolutions
+
+
+def merge_resolutions(resolutions, moreResolutions):
+    """Return the resolutions of both lists without duplicates, sorted from
+    the largest to the smallest (by number of pixels)."""
+
+    merged = []
+    for resolution in list(resolutions) + list(moreResolutions):
+        if resolution not in merged:
+            merged.append(resolution)
+
+    def numPixels(resolution):
+        width, height = resolution.lower().split("x")
+        return int(width) * int(height)
+
+    merged.sort(key=numPixels, reverse=True)
+    return merged
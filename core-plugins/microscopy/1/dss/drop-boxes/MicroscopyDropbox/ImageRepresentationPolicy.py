@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+from GlobalSettings import GlobalSettings
+from ImagePyramid import image_size
+from ImagePyramid import merge_resolutions
+from ImagePyramid import pyramid_resolutions
+
+
+class ImageRepresentationPolicy:
+    """Choose the image representations of a dataset from the size of its
+    images instead of applying the same list of resolutions to all datasets.
+
+    The candidates are the configured resolutions plus, for images whose
+    longer side is at least pyramidMinImageSize pixels, the levels of a
+    power-of-two pyramid (see ImagePyramid). Then:
+
+    - no representations are generated for images of unknown size (width
+      or height missing or 0), nor for images whose longer side is
+      smaller than minImageSize (the viewer reads them at full resolution
+      at no cost);
+    - candidates that would not downscale the image are dropped;
+    - the remaining candidates are kept from the smallest to the largest as
+      long as the estimated total size of the representations (all planes
+      of all series of the dataset) does not exceed maxBytesPerDataset.
+    """
+
+    # Bytes per pixel of the bio-formats data types
+    _BYTES_PER_PIXEL = {"uint8": 1, "int8": 1, "uint16": 2, "int16": 2,
+                        "uint32": 4, "int32": 4, "float": 4, "double": 8}
+
+    def __init__(self, resolutions, minImageSize, maxBytesPerDataset,
+                 pyramidMinImageSize, pyramidMinLevelSize,
+                 pyramidMaxLevelSize, pyramidMaxLevels, logger):
+        """Constructor.
+
+        @param resolutions Configured resolutions ("WxH" strings)
+        @param minImageSize Minimum longer side in pixels of an image to
+                            generate representations
+        @param maxBytesPerDataset Maximum estimated size in bytes of all
+                                  representations of a dataset
+        @param pyramidMinImageSize Minimum longer side in pixels of an image
+                                   to add pyramid levels
+        @param pyramidMinLevelSize @see ImagePyramid.pyramid_resolutions()
+        @param pyramidMaxLevelSize @see ImagePyramid.pyramid_resolutions()
+        @param pyramidMaxLevels @see ImagePyramid.pyramid_resolutions()
+        @param logger Logger object
+        """
+
+        self._resolutions = resolutions
+        self._minImageSize = minImageSize
+        self._maxBytesPerDataset = maxBytesPerDataset
+        self._pyramidMinImageSize = pyramidMinImageSize
+        self._pyramidMinLevelSize = pyramidMinLevelSize
+        self._pyramidMaxLevelSize = pyramidMaxLevelSize
+        self._pyramidMaxLevels = pyramidMaxLevels
+        self._logger = logger
+
+    def fromGlobalSettings(logger):
+        """Create the policy configured in GlobalSettings."""
+
+        return ImageRepresentationPolicy(
+            GlobalSettings.ImageResolutions,
+            GlobalSettings.RepresentationPolicyMinImageSize,
+            GlobalSettings.RepresentationPolicyMaxBytesPerDataset,
+            GlobalSettings.ImagePyramidMinImageSize,
+            GlobalSettings.ImagePyramidMinLevelSize,
+            GlobalSettings.ImagePyramidMaxLevelSize,
+            GlobalSettings.ImagePyramidMaxLevels,
+            logger)
+
+    fromGlobalSettings = staticmethod(fromGlobalSettings)
+
+    def chooseResolutions(self, seriesMetadata):
+        """Choose the resolutions of the representations of a dataset.
+
+        @param seriesMetadata List of the metadata of the series registered
+                              in the dataset (sizeX, sizeY, sizeZ, sizeC,
+                              sizeT and datatype are used)
+        @return list of resolutions ("WxH" strings), largest first; empty
+                if no representations should be generated
+        """
+
+        sizeX, sizeY = image_size(seriesMetadata)
+        numPlanes = sum([self._getNumPlanes(m) for m in seriesMetadata])
+        bytesPerPixel = max([self._BYTES_PER_PIXEL.get(m.get("datatype"), 2)
+                             for m in seriesMetadata])
+
+        if min(sizeX, sizeY) <= 0:
+            self._log(sizeX, sizeY, numPlanes, [], 0, "unknown size")
+            return []
+
+        if max(sizeX, sizeY) < self._minImageSize:
+            self._log(sizeX, sizeY, numPlanes, [], 0, "image too small")
+            return []
+
+        # Candidates
+        candidates = self._resolutions
+        if max(sizeX, sizeY) >= self._pyramidMinImageSize:
+            candidates = merge_resolutions(candidates, pyramid_resolutions(
+                sizeX, sizeY, self._pyramidMinLevelSize,
+                self._pyramidMaxLevelSize, self._pyramidMaxLevels))
+        else:
+            candidates = merge_resolutions(candidates, [])
+
+        # Keep the candidates that downscale the image, from the smallest,
+        # within the byte budget
+        chosen = []
+        totalBytes = 0
+        reason = ""
+        candidates.reverse()
+        for resolution in candidates:
+            width, height = [int(s) for s in resolution.lower().split("x")]
+            scale = min(float(width) / sizeX, float(height) / sizeY)
+            if scale >= 1.0:
+                continue
+            numBytes = int(sizeX * scale) * int(sizeY * scale) * \
+                numPlanes * bytesPerPixel
+            if totalBytes + numBytes > self._maxBytesPerDataset:
+                reason = "over the byte budget"
+                break
+            chosen.insert(0, resolution)
+            totalBytes += numBytes
+
+        self._log(sizeX, sizeY, numPlanes, chosen, totalBytes, reason)
+        return chosen
+
+    def _getNumPlanes(self, metadata):
+        """Return the number of planes of a series."""
+
+        numPlanes = 1
+        for key in ["sizeZ", "sizeC", "sizeT"]:
+            numPlanes *= max(1, int(metadata.get(key, "1")))
+        return numPlanes
+
+    def _log(self, sizeX, sizeY, numPlanes, resolutions, totalBytes, reason):
+        """Log the choice."""
+
+        msg = "IMAGEREPRESENTATIONPOLICY::chooseResolutions(): " + \
+              str(sizeX) + "x" + str(sizeY) + " pixels, " + \
+              str(numPlanes) + " planes: "
+        if len(resolutions) == 0:
+            msg += "no representations"
+            if reason != "":
+                msg += " (" + reason + ")"
+        else:
+            msg += str(resolutions) + " (estimated " + \
+                   str(totalBytes / (1024 * 1024)) + " MiB)"
+        self._logger.info(msg + ".")
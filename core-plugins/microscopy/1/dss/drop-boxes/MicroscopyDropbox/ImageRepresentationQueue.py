@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import shutil
+import threading
+import time
+import xml.etree.ElementTree as ET
+from SeriesMetadataTable import SeriesMetadataTable
+
+
+class ImageRepresentationQueue:
+    """Persistent queue of the MICROSCOPY_IMG data sets whose image
+    representations (thumbnails at GlobalSettings.ImageResolutions and
+    representative MIP) are generated after the registration, instead of
+    inside the registration transaction.
+
+    The queue is a folder with one XML file per job (data set code, kind of
+    data set, series number and the metadata of the series of the data set
+    needed to rebuild the image configuration):
+
+        staged/<name>/  jobs of a registration that is not committed yet
+        pending/        jobs waiting for a worker
+        processing/     jobs claimed by a worker, whose representations are
+                        not stored yet
+        failed/         jobs that failed maxAttempts times
+
+    The dropbox stages the jobs of a transaction and commits them (moves
+    them to pending/) once openBIS has committed the registration, so that
+    workers never see data sets that do not exist. Jobs are claimed by
+    renaming them to processing/, which is atomic, so that several workers
+    (threads or processes) can share the queue. A claimed job stays in
+    processing/ until the worker finds the representations stored and
+    completes it; a claim older than the stale timeout (e.g. the rendering
+    was interrupted by a restart of the DSS) is returned to pending/ by
+    requeueStale().
+
+    The queue depth and processing rate are written by writeStatistics() to
+    statistics.txt (key=value lines), and the completed jobs are appended
+    to completed.txt (completion time, data set code, seconds from the claim
+    until the representations were found stored). Jobs that
+    have been pending or staged for longer than ORPHAN_AGE seconds (e.g.
+    because the maintenance task never asked for their data set, or the
+    registration was rolled back and not retried) are reported there as
+    orphaned."""
+
+    # Job kinds
+    SINGLE = "single"
+    LEICA_TIFF_SERIES = "Leica TIFF Series"
+
+    # Period in seconds over which the processing rate is computed
+    RATE_PERIOD = 3600
+
+    # Age in seconds after which a pending or staged job is orphaned
+    ORPHAN_AGE = 24 * 3600
+
+    # Folder containing the queue
+    _queueFolder = ""
+
+    # Logger
+    _logger = None
+
+    def __init__(self, queueFolder, logger, maxAttempts=3):
+        """Constructor.
+
+        @param queueFolder Folder containing the queue (created if it does
+                           not exist)
+        @param logger logger object
+        @param maxAttempts Number of attempts after which a job is moved to
+                           the failed jobs
+        """
+
+        self._queueFolder = queueFolder
+        self._logger = logger
+        self._maxAttempts = maxAttempts
+        self._lock = threading.Lock()
+
+        for subFolder in ["staged", "pending", "processing", "failed"]:
+            folder = os.path.join(self._queueFolder, subFolder)
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+
+    def stage(self, stagingName, dataSetCode, kind, relativePath, seriesNum,
+              allSeriesMetadata, seriesIndices=None):
+        """Stage a job until the registration is committed.
+
+        @param stagingName Name of the registration (e.g. the name of the
+                           incoming folder)
+        @param dataSetCode Code of the MICROSCOPY_IMG data set
+        @param kind ImageRepresentationQueue.SINGLE or LEICA_TIFF_SERIES
+        @param relativePath Path of the file or folder in the data set
+        @param seriesNum Number of the series of the data set (-1 if all
+                         series of the file are registered in the data set)
+        @param allSeriesMetadata Metadata of all series in the file (only
+                                 the series of the data set is stored)
+        @param seriesIndices Indices of all series (for Leica TIFF Series)
+        """
+
+        root = ET.Element("ImageRepresentationJob")
+        root.set("dataSetCode", dataSetCode)
+        root.set("kind", kind)
+        root.set("relativePath", relativePath)
+        root.set("seriesNum", str(seriesNum))
+        if seriesIndices is not None:
+            root.set("seriesIndices", ",".join([str(s) for s in seriesIndices]))
+        root.set("queuedAt", str(time.time()))
+        root.set("attempts", "0")
+
+        # Position of the series of the data set in allSeriesMetadata: only
+        # that series is stored (and converted, if the metadata is lazy)
+        if seriesNum == -1:
+            storedSeriesMetadata = allSeriesMetadata
+        else:
+            if seriesIndices is not None:
+                position = list(seriesIndices).index(seriesNum)
+            else:
+                position = seriesNum
+            root.set("seriesPosition", str(position))
+            storedSeriesMetadata = [allSeriesMetadata[position]]
+
+        for seriesMetadata in storedSeriesMetadata:
+            node = ET.SubElement(root, "MicroscopyFileSeries")
+            for key, value in seriesMetadata.iteritems():
+                node.set(key, value)
+
+        stagingFolder = os.path.join(self._queueFolder, "staged", stagingName)
+        if not os.path.exists(stagingFolder):
+            os.makedirs(stagingFolder)
+        self._write(root, os.path.join(stagingFolder, dataSetCode + ".xml"))
+
+    def discardStaged(self, stagingName):
+        """Discard the jobs staged by a registration (e.g. by a previous
+        attempt that was rolled back)."""
+
+        stagingFolder = os.path.join(self._queueFolder, "staged", stagingName)
+        if os.path.exists(stagingFolder):
+            shutil.rmtree(stagingFolder, True)
+
+    def commitStaged(self, stagingName):
+        """Make the jobs staged by a committed registration available to the
+        workers.
+
+        @return number of committed jobs
+        """
+
+        stagingFolder = os.path.join(self._queueFolder, "staged", stagingName)
+        if not os.path.exists(stagingFolder):
+            return 0
+
+        numJobs = 0
+        for name in self._listJobs(stagingFolder):
+            pendingFile = os.path.join(self._queueFolder, "pending", name)
+            os.rename(os.path.join(stagingFolder, name), pendingFile)
+            os.utime(pendingFile, None)
+            numJobs += 1
+        shutil.rmtree(stagingFolder, True)
+
+        self._logger.info("IMAGEREPRESENTATIONQUEUE::commitStaged(): " +
+                          "Queued " + str(numJobs) + " data sets from " +
+                          stagingName + " (queue depth: " +
+                          str(self.getDepth()) + ").")
+        return numJobs
+
+    def isStaged(self, dataSetCode):
+        """Return True if the job of a data set is staged by a registration
+        that is not committed yet."""
+
+        stagedFolder = os.path.join(self._queueFolder, "staged")
+        for stagingName in os.listdir(stagedFolder):
+            if os.path.exists(os.path.join(stagedFolder, stagingName,
+                                           dataSetCode + ".xml")):
+                return True
+        return False
+
+    def claim(self, dataSetCode):
+        """Claim the pending job of a data set.
+
+        @param dataSetCode Code of the MICROSCOPY_IMG data set
+        @return job as a dictionary (see _read()), or None if the data set
+                has no pending job (or it was claimed by another worker)
+        """
+
+        name = dataSetCode + ".xml"
+        claimedFile = os.path.join(self._queueFolder, "processing", name)
+        try:
+            os.rename(os.path.join(self._queueFolder, "pending", name),
+                      claimedFile)
+        except OSError:
+            return None
+        os.utime(claimedFile, None)
+        job = self._read(claimedFile)
+        job["claimedAt"] = time.time()
+        return job
+
+    def getClaimed(self):
+        """Return the claimed jobs as dictionaries with keys dataSetCode and
+        claimedAt."""
+
+        processingFolder = os.path.join(self._queueFolder, "processing")
+        jobs = []
+        for name in self._listJobs(processingFolder):
+            claimedAt = self._getModificationTime(os.path.join(
+                processingFolder, name))
+            if claimedAt > 0:
+                jobs.append({"dataSetCode": name[:-len(".xml")],
+                             "claimedAt": claimedAt})
+        return jobs
+
+    def complete(self, job):
+        """Remove a job whose representations are stored from the queue.
+
+        @return False if the job was already completed (e.g. by another
+                worker)
+        """
+
+        try:
+            os.remove(os.path.join(self._queueFolder, "processing",
+                                   job["dataSetCode"] + ".xml"))
+        except OSError:
+            return False
+
+        self._lock.acquire()
+        try:
+            f = open(os.path.join(self._queueFolder, "completed.txt"), "a")
+            try:
+                f.write("%.3f\t%s\t%.3f\n" % (time.time(), job["dataSetCode"],
+                                              time.time() - job["claimedAt"]))
+            finally:
+                f.close()
+        finally:
+            self._lock.release()
+        return True
+
+    def fail(self, job, message):
+        """Return a job that could not be processed to the pending jobs, or
+        move it to the failed jobs after maxAttempts attempts.
+
+        @return True if the job was returned to the pending jobs
+        """
+
+        name = job["dataSetCode"] + ".xml"
+        claimedFile = os.path.join(self._queueFolder, "processing", name)
+        root = ET.parse(claimedFile).getroot()
+        attempts = int(root.get("attempts", "0")) + 1
+        root.set("attempts", str(attempts))
+        root.set("lastError", message)
+        self._write(root, claimedFile)
+
+        if attempts >= self._maxAttempts:
+            target = "failed"
+        else:
+            target = "pending"
+        os.rename(claimedFile, os.path.join(self._queueFolder, target, name))
+
+        self._logger.error("IMAGEREPRESENTATIONQUEUE::fail(): " +
+                           "Data set " + job["dataSetCode"] + " failed (" +
+                           "attempt " + str(attempts) + " of " +
+                           str(self._maxAttempts) + "): " + message)
+        return target == "pending"
+
+    def requeueStale(self, timeoutInSeconds):
+        """Return jobs that have been processing for longer than
+        timeoutInSeconds (e.g. because the DSS was restarted) to the
+        pending jobs.
+
+        @return number of requeued jobs
+        """
+
+        processingFolder = os.path.join(self._queueFolder, "processing")
+        numJobs = 0
+        for name in self._listJobs(processingFolder):
+            claimedFile = os.path.join(processingFolder, name)
+            if time.time() - self._getModificationTime(claimedFile) > \
+                    timeoutInSeconds:
+                try:
+                    os.rename(claimedFile, os.path.join(self._queueFolder,
+                                                        "pending", name))
+                    numJobs += 1
+                except OSError:
+                    pass
+        return numJobs
+
+    def getDepth(self):
+        """Return the number of pending jobs."""
+
+        return len(self._listJobs(os.path.join(self._queueFolder, "pending")))
+
+    def getOrphaned(self):
+        """Return the data set codes of the jobs that have been pending or
+        staged for longer than ORPHAN_AGE seconds."""
+
+        since = time.time() - self.ORPHAN_AGE
+        folders = [os.path.join(self._queueFolder, "pending")]
+        stagedFolder = os.path.join(self._queueFolder, "staged")
+        for stagingName in os.listdir(stagedFolder):
+            folders.append(os.path.join(stagedFolder, stagingName))
+
+        dataSetCodes = []
+        for folder in folders:
+            for name in self._listJobs(folder):
+                modificationTime = self._getModificationTime(
+                    os.path.join(folder, name))
+                if 0 < modificationTime < since:
+                    dataSetCodes.append(name[:-len(".xml")])
+        dataSetCodes.sort()
+        return dataSetCodes
+
+    def getStatistics(self):
+        """Return the queue statistics as a dictionary: staged, pending,
+        processing, failed and orphaned jobs (with the comma-separated codes
+        of the orphaned data sets), jobs completed in the last RATE_PERIOD
+        seconds, processing rate (jobs per hour) and mean processing
+        time."""
+
+        since = time.time() - self.RATE_PERIOD
+        numCompleted = 0
+        totalSeconds = 0.0
+        completedFile = os.path.join(self._queueFolder, "completed.txt")
+        if os.path.exists(completedFile):
+            f = open(completedFile, "r")
+            try:
+                for line in f:
+                    parts = line.rstrip("\r\n").split("\t")
+                    if len(parts) == 3 and float(parts[0]) >= since:
+                        numCompleted += 1
+                        totalSeconds += float(parts[2])
+            finally:
+                f.close()
+
+        meanSeconds = 0.0
+        if numCompleted > 0:
+            meanSeconds = totalSeconds / numCompleted
+
+        numStaged = 0
+        stagedFolder = os.path.join(self._queueFolder, "staged")
+        for stagingName in os.listdir(stagedFolder):
+            numStaged += len(self._listJobs(os.path.join(stagedFolder,
+                                                         stagingName)))
+        orphaned = self.getOrphaned()
+
+        return {"staged": numStaged,
+                "pending": self.getDepth(),
+                "processing": len(self._listJobs(
+                    os.path.join(self._queueFolder, "processing"))),
+                "failed": len(self._listJobs(
+                    os.path.join(self._queueFolder, "failed"))),
+                "orphaned": len(orphaned),
+                "orphanedDataSets": ",".join(orphaned),
+                "completedLastPeriod": numCompleted,
+                "ratePerHour": numCompleted * 3600.0 / self.RATE_PERIOD,
+                "meanSecondsPerJob": meanSeconds}
+
+    def writeStatistics(self):
+        """Write the queue statistics to statistics.txt and return them."""
+
+        statistics = self.getStatistics()
+        keys = statistics.keys()
+        keys.sort()
+
+        self._lock.acquire()
+        try:
+            self._pruneCompleted()
+
+            statisticsFile = os.path.join(self._queueFolder, "statistics.txt")
+            f = open(statisticsFile + ".tmp", "w")
+            try:
+                f.write("timestamp=%.3f\n" % time.time())
+                for key in keys:
+                    f.write(key + "=" + str(statistics[key]) + "\n")
+            finally:
+                f.close()
+            if os.path.exists(statisticsFile):
+                os.remove(statisticsFile)
+            os.rename(statisticsFile + ".tmp", statisticsFile)
+        finally:
+            self._lock.release()
+
+        return statistics
+
+    def _pruneCompleted(self):
+        """Remove the completed jobs older than RATE_PERIOD from
+        completed.txt (the caller holds the lock)."""
+
+        completedFile = os.path.join(self._queueFolder, "completed.txt")
+        if not os.path.exists(completedFile):
+            return
+
+        since = time.time() - self.RATE_PERIOD
+        f = open(completedFile, "r")
+        try:
+            lines = [line for line in f
+                     if float(line.split("\t", 1)[0]) >= since]
+        finally:
+            f.close()
+
+        f = open(completedFile + ".tmp", "w")
+        try:
+            f.writelines(lines)
+        finally:
+            f.close()
+        os.remove(completedFile)
+        os.rename(completedFile + ".tmp", completedFile)
+
+    def _read(self, jobFile):
+        """Read a job file into a dictionary with keys dataSetCode, kind,
+        relativePath, seriesNum, seriesIndices (list or None), queuedAt
+        and allSeriesMetadata (SeriesMetadataTable). If only the series of
+        the data set was stored, it is at the same position in
+        allSeriesMetadata as in the file, after empty series."""
+
+        root = ET.parse(jobFile).getroot()
+        seriesIndices = root.get("seriesIndices")
+        if seriesIndices is not None:
+            seriesIndices = [int(s) for s in seriesIndices.split(",")]
+
+        allSeriesMetadata = SeriesMetadataTable()
+        for i in range(int(root.get("seriesPosition", "0"))):
+            allSeriesMetadata.append({})
+        for series in root:
+            allSeriesMetadata.append(series.attrib)
+
+        return {"dataSetCode": root.get("dataSetCode"),
+                "kind": root.get("kind"),
+                "relativePath": root.get("relativePath"),
+                "seriesNum": int(root.get("seriesNum")),
+                "seriesIndices": seriesIndices,
+                "queuedAt": float(root.get("queuedAt")),
+                "allSeriesMetadata": allSeriesMetadata}
+
+    def _write(self, root, jobFile):
+        """Write a job file (through a temporary file)."""
+
+        f = open(jobFile + ".tmp", "w")
+        try:
+            f.write(ET.tostring(root, encoding="UTF-8"))
+        finally:
+            f.close()
+        if os.path.exists(jobFile):
+            os.remove(jobFile)
+        os.rename(jobFile + ".tmp", jobFile)
+
+    def _listJobs(self, folder):
+        """Return the names of the job files in a folder (none if the folder
+        is gone, e.g. a staging folder that was just committed)."""
+
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return []
+        return [name for name in names if name.endswith(".xml")]
+
+    def _getModificationTime(self, fileName):
+        """Return the modification time of a file, or 0 if it is gone."""
+
+        try:
+            return os.path.getmtime(fileName)
+        except OSError:
+            return 0
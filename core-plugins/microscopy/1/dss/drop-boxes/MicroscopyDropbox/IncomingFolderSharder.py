@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+
+class _Shard:
+    """A shard under construction: one Experiment of one properties file
+    with (a subset of) its MicroscopyFile and MicroscopyCompositeFile nodes."""
+
+    def __init__(self, name, propertiesRelPath, rootNode, experimentAttrib):
+
+        self.name = name
+        self.propertiesRelPath = propertiesRelPath
+        self.root = ET.Element(rootNode.tag, dict(rootNode.attrib))
+        self.experiment = ET.SubElement(self.root, "Experiment", experimentAttrib)
+        self.relPaths = []
+        self.numFiles = 0
+        self.sizeInBytes = 0
+
+
+class IncomingFolderSharder:
+    """Splits an incoming folder into several smaller incoming folders
+    (shards) that openBIS registers in separate, short transactions.
+
+    Each Experiment of each properties file starts a new shard, and a new
+    shard is also started as soon as adding a file would exceed the maximum
+    number of files or bytes per shard. Every shard gets its own properties
+    file (with the root and Experiment attributes and its subset of file
+    nodes) and data_structure.ois, and the data files are moved (renamed)
+    into it. The experiment attachments go to the first shard of their
+    experiment. Experiments are created with getOrCreateExperiment(), so
+    all shards of an experiment register to the same experiment."""
+
+    # Logger
+    _logger = None
+
+    def __init__(self, incomingFolder, userFolderName, propertiesFileList,
+                 targetFolder, maxFiles, maxSizeInBytes, logger):
+        """Constructor.
+
+        @param incomingFolder Full path to the incoming folder to split
+        @param userFolderName Name of the user subfolder of the incoming folder
+        @param propertiesFileList List of full paths to the properties files
+        @param targetFolder Dropbox incoming folder where the shards are created
+        @param maxFiles Maximum number of files per shard
+        @param maxSizeInBytes Maximum number of bytes per shard
+        @param logger logger object
+        """
+
+        self._incomingFolder = incomingFolder
+        self._userFolderName = userFolderName
+        self._propertiesFileList = propertiesFileList
+        self._targetFolder = targetFolder
+        self._maxFiles = maxFiles
+        self._maxSizeInBytes = maxSizeInBytes
+        self._logger = logger
+
+    def countShards(self):
+        """Return the number of shards the incoming folder would be split into."""
+
+        numShards = 0
+        for propertiesFile in self._propertiesFileList:
+            numFiles = 0
+            sizeInBytes = 0
+            for kind, node in self._iterateNodes(propertiesFile):
+                if kind == "experiment":
+                    numShards += 1
+                    numFiles = 0
+                    sizeInBytes = 0
+                elif kind == "file":
+                    fileSize = self._getSize(node)
+                    if self._isFull(numFiles, sizeInBytes, fileSize):
+                        numShards += 1
+                        numFiles = 0
+                        sizeInBytes = 0
+                    numFiles += 1
+                    sizeInBytes += fileSize
+
+        return numShards
+
+    def shard(self):
+        """Split the incoming folder into shards.
+
+        @return list of the names of the created shards
+        """
+
+        shardNames = []
+        incomingName = os.path.basename(self._incomingFolder)
+
+        for propertiesFile in self._propertiesFileList:
+
+            propertiesRelPath = self._getRelativePath(propertiesFile)
+            rootNode = None
+            shard = None
+
+            for kind, node in self._iterateNodes(propertiesFile):
+
+                if kind == "root":
+
+                    rootNode = node
+
+                elif kind == "experiment":
+
+                    if shard is not None:
+                        self._flush(shard)
+
+                    shard = self._newShard(incomingName, len(shardNames),
+                                           propertiesRelPath, rootNode,
+                                           dict(node.attrib))
+                    shardNames.append(shard.name)
+
+                    # The attachments go with the first shard of the experiment
+                    attachments = node.attrib.get("attachments")
+                    if attachments is not None:
+                        for f in attachments.split(";"):
+                            if f != "":
+                                shard.relPaths.append(f)
+
+                else:
+
+                    fileSize = self._getSize(node)
+                    if self._isFull(shard.numFiles, shard.sizeInBytes, fileSize):
+
+                        self._flush(shard)
+
+                        # Continue the same experiment without its attachments
+                        experimentAttrib = dict(shard.experiment.attrib)
+                        if "attachments" in experimentAttrib:
+                            del experimentAttrib["attachments"]
+                        shard = self._newShard(incomingName, len(shardNames),
+                                               propertiesRelPath, rootNode,
+                                               experimentAttrib)
+                        shardNames.append(shard.name)
+
+                    if node.tag == "MicroscopyFile":
+                        shard.relPaths.append(node.attrib.get("relativeFileName"))
+                    else:
+                        shard.relPaths.append(node.attrib.get("relativeFolder"))
+
+                    # Copy the node (with its series) to the shard
+                    fileNode = ET.SubElement(shard.experiment, node.tag, node.attrib)
+                    for series in node:
+                        ET.SubElement(fileNode, series.tag, series.attrib)
+
+                    shard.numFiles += 1
+                    shard.sizeInBytes += fileSize
+
+            if shard is not None:
+                self._flush(shard)
+
+        return shardNames
+
+    def _newShard(self, incomingName, index, propertiesRelPath, rootNode,
+                  experimentAttrib):
+        """Start a new shard."""
+
+        name = incomingName + "_part" + ("%03d" % (index + 1))
+        return _Shard(name, propertiesRelPath, rootNode, experimentAttrib)
+
+    def _flush(self, shard):
+        """Write the shard to the target folder and move its files into it.
+        The marker file is created last, so that openBIS only picks up the
+        shard once it is complete."""
+
+        shardFolder = os.path.join(self._targetFolder, shard.name)
+        userFolder = os.path.join(shardFolder, self._userFolderName)
+        if not os.path.exists(userFolder):
+            os.makedirs(userFolder)
+
+        # Move the data files and folders
+        for relPath in shard.relPaths:
+            src = os.path.join(self._incomingFolder, relPath)
+            dst = os.path.join(shardFolder, relPath)
+            dstFolder = os.path.dirname(dst)
+            if not os.path.exists(dstFolder):
+                os.makedirs(dstFolder)
+            os.rename(src, dst)
+
+        # Write the properties file
+        propertiesFile = os.path.join(shardFolder, shard.propertiesRelPath)
+        propertiesFolder = os.path.dirname(propertiesFile)
+        if not os.path.exists(propertiesFolder):
+            os.makedirs(propertiesFolder)
+        ET.ElementTree(shard.root).write(propertiesFile, encoding="UTF-8")
+
+        # Write the data structure file
+        f = open(os.path.join(userFolder, "data_structure.ois"), "w")
+        try:
+            f.write(shard.propertiesRelPath + "\n")
+        finally:
+            f.close()
+
+        # Create the marker file
+        marker = os.path.join(self._targetFolder,
+                              ".MARKER_is_finished_" + shard.name)
+        open(marker, "w").close()
+
+        self._logger.info("INCOMINGFOLDERSHARDER::_flush(): " +
+                          "Created shard " + shard.name + " with " +
+                          str(shard.numFiles) + " files (" +
+                          str(shard.sizeInBytes) + " bytes).")
+
+    def _isFull(self, numFiles, sizeInBytes, fileSize):
+        """Check whether a file does not fit any more in a non-empty shard."""
+
+        if numFiles == 0:
+            return False
+        return numFiles + 1 > self._maxFiles or \
+            sizeInBytes + fileSize > self._maxSizeInBytes
+
+    def _getSize(self, fileNode):
+        """Return the size in bytes of the file or folder of a node."""
+
+        datasetSize = fileNode.attrib.get("datasetSize")
+        if datasetSize is not None and datasetSize != "":
+            return long(datasetSize)
+
+        if fileNode.tag == "MicroscopyFile":
+            path = os.path.join(self._incomingFolder,
+                                fileNode.attrib.get("relativeFileName"))
+            return os.path.getsize(path)
+
+        sizeInBytes = 0
+        path = os.path.join(self._incomingFolder,
+                            fileNode.attrib.get("relativeFolder"))
+        for root, folders, files in os.walk(path):
+            for name in files:
+                sizeInBytes += os.path.getsize(os.path.join(root, name))
+        return sizeInBytes
+
+    def _getRelativePath(self, fullPath):
+        """Return the path of a file relative to the incoming folder."""
+
+        return fullPath[len(self._incomingFolder) + 1:]
+
+    def _iterateNodes(self, propertiesFile):
+        """Stream through a properties file and yield ("root", node) and
+        ("experiment", node) at the start of the root and Experiment nodes,
+        and ("file", node) at the end of each MicroscopyFile and
+        MicroscopyCompositeFile node. Nodes are discarded once yielded."""
+
+        depth = 0
+        root = None
+        experimentNode = None
+        for event, node in ET.iterparse(propertiesFile, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = node
+                    yield "root", node
+                elif depth == 2:
+                    experimentNode = node
+                    yield "experiment", node
+                continue
+            if depth == 3:
+                yield "file", node
+                experimentNode.remove(node)
+            elif depth == 2:
+                root.remove(node)
+            depth -= 1
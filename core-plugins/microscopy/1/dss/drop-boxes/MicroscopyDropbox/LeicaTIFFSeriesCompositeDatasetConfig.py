@@ -6,9 +6,15 @@ Created on Feb 20, 2014
 @author: Aaron Ponti
 """
 
+import os
 import re
 from MicroscopyCompositeDatasetConfig import MicroscopyCompositeDatasetConfig
+from LeicaTIFFSeriesFileIndex import LeicaTIFFSeriesFileIndex
 from LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm import LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm
+from MaximumIntensityProjector import FilePlaneSource
+from MIPPlaneSampler import MIPPlaneSampler
+from StreamingMaximumIntensityProjectionGenerationAlgorithm import StreamingMaximumIntensityProjectionGenerationAlgorithm
+from ImageRepresentationPolicy import ImageRepresentationPolicy
 from ch.systemsx.cisd.openbis.dss.etl.dto.api import ChannelColor
 from ch.systemsx.cisd.openbis.dss.etl.dto.api import ImageIdentifier
 from ch.systemsx.cisd.openbis.dss.etl.dto.api import ImageMetadata
@@ -49,15 +55,15 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
     # Maintain a metadata array
     _metadata = []
 
-    # Regular expression pattern
-    _pattern = re.compile("^(.*?)" + \
-                          "((_Series|_s)(\d.*?))?" + \
-                          "(_t(\d.*?))?" + \
-                          "_z(\d.*?)" + \
-                          "_ch(\d.*?)" + \
-                          "\.tif{1,2}$", re.IGNORECASE)
+    # Index of the file names in the folder (possibly shared by the
+    # configurations of all series)
+    _fileIndex = None
 
-    def __init__(self, allSeriesMetadata, seriesIndices, logger, seriesNum=0):
+    # Algorithm of the representative image (MIP), or None
+    _mipAlgorithm = None
+
+    def __init__(self, allSeriesMetadata, seriesIndices, logger, seriesNum=0,
+                 fileIndex=None, generateRepresentations=True):
         """Constructor.
 
         @param allSeriesMetadata: list of metadata attributes generated either
@@ -72,11 +78,24 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
                                   other series in the file will be ignored.
                                   seriesNum MUST BE CONTAINED in seriesIndices.
         @param logger:            logger object
+        @param fileIndex:         LeicaTIFFSeriesFileIndex of the folder, to
+                                  be shared by the configurations of all
+                                  series; if None, a new (private) index is
+                                  created and filled lazily.
+        @param generateRepresentations: set to False to register the series
+                                  without image representations (thumbnails
+                                  and MIP), which are then generated later
+                                  from the ImageRepresentationQueue.
         """
 
         # Store the logger
         self._logger = logger
 
+        # Store the file index
+        if fileIndex is None:
+            fileIndex = LeicaTIFFSeriesFileIndex()
+        self._fileIndex = fileIndex
+
         # Store the series metadata
         self._allSeriesMetadata = allSeriesMetadata
 
@@ -106,14 +125,20 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
         self.setUseImageMagicToGenerateThumbnails(False)
 
         # Specify resolution of image representations explicitly
-        resolutions = GlobalSettings.ImageResolutions
+        resolutions = self._getImageResolutions()
         if not resolutions:
             self._logger.info("Skipping thumbnails generation.")
             self.setGenerateThumbnails(False)
+        elif not generateRepresentations:
+            self._logger.info("Deferring thumbnails generation.")
+            self.setGenerateThumbnails(False)
         else:
             self._logger.info("Creating thumbnails at resolutions: " + str(resolutions))
             self.setGenerateImageRepresentationsUsingImageResolutions(resolutions)
             self.setGenerateThumbnails(True)
+            if GlobalSettings.ThumbnailGenerationMachineLoad is not None:
+                self.setAllowedMachineLoadDuringThumbnailsGeneration(
+                    GlobalSettings.ThumbnailGenerationMachineLoad)
 
         # Set the recognized extensions -- currently just tif(f)
         self.setRecognizedImageExtensions(["tif", "tiff"])
@@ -121,11 +146,103 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
         # Set the dataset type
         self.setDataSetType("MICROSCOPY_IMG")
 
-        # Create representative image (MIP) for the first series only
-        if self._seriesIndices.index(self._seriesNum) == 0:
-            self.setImageGenerationAlgorithm(
-                LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(
-                    "MICROSCOPY_IMG_THUMBNAIL", 256, 256, "thumbnail.png"))
+        # Create representative image (MIP) for the first series only (or
+        # for all series if GenerateMIPForAllSeries is set)
+        self._mipAlgorithm = None
+        if generateRepresentations and \
+                (self._seriesIndices.index(self._seriesNum) == 0 or \
+                 GlobalSettings.GenerateMIPForAllSeries):
+            self._mipAlgorithm = self._createImageGenerationAlgorithm()
+            self.setImageGenerationAlgorithm(self._mipAlgorithm)
+
+    def getStreamingMIPAlgorithm(self):
+        """Return the image generation algorithm of the representative image
+        if it can be prerendered (see ThumbnailRenderPool), or None."""
+
+        if self._mipAlgorithm is not None and \
+                isinstance(self._mipAlgorithm,
+                           StreamingMaximumIntensityProjectionGenerationAlgorithm) and \
+                self._mipAlgorithm.canPrerender():
+            return self._mipAlgorithm
+        return None
+
+    def _getImageResolutions(self):
+        """Return the resolutions of the image representations: either
+        chosen by the ImageRepresentationPolicy or the configured
+        GlobalSettings.ImageResolutions."""
+
+        if not GlobalSettings.UseImageRepresentationPolicy:
+            return GlobalSettings.ImageResolutions
+
+        indx = self._seriesIndices.index(self._seriesNum)
+        policy = ImageRepresentationPolicy.fromGlobalSettings(self._logger)
+        return policy.chooseResolutions([self._allSeriesMetadata[indx]])
+
+    def _createImageGenerationAlgorithm(self):
+        """Create the algorithm for the representative image (MIP): if
+        streaming is enabled and the folder was scanned, the planes are
+        streamed from the files listed in the file index. In both cases,
+        only the planes selected by _selectMIPFiles() are projected."""
+
+        selectedFiles = self._selectMIPFiles()
+
+        if not GlobalSettings.UseStreamingMIP or \
+                self._fileIndex.getFolder() is None:
+            return LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(
+                "MICROSCOPY_IMG_THUMBNAIL", 256, 256, "thumbnail.png",
+                selectedFiles=selectedFiles)
+
+        # Channel colors of the series
+        seriesNum = self._seriesNum
+        indx = self._seriesIndices.index(seriesNum)
+        colors = {}
+        sizeC = int(self._allSeriesMetadata[indx].get("sizeC", "0"))
+        for c in range(sizeC):
+            colors[c] = self._getChannelColorComponents(seriesNum, c)
+
+        fileIndex = self._fileIndex
+
+        def planeSourceFactory(information, resolvePath):
+            folder = resolvePath(fileIndex.getFolder(), information)
+            planeFilesByChannel = {}
+            for relativePath, size, timepoint, plane, ch in \
+                    fileIndex.getSeriesPlanes(seriesNum):
+                planeFilesByChannel.setdefault(ch, []).append(
+                    os.path.join(folder, relativePath))
+            return FilePlaneSource(planeFilesByChannel)
+
+        return LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(
+            "MICROSCOPY_IMG_THUMBNAIL", 256, 256, "thumbnail.png",
+            planeSourceFactory, colors, self._logger,
+            GlobalSettings.NumMIPThreads, selectedFiles)
+
+    def _selectMIPFiles(self):
+        """Select the files of the series that are projected into the
+        representative image, according to GlobalSettings.MIPSampling.
+
+        @return set of file names (without path), or None to project all
+        """
+
+        if GlobalSettings.MIPSampling == MIPPlaneSampler.ALL or \
+                self._fileIndex.getFolder() is None:
+            return None
+
+        sampler = MIPPlaneSampler(GlobalSettings.MIPSampling,
+                                  GlobalSettings.MIPSamplingStep,
+                                  GlobalSettings.MIPSamplingByteBudget)
+        planes = self._fileIndex.getSeriesPlanes(self._seriesNum)
+        selected = sampler.select(planes)
+
+        self._logger.info("LEICATIFFSERIESCOMPOSITEDATASETCONFIG::" +
+                          "_selectMIPFiles(): " + sampler.getStrategy() +
+                          " selected " + str(len(selected)) + " of " +
+                          str(len(planes)) + " planes (" +
+                          str(sum([entry[1] for entry in selected]) /
+                              (1024 * 1024)) + " of " +
+                          str(sum([entry[1] for entry in planes]) /
+                              (1024 * 1024)) + " MiB).")
+
+        return set([os.path.basename(entry[0]) for entry in selected])
 
 
     def createChannel(self, channelCode):
@@ -170,46 +287,27 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
         @see constructor.
         """
 
-        # Extract the relevant information from the file name - the image
-        # identifiers in this case do not carry any useful information.
-        m = self._pattern.match(imagePath)
+        # Get the relevant information from the (shared) index of the file
+        # names - the image identifiers in this case do not carry any useful
+        # information.
+        entry = self._fileIndex.lookup(imagePath)
 
-        if m is None:
+        if entry is None:
             err = "MICROSCOPYCOMPOSITEDATASETCONFIG::extractImageMetadata(): " + \
             "unexpected file name " + str(imagePath)
             self._logger.error(err)
             raise Exception(err)
 
-        # Get and store the base name
-        basename = m.group(1)
+        basename, series, timepoint, plane, ch = entry
+
+        # Store the base name
         if self._basename == "" or self._basename != basename:
             self._basename = basename
 
-        # The series number is not always defined in the file name.
-        # In the regex, the group(2) optionally matches _s{digits};
-        # in case group(2) is not None, the actual series number is
-        # stored in group(4). 
-        if m.group(2) is None:
-            series = 0
-        else:
-            series = int(m.group(4))
-
         # Make sure to process only the relevant series
         if series != self._seriesNum:
             return []
 
-        # The time index is also not always specified.
-        if m.group(5) is None:
-            timepoint = 0
-        else:
-            timepoint = int(m.group(6))
-
-        # Plane number is always specified
-        plane = int(m.group(7))
-
-        # Channel number is always specified
-        ch = int(m.group(8))
-
         # Build the channel code
         channelCode = "SERIES-" + str(series) + "_CHANNEL-" + str(ch)
 
@@ -258,6 +356,16 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
         a given channel in a given series."
         """
 
+        # Create the ChannelColorRGB object
+        R, G, B = self._getChannelColorComponents(seriesIndx, channelIndx)
+        return ChannelColorRGB(R, G, B)
+
+
+    def _getChannelColorComponents(self, seriesIndx, channelIndx):
+        """Returns the channel color (from the parsed metadata) for
+        a given channel in a given series as an (R, G, B) tuple."
+        """
+
         if self._DEBUG:
             self._logger.info("Trying to find seriesIndx = " + \
                                str(seriesIndx) + " in seriesIndices = " + \
@@ -296,11 +404,8 @@ class LeicaTIFFSeriesCompositeDatasetConfig(MicroscopyCompositeDatasetConfig):
                 G = random.random_integers(0, 255)
                 B = random.random_integers(0, 255)
 
-        # Create the ChannelColorRGB object
-        colorRGB = ChannelColorRGB(R, G, B)
-
         # Return it
-        return colorRGB
+        return R, G, B
 
 
     def _getSeriesAndChannelNumbers(self, channelCode):
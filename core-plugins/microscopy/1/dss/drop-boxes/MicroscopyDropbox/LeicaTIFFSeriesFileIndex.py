@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import re
+
+
+class LeicaTIFFSeriesFileIndex:
+    """Index of the files of a Leica TIFF Series folder, mapping each file
+    name to its (series, timepoint, plane, channel) indices.
+
+    The file names are parsed once (either when the folder is scanned or on
+    first lookup), so that all per-series LeicaTIFFSeriesCompositeDatasetConfig
+    objects of a folder can share the index instead of matching the regular
+    expression against every file again.
+
+    The index can be written to a manifest file inside the folder, which is
+    then stored with the dataset (it adds a file to the registered data; see
+    GlobalSettings.WriteLeicaTIFFSeriesManifest): re-processing the folder
+    or exporting it can read the manifest instead of scanning the folder and
+    parsing the file names again. The manifest is a UTF-8 text file with one
+    tab-separated line per file:
+
+        relative path, size in bytes, basename, series, timepoint, plane,
+        channel
+
+    (the basename is empty and the indices are -1 for files that do not
+    match the naming scheme).
+    """
+
+    # Name of the manifest file stored in the folder
+    MANIFEST_FILE_NAME = ".leica_tiff_series_manifest.txt"
+
+    # First line of the manifest file (with format version)
+    MANIFEST_HEADER = "# LeicaTIFFSeriesFileIndex 2"
+
+    # Regular expression pattern
+    PATTERN = re.compile("^(.*?)" + \
+                         "((_Series|_s)(\d.*?))?" + \
+                         "(_t(\d.*?))?" + \
+                         "_z(\d.*?)" + \
+                         "_ch(\d.*?)" + \
+                         "\.tif{1,2}$", re.IGNORECASE)
+
+    def __init__(self, folder=None):
+        """Constructor.
+
+        @param folder Optional full path to the folder to scan right away.
+        """
+
+        # Map from file name (without path) to (basename, series, timepoint,
+        # plane, channel), or to None for names that do not match
+        self._entries = {}
+
+        # Map from series to the number of planes (files) in the series
+        self._planeCounts = {}
+
+        # List of (relative path, size in bytes) of all files in the folder
+        # (only filled by scan() and readManifest())
+        self._files = []
+
+        # Full path to the scanned folder (or None)
+        self._folder = None
+
+        if folder is not None:
+            self.scan(folder)
+
+    def scan(self, folder):
+        """Index all files in a folder (and its subfolders).
+
+        @param folder Full path to the folder to scan
+        """
+
+        self._folder = folder
+        rootLen = len(os.path.abspath(folder)) + 1
+        for root, folders, files in os.walk(folder):
+            relativeRoot = os.path.abspath(root)[rootLen:]
+            for name in files:
+                if name == self.MANIFEST_FILE_NAME:
+                    continue
+                relativePath = os.path.join(relativeRoot, name)
+                relativePath = relativePath.replace(os.sep, "/")
+                size = os.path.getsize(os.path.join(root, name))
+                self._files.append((relativePath, size))
+                self.lookup(name)
+
+    def readManifest(self, folder):
+        """Fill the index from the manifest file in the folder.
+
+        @param folder Full path to the folder
+        @return True if the manifest was read, False if the folder has no
+                (valid) manifest, or a manifest in an older format.
+        """
+
+        manifestFile = os.path.join(folder, self.MANIFEST_FILE_NAME)
+        if not os.path.exists(manifestFile):
+            return False
+
+        files = []
+        entries = []
+        f = open(manifestFile, "r")
+        try:
+            if f.readline().rstrip("\r\n") != self.MANIFEST_HEADER:
+                return False
+            for line in f:
+                parts = line.decode("UTF-8").rstrip("\r\n").split("\t")
+                if len(parts) != 7:
+                    return False
+                files.append((parts[0], long(parts[1])))
+                entries.append((parts[0], parts[2], map(int, parts[3:])))
+        finally:
+            f.close()
+
+        # The parsed fields are read back as they are (no regular expression)
+        for relativePath, basename, (series, timepoint, plane, ch) in entries:
+            name = relativePath.split("/")[-1]
+            if series < 0:
+                self._entries[name] = None
+            else:
+                self._entries[name] = (basename, series, timepoint, plane, ch)
+                self._planeCounts[series] = \
+                    self._planeCounts.get(series, 0) + 1
+        self._files = files
+        self._folder = folder
+        return True
+
+    def writeManifest(self, folder):
+        """Write the index of the scanned files to the manifest file in the
+        folder.
+
+        @param folder Full path to the folder
+        """
+
+        manifestFile = os.path.join(folder, self.MANIFEST_FILE_NAME)
+        tmpFile = manifestFile + ".tmp"
+        f = open(tmpFile, "wb")
+        try:
+            f.write(self.MANIFEST_HEADER + "\n")
+            for relativePath, size in self._files:
+                entry = self.lookup(relativePath)
+                if entry is None:
+                    entry = [u"", -1, -1, -1, -1]
+                if not isinstance(relativePath, unicode):
+                    relativePath = relativePath.decode("UTF-8")
+                basename = entry[0]
+                if not isinstance(basename, unicode):
+                    basename = basename.decode("UTF-8")
+                line = u"\t".join([relativePath, unicode(size), basename] +
+                                   map(unicode, entry[1:])) + u"\n"
+                f.write(line.encode("UTF-8"))
+        finally:
+            f.close()
+        os.rename(tmpFile, manifestFile)
+
+    def lookup(self, imagePath):
+        """Return (basename, series, timepoint, plane, channel) for a file,
+        or None if the file name does not match the Leica TIFF Series naming
+        scheme.
+
+        @param imagePath File name, with or without path
+        """
+
+        name = os.path.basename(imagePath)
+        try:
+            return self._entries[name]
+        except KeyError:
+            pass
+
+        entry = self.parse(name)
+        self._entries[name] = entry
+        if entry is not None:
+            series = entry[1]
+            self._planeCounts[series] = self._planeCounts.get(series, 0) + 1
+        return entry
+
+    def parse(self, name):
+        """Parse a file name without using the index.
+
+        @param name File name (without path)
+        @return (basename, series, timepoint, plane, channel) or None
+        """
+
+        m = self.PATTERN.match(name)
+        if m is None:
+            return None
+
+        # The series number is not always defined in the file name.
+        # In the regex, the group(2) optionally matches _s{digits};
+        # in case group(2) is not None, the actual series number is
+        # stored in group(4).
+        if m.group(2) is None:
+            series = 0
+        else:
+            series = int(m.group(4))
+
+        # The time index is also not always specified.
+        if m.group(5) is None:
+            timepoint = 0
+        else:
+            timepoint = int(m.group(6))
+
+        # Plane and channel numbers are always specified
+        plane = int(m.group(7))
+        ch = int(m.group(8))
+
+        return m.group(1), series, timepoint, plane, ch
+
+    def getFiles(self):
+        """Return the list of (relative path, size in bytes) of all scanned
+        files."""
+
+        return self._files
+
+    def getFolder(self):
+        """Return the full path to the scanned folder, or None if the index
+        was only filled by lookups."""
+
+        return self._folder
+
+    def getSeriesPlanes(self, series):
+        """Return the list of (relative path, size in bytes, timepoint,
+        plane, channel) of the scanned files of a series."""
+
+        planes = []
+        for relativePath, size in self._files:
+            entry = self.lookup(relativePath)
+            if entry is not None and entry[1] == series:
+                planes.append((relativePath, size, entry[2], entry[3],
+                               entry[4]))
+        return planes
+
+    def getSizeInBytes(self):
+        """Return the total size in bytes of all scanned files."""
+
+        total = 0
+        for relativePath, size in self._files:
+            total += size
+        return total
+
+    def getSeriesIndices(self):
+        """Return the sorted list of series found in the indexed files."""
+
+        seriesIndices = self._planeCounts.keys()
+        seriesIndices.sort()
+        return seriesIndices
+
+    def getPlaneCount(self, series):
+        """Return the number of indexed files (planes) of a series."""
+
+        return self._planeCounts.get(series, 0)
@@ -6,10 +6,11 @@ Created on Apr 27, 2016
 @author: Aaron Ponti
 '''
 
-from ch.systemsx.cisd.openbis.dss.etl.dto.api.impl import MaximumIntensityProjectionGenerationAlgorithm
+import os
+from StreamingMaximumIntensityProjectionGenerationAlgorithm import StreamingMaximumIntensityProjectionGenerationAlgorithm
 
 
-class LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(MaximumIntensityProjectionGenerationAlgorithm):
+class LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(StreamingMaximumIntensityProjectionGenerationAlgorithm):
     '''
     Custom MaximumIntensityProjectionGenerationAlgorithm for Leica TIFF Series
     that makes sure that the first timepoint in a series is registered for
@@ -17,14 +18,23 @@ class LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(MaximumIntens
     '''
 
 
-    def __init__(self, datasetTypeCode, width, height, filename):
+    def __init__(self, datasetTypeCode, width, height, filename,
+                 planeSourceFactory=None, colors=None, logger=None,
+                 numThreads=1, selectedFiles=None):
         """
         Constructor
+
+        @param selectedFiles Set of the names (without path) of the files
+                             to project, or None to project all files
+        @see StreamingMaximumIntensityProjectionGenerationAlgorithm
         """
 
         # Call the parent base constructor
-        MaximumIntensityProjectionGenerationAlgorithm.__init__(self,
-            datasetTypeCode, width, height, filename)
+        StreamingMaximumIntensityProjectionGenerationAlgorithm.__init__(self,
+            datasetTypeCode, width, height, filename, planeSourceFactory,
+            colors, logger, numThreads)
+
+        self._selectedFiles = selectedFiles
 
 
     def imageToBeIgnored(self, image):
@@ -34,7 +44,31 @@ class LeicaTIFFSeriesMaximumIntensityProjectionGenerationAlgorithm(MaximumIntens
         in LeicaTIFFSeriesCompositeDatasetConfig. Here we prevent the base 
         MaximumIntensityProjectionGenerationAlgorithm.imageToBeIgnored() method
         to make a decision based on the timepoint (== 0), since we cannot know
-        which is the first time point in an exported Leica TIFF Series.
+        which is the first time point in an exported Leica TIFF Series: the
+        planes are instead selected by file name (see selectedFiles).
+        """
+
+        if self._selectedFiles is None:
+            return False
+
+        return not self._isSelected(image.getImageRelativePath())
+
+
+    def selectPlanes(self, planes):
+        """
+        Overrides the parent selectPlanes method to stream only the selected
+        files (the plane keys are file paths).
+        """
+
+        if self._selectedFiles is None:
+            return planes
+
+        return [plane for plane in planes if self._isSelected(plane)]
+
+
+    def _isSelected(self, path):
+        """
+        Return True if the file is in the set of selected files.
         """
 
-        return False
+        return os.path.basename(path.replace("\\", "/")) in self._selectedFiles
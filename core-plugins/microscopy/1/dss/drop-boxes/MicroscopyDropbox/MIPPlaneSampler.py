@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+
+class MIPPlaneSampler:
+    """Select the planes of a series that are projected into the
+    representative image (MIP), so that the cost of the thumbnail does not
+    grow with the length of the acquisition.
+
+    Strategies:
+
+        all              project all planes
+        first_timepoint  project the planes of the earliest timepoint only
+        every_nth        project every step-th plane of each channel
+        byte_budget      project evenly spaced planes of each channel, at
+                         most byteBudget bytes in total (at least one plane
+                         per channel)
+    """
+
+    ALL = "all"
+    FIRST_TIMEPOINT = "first_timepoint"
+    EVERY_NTH = "every_nth"
+    BYTE_BUDGET = "byte_budget"
+
+    STRATEGIES = [ALL, FIRST_TIMEPOINT, EVERY_NTH, BYTE_BUDGET]
+
+    def __init__(self, strategy=ALL, step=1, byteBudget=0):
+        """Constructor.
+
+        @param strategy One of MIPPlaneSampler.STRATEGIES
+        @param step Step of the every_nth strategy
+        @param byteBudget Maximum number of bytes of the byte_budget strategy
+        """
+
+        if strategy not in self.STRATEGIES:
+            raise Exception("Unknown MIP sampling strategy '" +
+                            str(strategy) + "'; expected one of " +
+                            ", ".join(self.STRATEGIES) + ".")
+
+        self._strategy = strategy
+        self._step = max(1, int(step))
+        self._byteBudget = max(0, int(byteBudget))
+
+    def getStrategy(self):
+        """Return the name of the strategy."""
+
+        return self._strategy
+
+    def select(self, planes):
+        """Select the planes to project.
+
+        @param planes List of (key, size in bytes, timepoint, plane, channel)
+        @return list with the selected entries of planes
+        """
+
+        if self._strategy == self.ALL or len(planes) == 0:
+            return planes
+
+        if self._strategy == self.FIRST_TIMEPOINT:
+            firstTimepoint = min([entry[2] for entry in planes])
+            return [entry for entry in planes if entry[2] == firstTimepoint]
+
+        # The other strategies sample each channel in (timepoint, plane) order
+        planesByChannel = {}
+        for entry in planes:
+            planesByChannel.setdefault(entry[4], []).append(entry)
+
+        selected = []
+        for channel in sorted(planesByChannel.keys()):
+            channelPlanes = planesByChannel[channel]
+            channelPlanes.sort(key=lambda entry: (entry[2], entry[3]))
+            if self._strategy == self.EVERY_NTH:
+                selected.extend(channelPlanes[::self._step])
+            else:
+                selected.extend(self._selectWithinBudget(
+                    channelPlanes, self._byteBudget / len(planesByChannel)))
+        return selected
+
+    def _selectWithinBudget(self, planes, byteBudget):
+        """Return evenly spaced planes whose (average) total size does not
+        exceed byteBudget, and at least one plane."""
+
+        numPlanes = len(planes)
+        averageSize = max(1, sum([entry[1] for entry in planes]) / numPlanes)
+        numSelected = max(1, min(numPlanes, byteBudget / averageSize))
+        return [planes[(i * numPlanes) / numSelected]
+                for i in range(numSelected)]
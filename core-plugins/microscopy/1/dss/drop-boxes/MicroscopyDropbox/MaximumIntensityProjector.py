@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import time
+from ij.io import Opener
+from ij.process import Blitter
+from ij.process import ColorProcessor
+from ij.process import LUT
+from java.awt import Color
+from java.util.concurrent import Callable
+from java.util.concurrent import ExecutionException
+from java.util.concurrent import Executors
+from loci.formats import ChannelSeparator
+from loci.plugins.util import ImageProcessorReader
+
+
+class BioFormatsPlaneSource:
+    """Plane source that reads the planes of one series of a microscopy file
+    with bio-formats. Every channel opens its own reader, so that channels
+    can be projected in parallel."""
+
+    def __init__(self, filePath, seriesNum=0):
+        """Constructor.
+
+        @param filePath Full path to the microscopy file
+        @param seriesNum Index of the series to project
+        """
+
+        self._filePath = filePath
+        self._seriesNum = int(seriesNum)
+
+        # Read the dimensions once
+        reader = self._openReader()
+        try:
+            self._sizeZ = reader.getSizeZ()
+            self._sizeC = reader.getSizeC()
+            self._sizeT = reader.getSizeT()
+        finally:
+            reader.close()
+
+    def getChannels(self):
+        """Return the list of channel indices."""
+
+        return range(self._sizeC)
+
+    def getPlanes(self, channel):
+        """Return the list of plane keys of a channel (as (z, t) tuples)."""
+
+        return [(z, t) for t in range(self._sizeT) for z in range(self._sizeZ)]
+
+    def open(self, channel):
+        """Return a function that opens the plane with a given key of the
+        channel as an ImageJ ImageProcessor, and a function that releases
+        the resources."""
+
+        reader = self._openReader()
+
+        def openPlane(key):
+            z, t = key
+            return reader.openProcessors(reader.getIndex(z, channel, t))[0]
+
+        return openPlane, reader.close
+
+    def _openReader(self):
+        """Open a bio-formats reader on the series."""
+
+        reader = ImageProcessorReader(ChannelSeparator())
+        reader.setId(self._filePath)
+        reader.setSeries(self._seriesNum)
+        return reader
+
+
+class FilePlaneSource:
+    """Plane source for series stored as one image file per plane (e.g.
+    Leica TIFF Series), opened with ImageJ."""
+
+    def __init__(self, planeFilesByChannel):
+        """Constructor.
+
+        @param planeFilesByChannel Map from channel index to the list of full
+                                   paths of the plane files of the channel
+        """
+
+        self._planeFilesByChannel = planeFilesByChannel
+
+    def getChannels(self):
+        """Return the list of channel indices."""
+
+        channels = self._planeFilesByChannel.keys()
+        channels.sort()
+        return channels
+
+    def getPlanes(self, channel):
+        """Return the list of plane keys (file paths) of a channel."""
+
+        return self._planeFilesByChannel[channel]
+
+    def open(self, channel):
+        """Return a function that opens a plane file as an ImageJ
+        ImageProcessor, and a function that releases the resources."""
+
+        opener = Opener()
+
+        def openPlane(filePath):
+            image = opener.openImage(filePath)
+            if image is None:
+                raise Exception("Could not open " + filePath)
+            return image.getProcessor()
+
+        return openPlane, lambda: None
+
+
+class _ChannelProjectionTask(Callable):
+    """Stream the planes of one channel into a running maximum."""
+
+    def __init__(self, planeSource, channel, planes):
+        self._planeSource = planeSource
+        self._channel = channel
+        self._planes = planes
+
+    def call(self):
+        openPlane, close = self._planeSource.open(self._channel)
+        try:
+            projection = None
+            numBytes = 0
+            for key in self._planes:
+                plane = openPlane(key)
+                numBytes += plane.getPixelCount() * plane.getBitDepth() / 8
+                if projection is None:
+                    projection = plane.duplicate()
+                else:
+                    projection.copyBits(plane, 0, 0, Blitter.MAX)
+            return projection, len(self._planes), numBytes
+        finally:
+            close()
+
+
+class MaximumIntensityProjector:
+    """Maximum intensity projection engine that streams the planes of each
+    channel one at a time into a running maximum buffer, so that memory use
+    is bounded by one plane (plus one projection buffer) per channel that is
+    being processed, independent of the number of planes and timepoints.
+    Channels can be projected in parallel by a pool of threads. The channel
+    projections are then colored, merged and scaled to a thumbnail."""
+
+    def __init__(self, logger, numThreads=1):
+        """Constructor.
+
+        @param logger Logger object
+        @param numThreads Number of threads used to project the channels in
+                          parallel (1 to project them serially)
+        """
+
+        self._logger = logger
+        self._numThreads = max(1, int(numThreads))
+
+        # Statistics of the last projection
+        self._numPlanes = 0
+        self._numBytes = 0
+        self._seconds = 0.0
+
+    def project(self, planeSource, planeFilter=None):
+        """Compute the maximum intensity projection of every channel.
+
+        @param planeSource Object with getChannels(), getPlanes(channel) and
+                           open(channel) (see BioFormatsPlaneSource)
+        @param planeFilter Optional function that gets the list of plane keys
+                           of a channel and returns the keys to project
+        @return map from channel index to ImageJ ImageProcessor
+        """
+
+        start = time.time()
+        tasks = []
+        for channel in planeSource.getChannels():
+            planes = planeSource.getPlanes(channel)
+            if planeFilter is not None:
+                planes = planeFilter(planes)
+            if len(planes) > 0:
+                tasks.append((channel, _ChannelProjectionTask(planeSource,
+                                                              channel,
+                                                              planes)))
+
+        results = {}
+        numThreads = min(self._numThreads, len(tasks))
+        if numThreads < 2:
+            for channel, task in tasks:
+                results[channel] = task.call()
+        else:
+            pool = Executors.newFixedThreadPool(numThreads)
+            try:
+                futures = [(channel, pool.submit(task))
+                           for channel, task in tasks]
+                for channel, future in futures:
+                    try:
+                        results[channel] = future.get()
+                    except ExecutionException, e:
+                        raise Exception("Could not project channel " +
+                                        str(channel) + ": " +
+                                        str(e.getCause()))
+            finally:
+                pool.shutdownNow()
+
+        projections = {}
+        self._numPlanes = 0
+        self._numBytes = 0
+        for channel, (projection, numPlanes, numBytes) in results.iteritems():
+            projections[channel] = projection
+            self._numPlanes += numPlanes
+            self._numBytes += numBytes
+        self._seconds = time.time() - start
+
+        return projections
+
+    def getStatistics(self):
+        """Return (number of planes, number of bytes, seconds) of the last
+        projection."""
+
+        return self._numPlanes, self._numBytes, self._seconds
+
+    def compose(self, projections, colors, width, height):
+        """Merge the channel projections into an RGB thumbnail.
+
+        @param projections Map from channel index to ImageProcessor
+        @param colors Map from channel index to (R, G, B) tuple (0 .. 255)
+        @param width Maximum width of the thumbnail
+        @param height Maximum height of the thumbnail
+        @return java.awt.image.BufferedImage
+        """
+
+        composite = None
+        channels = projections.keys()
+        channels.sort()
+        for channel in channels:
+            projection = projections[channel]
+            if composite is None:
+                composite = ColorProcessor(projection.getWidth(),
+                                           projection.getHeight())
+
+            # Stretch the channel to 8 bit and color it
+            projection.resetMinAndMax()
+            channelImage = projection.convertToByte(True)
+            r, g, b = colors.get(channel, (255, 255, 255))
+            channelImage.setColorModel(LUT.createLutFromColor(Color(r, g, b)))
+
+            # Add it to the composite (saturating)
+            composite.copyBits(channelImage.convertToRGB(), 0, 0, Blitter.ADD)
+
+        if composite is None:
+            raise Exception("No planes to project.")
+
+        # Scale to the thumbnail size (preserving the aspect ratio)
+        scale = min(float(width) / composite.getWidth(),
+                    float(height) / composite.getHeight())
+        composite.setInterpolationMethod(ColorProcessor.BILINEAR)
+        composite = composite.resize(max(1, int(composite.getWidth() * scale)),
+                                     max(1, int(composite.getHeight() * scale)),
+                                     True)
+        return composite.getBufferedImage()
+
+    def createThumbnail(self, planeSource, colors, width, height,
+                        planeFilter=None):
+        """Project all channels and merge them into an RGB thumbnail.
+
+        @see project() and compose()
+        """
+
+        projections = self.project(planeSource, planeFilter)
+        thumbnail = self.compose(projections, colors, width, height)
+        numPlanes, numBytes, seconds = self.getStatistics()
+        self._logger.info("MAXIMUMINTENSITYPROJECTOR::createThumbnail(): " +
+                          "projected " + str(numPlanes) + " planes (" +
+                          str(numBytes / (1024 * 1024)) + " MiB) in " +
+                          ("%.2f" % seconds) + " s.")
+        return thumbnail
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Worker process for MetadataExtractionWorkerPool. It is started by the pool
+in a separate JVM (with its own heap limit) and reads the full paths of the
+microscopy files to process from stdin, one per line. For each file, the
+series metadata is extracted with bio-formats and written to stdout as one
+line:
+
+    @@RESULT OK <base64 of the serialized series metadata>
+    @@RESULT ERROR <base64 of the error message>
+
+All other lines written to stdout (e.g. by bio-formats) are ignored by the
+pool. The worker exits when stdin is closed, or after an error that leaves
+the JVM in an unknown state (OutOfMemoryError).
+"""
+
+import base64
+import logging
+import sys
+import xml.etree.ElementTree as ET
+from java.lang import OutOfMemoryError
+from java.lang import Throwable
+from BioFormatsProcessor import BioFormatsProcessor
+
+
+# Prefix of the result lines
+RESULT_PREFIX = "@@RESULT "
+
+
+def serialize_series_metadata(allSeriesMetadata):
+    """Serialize the metadata attributes of all series to an XML string."""
+
+    root = ET.Element("SeriesMetadata")
+    for seriesMetadata in allSeriesMetadata:
+        node = ET.SubElement(root, "MicroscopyFileSeries")
+        for key, value in seriesMetadata.iteritems():
+            node.set(key, value)
+    return ET.tostring(root, encoding="UTF-8")
+
+
+def extract(fileName, logger):
+    """Extract and serialize the series metadata of a file."""
+
+    bioFormatsProcessor = BioFormatsProcessor(fileName, logger)
+    try:
+        bioFormatsProcessor.parse()
+        allSeriesMetadata = bioFormatsProcessor.getMetadata()
+    finally:
+        bioFormatsProcessor.close()
+    return serialize_series_metadata(allSeriesMetadata)
+
+
+def write_result(status, payload):
+    """Write a result line to stdout."""
+
+    if isinstance(payload, unicode):
+        payload = payload.encode("UTF-8")
+    sys.stdout.write(RESULT_PREFIX + status + " " +
+                     base64.b64encode(payload) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+
+    # Log to stderr, which the pool forwards to its own log
+    logging.basicConfig(level=logging.ERROR, stream=sys.stderr)
+    logger = logging.getLogger("MetadataExtractionWorker")
+
+    while True:
+        line = sys.stdin.readline()
+        if line == "":
+            break
+        fileName = line.rstrip("\r\n")
+        if not isinstance(fileName, unicode):
+            fileName = fileName.decode("UTF-8")
+
+        try:
+            write_result("OK", extract(fileName, logger))
+        except OutOfMemoryError, e:
+            write_result("ERROR", "Out of memory: " + str(e))
+            sys.exit(1)
+        except (Exception, Throwable), e:
+            write_result("ERROR", str(e))
+
+
+if __name__ == "__main__":
+    main()
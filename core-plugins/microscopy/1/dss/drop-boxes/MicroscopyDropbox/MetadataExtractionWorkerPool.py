@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import base64
+import glob
+import os
+import Queue
+import threading
+import xml.etree.ElementTree as ET
+from java.io import BufferedReader
+from java.io import BufferedWriter
+from java.io import InputStreamReader
+from java.io import OutputStreamWriter
+from java.lang import ProcessBuilder
+from java.lang import System
+from SeriesMetadataTable import SeriesMetadataTable
+
+
+# Prefix of the result lines written by MetadataExtractionWorker.py
+RESULT_PREFIX = "@@RESULT "
+
+
+class _WorkerProcess:
+    """A MetadataExtractionWorker.py process in its own JVM."""
+
+    def __init__(self, command, logger):
+        """Constructor.
+
+        @param command List with the command line of the worker
+        @param logger Logger object
+        """
+
+        self._logger = logger
+        self.numFiles = 0
+
+        builder = ProcessBuilder(command)
+        builder.redirectErrorStream(True)
+        self._process = builder.start()
+        self._input = BufferedWriter(
+            OutputStreamWriter(self._process.getOutputStream(), "UTF-8"))
+
+        # The output is read by a separate thread, so that waiting for a
+        # result can time out
+        self._results = Queue.Queue()
+        reader = threading.Thread(target=self._readOutput)
+        reader.setDaemon(True)
+        reader.start()
+
+    def extract(self, fileName, timeoutInSeconds):
+        """Send a file to the worker and wait for the result.
+
+        @return tuple (status, payload); status is "OK", "ERROR", "TIMEOUT"
+                or "CRASHED".
+        """
+
+        self.numFiles += 1
+        try:
+            self._input.write(fileName + "\n")
+            self._input.flush()
+        except Exception, e:
+            return "CRASHED", str(e)
+
+        try:
+            result = self._results.get(True, timeoutInSeconds)
+        except Queue.Empty:
+            return "TIMEOUT", ""
+        if result is None:
+            return "CRASHED", "exit value " + str(self._process.waitFor())
+
+        status, payload = result.split(" ", 1)
+        return status, base64.b64decode(payload)
+
+    def destroy(self):
+        """Stop the worker process."""
+
+        try:
+            self._input.close()
+        except Exception:
+            pass
+        self._process.destroy()
+
+    def _readOutput(self):
+        """Forward the result lines to the result queue and log the rest;
+        None is queued when the process exits."""
+
+        reader = BufferedReader(
+            InputStreamReader(self._process.getInputStream(), "UTF-8"))
+        try:
+            while True:
+                line = reader.readLine()
+                if line is None:
+                    break
+                if line.startswith(RESULT_PREFIX):
+                    self._results.put(line[len(RESULT_PREFIX):])
+                else:
+                    self._logger.debug("METADATAEXTRACTIONWORKER: " + line)
+        finally:
+            self._results.put(None)
+
+
+class MetadataExtractionWorkerPool:
+    """Pool of worker processes that extract the series metadata of
+    microscopy files with bio-formats, each in a separate JVM.
+
+    A file that makes bio-formats hang or exhaust the heap only takes down
+    its worker, not the DSS: each file has a timeout, each worker has its
+    own heap limit, and a worker that times out or crashes is destroyed and
+    replaced by a new one; the file is then retried (up to maxRetries
+    times) before its extraction fails. Workers are also replaced after
+    maxFilesPerWorker files. The results are returned as serialized
+    attribute maps and deserialized into SeriesMetadataTable objects.
+
+    extract() can be called from several threads: at most numWorkers files
+    are processed at the same time."""
+
+    def __init__(self, dropboxFolder, numWorkers, timeoutInSeconds,
+                 maxHeapSize, maxFilesPerWorker, maxRetries, logger):
+        """Constructor.
+
+        @param dropboxFolder Path to the dropbox folder (dbPath in
+                             MicroscopyDropbox.py)
+        @param numWorkers Maximum number of worker processes
+        @param timeoutInSeconds Maximum time to process one file (including
+                                the start of a new worker)
+        @param maxHeapSize Maximum heap size of a worker (e.g. "2g")
+        @param maxFilesPerWorker Number of files after which a worker is
+                                 replaced
+        @param maxRetries Number of times a file is retried in a new worker
+                          after a timeout or crash
+        @param logger Logger object
+        """
+
+        self._timeoutInSeconds = timeoutInSeconds
+        self._maxFilesPerWorker = maxFilesPerWorker
+        self._maxRetries = maxRetries
+        self._logger = logger
+        self._command = self._getWorkerCommand(dropboxFolder, maxHeapSize)
+
+        # Idle workers, and permits to use a worker
+        self._idle = []
+        self._lock = threading.Lock()
+        self._permits = threading.Semaphore(numWorkers)
+
+        # Statistics
+        self._numStarted = 0
+        self._numFailures = 0
+
+    def extract(self, fileName):
+        """Extract the series metadata of a file in a worker process.
+
+        @param fileName Full path to the microscopy file
+        @return SeriesMetadataTable
+        """
+
+        self._permits.acquire()
+        try:
+            attempt = 0
+            while True:
+                worker = self._acquire()
+                status, payload = worker.extract(fileName,
+                                                 self._timeoutInSeconds)
+                if status == "OK" or status == "ERROR":
+                    self._release(worker)
+                    break
+
+                # The worker timed out or crashed: replace it
+                worker.destroy()
+                self._lock.acquire()
+                try:
+                    self._numFailures += 1
+                finally:
+                    self._lock.release()
+                msg = "Worker " + status.lower() + " on " + fileName
+                if payload != "":
+                    msg += " (" + payload + ")"
+                self._logger.error("METADATAEXTRACTIONWORKERPOOL::extract(): " +
+                                   msg)
+                if attempt >= self._maxRetries:
+                    raise Exception(msg)
+                attempt += 1
+        finally:
+            self._permits.release()
+
+        if status == "ERROR":
+            raise Exception("Could not extract metadata from " + fileName +
+                            ": " + payload.decode("UTF-8"))
+
+        root = ET.fromstring(payload)
+        return SeriesMetadataTable([series.attrib for series in root])
+
+    def getStatistics(self):
+        """Return the number of workers started and of worker failures
+        (timeouts and crashes)."""
+
+        self._lock.acquire()
+        try:
+            return self._numStarted, self._numFailures
+        finally:
+            self._lock.release()
+
+    def shutdown(self):
+        """Stop all idle workers."""
+
+        self._lock.acquire()
+        try:
+            for worker in self._idle:
+                worker.destroy()
+            self._idle = []
+        finally:
+            self._lock.release()
+
+    def _acquire(self):
+        """Return an idle worker, or start a new one."""
+
+        self._lock.acquire()
+        try:
+            if len(self._idle) > 0:
+                return self._idle.pop()
+            self._numStarted += 1
+        finally:
+            self._lock.release()
+
+        return _WorkerProcess(self._command, self._logger)
+
+    def _release(self, worker):
+        """Return a worker to the idle list (or stop it if it processed
+        enough files)."""
+
+        if worker.numFiles >= self._maxFilesPerWorker:
+            worker.destroy()
+            return
+
+        self._lock.acquire()
+        try:
+            self._idle.append(worker)
+        finally:
+            self._lock.release()
+
+    def _getWorkerCommand(self, dropboxFolder, maxHeapSize):
+        """Build the command line of a worker: the JVM of the DSS with the
+        same class path plus the jars of the dropbox."""
+
+        # __file__ does not work (reliably) in Jython
+        dropboxFolder = os.path.abspath(dropboxFolder)
+        classPath = [System.getProperty("java.class.path")]
+        classPath.extend(glob.glob(os.path.join(dropboxFolder, "lib", "*.jar")))
+
+        java = os.path.join(System.getProperty("java.home"), "bin", "java")
+        return [java,
+                "-Xmx" + maxHeapSize,
+                "-cp", os.pathsep.join(classPath),
+                "-Dpython.path=" + dropboxFolder,
+                "org.python.util.jython",
+                os.path.join(dropboxFolder, "MetadataExtractionWorker.py")]
@@ -6,8 +6,13 @@
 
 import os
 import logging
+import shutil
 
+from DuplicateFileIndex import DuplicateFileIndex
+from GlobalSettings import GlobalSettings
+from ImageRepresentationQueue import ImageRepresentationQueue
 from Processor import Processor
+from RegistrationJournal import RegistrationJournal
 
 
 def process(transaction):
@@ -35,8 +40,55 @@ def process(transaction):
                         format='%(asctime)-15s %(levelname)s: %(message)s')
     logger = logging.getLogger("Microscopy")
 
+    # Path to the cache subfolder (the Processor creates it on demand)
+    cachePath = os.path.join(dbPath, "cache")
+
+    # Path for the stage timings (JSON lines)
+    timingsFile = None
+    if GlobalSettings.WriteStageTimings:
+        timingsFile = os.path.join(logPath, "timings.jsonl")
+
     # Create a Processor
-    processor = Processor(transaction, logger)
+    processor = Processor(transaction, logger, cachePath, timingsFile,
+                          dbPath)
 
     # Run
     processor.run()
+
+
+def post_metadata_registration(context):
+    """Hook called by openBIS once the registration has been committed.
+
+    @param context, the registration context
+    """
+
+    # The registration succeeded: the journal of the incoming folder
+    # (if any) is no longer needed
+    journalFolder = context.getPersistentMap().get("registrationJournal")
+    if journalFolder is not None:
+        logger = logging.getLogger("Microscopy")
+        RegistrationJournal(journalFolder, logger).discard()
+
+    # The data sets registered without image representations can now be
+    # processed by the workers
+    queueFolder = context.getPersistentMap().get("representationQueue")
+    if queueFolder is not None:
+        logger = logging.getLogger("Microscopy")
+        queue = ImageRepresentationQueue(queueFolder, logger)
+        queue.commitStaged(context.getPersistentMap().get(
+            "representationQueueStagingName"))
+        queue.writeStatistics()
+
+    # The staged files have been moved into the store: remove what is left
+    # of the zero-copy staging folder of the transaction
+    stagingFolder = context.getPersistentMap().get("storageStagingFolder")
+    if stagingFolder is not None and os.path.exists(stagingFolder):
+        shutil.rmtree(stagingFolder, True)
+
+    # The files registered in the transaction can now be found by the
+    # duplicate file detection
+    indexFolder = context.getPersistentMap().get("duplicateFileIndex")
+    if indexFolder is not None:
+        logger = logging.getLogger("Microscopy")
+        DuplicateFileIndex(indexFolder, logger).commitStaged(
+            context.getPersistentMap().get("duplicateFileIndexStagingName"))
@@ -18,6 +18,13 @@ from ch.systemsx.cisd.openbis.dss.etl.dto.api import ChannelColorRGB
 from ch.systemsx.cisd.openbis.dss.etl.dto.api import Channel
 import xml.etree.ElementTree as ET
 from GlobalSettings import GlobalSettings
+from ImageIdentifierIndex import ImageIdentifierIndex
+from ImagePyramid import image_size
+from ImagePyramid import merge_resolutions
+from ImagePyramid import pyramid_resolutions
+from ImageRepresentationPolicy import ImageRepresentationPolicy
+from MaximumIntensityProjector import BioFormatsPlaneSource
+from StreamingMaximumIntensityProjectionGenerationAlgorithm import StreamingMaximumIntensityProjectionGenerationAlgorithm
 
 class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
     """Image data configuration class for single image files (with
@@ -37,7 +44,19 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
     # Logger
     _logger = None
 
-    def __init__(self, allSeriesMetadata, logger, seriesNum=0):
+    # Index of the image identifiers grouped by series (possibly shared by
+    # the configurations of all series in the file)
+    _identifierIndex = None
+
+    # Full path to the file (or None if unknown)
+    _filePath = None
+
+    # Algorithm of the representative image (MIP), or None
+    _mipAlgorithm = None
+
+    def __init__(self, allSeriesMetadata, logger, seriesNum=0,
+                 identifierIndex=None, filePath=None,
+                 generateRepresentations=True):
         """Constructor.
 
         @param allSeriesMetadata: list of metadata attributes generated either
@@ -50,17 +69,34 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
                                   Set to -1 to register all series to the 
                                   same dataset.
         @param logger:            logger object
+        @param identifierIndex:   ImageIdentifierIndex to be shared by the
+                                  configurations of all series in the file;
+                                  if None, a new (private) index is created.
+        @param filePath:          full path to the file, used to stream its
+                                  planes for the representative image (MIP)
+        @param generateRepresentations: set to False to register the series
+                                  without image representations (thumbnails
+                                  and MIP), which are then generated later
+                                  from the ImageRepresentationQueue.
         """
 
         # Store the logger
         self._logger = logger
 
+        # Store the image identifier index
+        if identifierIndex is None:
+            identifierIndex = ImageIdentifierIndex()
+        self._identifierIndex = identifierIndex
+
         # Store the series metadata
         self._allSeriesMetadata = allSeriesMetadata
 
         # Store the series number
         self._seriesNum = seriesNum
 
+        # Store the file path
+        self._filePath = filePath
+
         # This is microscopy data
         self.setMicroscopyData(True)
 
@@ -74,14 +110,20 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
         self.setUseImageMagicToGenerateThumbnails(False)
 
         # Specify resolution of image representations explicitly
-        resolutions = GlobalSettings.ImageResolutions
+        resolutions = self._getImageResolutions()
         if not resolutions:
             self._logger.info("Skipping thumbnails generation.")
             self.setGenerateThumbnails(False)
+        elif not generateRepresentations:
+            self._logger.info("Deferring thumbnails generation.")
+            self.setGenerateThumbnails(False)
         else:
             self._logger.info("Creating thumbnails at resolutions: " + str(resolutions))
             self.setGenerateImageRepresentationsUsingImageResolutions(resolutions)
             self.setGenerateThumbnails(True)
+            if GlobalSettings.ThumbnailGenerationMachineLoad is not None:
+                self.setAllowedMachineLoadDuringThumbnailsGeneration(
+                    GlobalSettings.ThumbnailGenerationMachineLoad)
 
         # Set the recognized extensions to match those in the Annotation Tool
         self.setRecognizedImageExtensions([\
@@ -92,11 +134,90 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
         # Set the dataset type
         self.setDataSetType("MICROSCOPY_IMG")
 
-        # Create representative image (MIP) for series 0 only
-        if int(seriesNum) == 0:
-            self.setImageGenerationAlgorithm(
-                MaximumIntensityProjectionGenerationAlgorithm(
-                    "MICROSCOPY_IMG_THUMBNAIL", 256, 256, "thumbnail.png"))
+        # Create representative image (MIP) for series 0 only (or for all
+        # series if GenerateMIPForAllSeries is set)
+        self._mipAlgorithm = None
+        if generateRepresentations and (int(seriesNum) == 0 or \
+                (int(seriesNum) > 0 and GlobalSettings.GenerateMIPForAllSeries)):
+            self._mipAlgorithm = self._createImageGenerationAlgorithm()
+            self.setImageGenerationAlgorithm(self._mipAlgorithm)
+
+    def getStreamingMIPAlgorithm(self):
+        """Return the image generation algorithm of the representative image
+        if it can be prerendered (see ThumbnailRenderPool), or None."""
+
+        if self._mipAlgorithm is not None and \
+                isinstance(self._mipAlgorithm,
+                           StreamingMaximumIntensityProjectionGenerationAlgorithm) and \
+                self._mipAlgorithm.canPrerender():
+            return self._mipAlgorithm
+        return None
+
+    def _getImageResolutions(self):
+        """Return the resolutions of the image representations: either
+        chosen by the ImageRepresentationPolicy, or the configured
+        GlobalSettings.ImageResolutions and, for images larger than
+        GlobalSettings.ImagePyramidMinImageSize, the levels of a
+        power-of-two pyramid."""
+
+        # The series metadata is only read (and, if it is lazy, converted)
+        # if it is needed
+        if not GlobalSettings.UseImageRepresentationPolicy and \
+                not GlobalSettings.GenerateImagePyramid:
+            return GlobalSettings.ImageResolutions
+
+        # Metadata of the series (or of all series if they are registered
+        # to the same dataset)
+        if int(self._seriesNum) == -1:
+            seriesMetadata = list(self._allSeriesMetadata)
+        else:
+            seriesMetadata = [self._allSeriesMetadata[int(self._seriesNum)]]
+
+        if GlobalSettings.UseImageRepresentationPolicy:
+            policy = ImageRepresentationPolicy.fromGlobalSettings(self._logger)
+            return policy.chooseResolutions(seriesMetadata)
+
+        resolutions = GlobalSettings.ImageResolutions
+
+        # Size of the (largest) series
+        sizeX, sizeY = image_size(seriesMetadata)
+
+        if max(sizeX, sizeY) < GlobalSettings.ImagePyramidMinImageSize:
+            return resolutions
+
+        return merge_resolutions(resolutions,
+                                 pyramid_resolutions(
+                                     sizeX, sizeY,
+                                     GlobalSettings.ImagePyramidMinLevelSize,
+                                     GlobalSettings.ImagePyramidMaxLevelSize,
+                                     GlobalSettings.ImagePyramidMaxLevels))
+
+    def _createImageGenerationAlgorithm(self):
+        """Create the algorithm for the representative image (MIP): the
+        streaming one if enabled and the file is known, otherwise the
+        default openBIS one."""
+
+        if not GlobalSettings.UseStreamingMIP or self._filePath is None:
+            return MaximumIntensityProjectionGenerationAlgorithm(
+                "MICROSCOPY_IMG_THUMBNAIL", 256, 256, "thumbnail.png")
+
+        # Channel colors of the series
+        seriesNum = int(self._seriesNum)
+        colors = {}
+        sizeC = int(self._allSeriesMetadata[seriesNum].get("sizeC", "0"))
+        for c in range(sizeC):
+            colors[c] = self._getChannelColorComponents(seriesNum, c)
+
+        filePath = self._filePath
+
+        def planeSourceFactory(information, resolvePath):
+            return BioFormatsPlaneSource(resolvePath(filePath, information),
+                                         seriesNum)
+
+        return StreamingMaximumIntensityProjectionGenerationAlgorithm(
+            "MICROSCOPY_IMG_THUMBNAIL", 256, 256, "thumbnail.png",
+            planeSourceFactory, colors, self._logger,
+            GlobalSettings.NumMIPThreads)
 
     def createChannel(self, channelCode):
         """Create a channel from the channelCode with the name as read from
@@ -147,18 +268,17 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
         # Initialize array of metadata entries
         metaData = []
 
-        # Iterate over all image identifiers
-        for id in imageIdentifiers:
-
-            # Extract the info from the image identifier
-            ch = int(id.colorChannelIndex)
-            plane = int(id.focalPlaneIndex)
-            series = int(id.seriesIndex)
-            timepoint = int(id.timeSeriesIndex)
+        # Get the image identifiers of the relevant series (or of all series)
+        if self._seriesNum == -1:
+            entries = []
+            for group in self._identifierIndex.group(imageIdentifiers).values():
+                entries.extend(group)
+        else:
+            entries = self._identifierIndex.take(imagePath, imageIdentifiers,
+                                                 int(self._seriesNum))
 
-            # Make sure to process only the relevant series
-            if self._seriesNum != -1 and series != self._seriesNum:
-                continue
+        # Iterate over the image identifiers
+        for id, series, timepoint, plane, ch in entries:
 
             # Build the channel code
             channelCode = "SERIES-" + str(series) + "_CHANNEL-" + str(ch)
@@ -225,6 +345,16 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
         a given channel in a given series."
         """
 
+        # Create the ChannelColorRGB object
+        R, G, B = self._getChannelColorComponents(seriesIndx, channelIndx)
+        return ChannelColorRGB(R, G, B)
+
+
+    def _getChannelColorComponents(self, seriesIndx, channelIndx):
+        """Returns the channel color (from the parsed metadata) for
+        a given channel in a given series as an (R, G, B) tuple."
+        """
+
         # Get the metadata for the requested series
         metadata = self._allSeriesMetadata[seriesIndx]
 
@@ -253,10 +383,7 @@ class MicroscopySingleDatasetConfig(SimpleImageContainerDataConfig):
             self._logger.error(err)
             raise(err)
 
-        # Create the ChannelColorRGB object
-        colorRGB = ChannelColorRGB(R, G, B)
-
-        return colorRGB
+        return R, G, B
 
 
     def _getSeriesAndChannelNumbers(self, channelCode):
@@ -11,12 +11,49 @@ from org.apache.commons.io import FileUtils
 import logging
 import os
 import re
+import threading
+import time
 import xml.etree.ElementTree as ET
 from datetime import datetime
+from java.util.concurrent import Callable
+from java.util.concurrent import ExecutionException
+from java.util.concurrent import Executors
 from BioFormatsProcessor import BioFormatsProcessor
+from BioFormatsProcessor import installed_bioformats_version
+from ContentChecksums import ContentChecksums
+from ContentChecksums import MANIFEST_FILE_NAME
+from ContentChecksums import write_manifest
+from DuplicateFileIndex import DuplicateFileIndex
+from FileTransfer import FileTransfer
+from GlobalSettings import GlobalSettings
+from ImageIdentifierIndex import ImageIdentifierIndex
+from ImageRepresentationQueue import ImageRepresentationQueue
+from IncomingFolderSharder import IncomingFolderSharder
+from MetadataExtractionWorkerPool import MetadataExtractionWorkerPool
+from RegistrationJournal import RegistrationJournal
+from SeriesMetadataCache import SeriesMetadataCache
+from SeriesMetadataTable import SeriesMetadataTable
+from StageTimer import StageTimer
+from TIFFHeaderSniffer import TIFFHeaderSniffer
+from TIFFHeaderSniffer import compare_series_metadata
+from ThumbnailRenderPool import ThumbnailRenderPool
 from MicroscopySingleDatasetConfig import MicroscopySingleDatasetConfig
 from MicroscopyCompositeDatasetConfig import MicroscopyCompositeDatasetConfig
 from LeicaTIFFSeriesCompositeDatasetConfig import LeicaTIFFSeriesCompositeDatasetConfig
+from LeicaTIFFSeriesFileIndex import LeicaTIFFSeriesFileIndex
+
+
+class _SeriesMetadataExtractionTask(Callable):
+    """Extracts the series metadata from a microscopy file in a worker
+    thread of the metadata extraction pool."""
+
+    def __init__(self, processor, fileName):
+        self._processor = processor
+        self._fileName = fileName
+
+    def call(self):
+        return self._processor.extractSeriesMetadata(self._fileName)
+
 
 class Processor:
     """The Processor class performs all steps required for registering datasets
@@ -34,8 +71,69 @@ class Processor:
     # The logger
     _logger = None
 
+    # Series metadata being extracted in the background: map from the full
+    # path of a microscopy file to a java.util.concurrent.Future
+    _pendingSeriesMetadata = None
+
+    # Series metadata not yet stored in the cache and in the journal: map
+    # from the full path of a microscopy file to (cache key, metadata)
+    _unpersistedSeriesMetadata = None
+
+    # Persistent cache of extracted series metadata (or None if disabled)
+    _seriesMetadataCache = None
+
+    # Queue of the data sets whose image representations are generated
+    # after the registration (or None if they are generated in the
+    # transaction)
+    _representationQueue = None
+
+    # Pool of threads that render the thumbnails of all series of a file
+    # concurrently (or None)
+    _renderPool = None
+
+    # Read-ahead computation of the checksums of the files (or None if
+    # disabled)
+    _checksums = None
+
+    # Checksums collected from the read-ahead pass and not stored yet (by
+    # full path)
+    _collectedChecksums = None
+
+    # Index of the content of the registered files (or None if duplicate
+    # files are not detected)
+    _duplicateIndex = None
+
+    # Transfer of the files to the zero-copy staging folder (or None if
+    # disabled)
+    _fileTransfer = None
+
+    # Folder of this transaction in the zero-copy staging folder (or None)
+    _storageStagingFolder = None
+
+    # Journal of the registration of the incoming folder (or None if disabled)
+    _journal = None
+
+    # Pool of bio-formats worker processes (or None if disabled)
+    _workerPool = None
+
+    # Experiments retrieved or created in this transaction (by ID)
+    _experimentCache = None
+
+    # Metaprojects retrieved or created in this transaction (by tag and user)
+    _metaprojectCache = None
+
+    # Number of calls to the AS avoided thanks to the caches above
+    _numAvoidedASCalls = None
+
+    # Timings of the registration stages
+    _timer = None
+
+    # File where the stage timings are appended (or None)
+    _timingsFile = None
+
     # Constructor
-    def __init__(self, transaction, logger):
+    def __init__(self, transaction, logger, cachePath=None, timingsFile=None,
+                 dbPath=None):
 
         # Store arguments
         self._transaction = transaction
@@ -45,6 +143,136 @@ class Processor:
         # Set up logging
         self._logger = logger
 
+        # No metadata extraction pending yet
+        self._pendingSeriesMetadata = {}
+
+        # Consistency check of the TIFF header sniffer (see
+        # _isSnifferCheckDue()); the sniffer is disabled on a mismatch
+        self._snifferLock = threading.Lock()
+        self._numSniffedFiles = 0
+        self._snifferDisabled = False
+
+        # Series metadata to be stored in the cache and in the journal (see
+        # persistSeriesMetadata()); filled by the metadata extraction threads
+        self._unpersistedLock = threading.Lock()
+        self._unpersistedSeriesMetadata = {}
+
+        # Time the registration stages of this transaction
+        self._timer = StageTimer(self._incoming.getName(), self._logger)
+        self._timingsFile = timingsFile
+
+        # The entity caches live as long as the transaction
+        self._experimentCache = {}
+        self._metaprojectCache = {}
+        self._numAvoidedASCalls = {"getExperimentForUpdate": 0,
+                                   "getMetaproject": 0}
+
+        # Set up the series metadata cache
+        self._seriesMetadataCache = None
+        if cachePath is not None and GlobalSettings.UseSeriesMetadataCache:
+            self._seriesMetadataCache = SeriesMetadataCache(
+                os.path.join(cachePath, "seriesMetadata"),
+                installed_bioformats_version(), self._logger,
+                GlobalSettings.SeriesMetadataCacheMaxEntries,
+                GlobalSettings.SeriesMetadataCacheMaxSizeInBytes)
+
+        # Set up the pool of bio-formats worker processes
+        self._workerPool = None
+        if GlobalSettings.UseMetadataWorkerProcesses and dbPath is None:
+            self._logger.warning("PROCESSOR::__init__(): " + 
+                                 "No dropbox folder given: the series " + 
+                                 "metadata is extracted in the DSS.")
+        elif GlobalSettings.UseMetadataWorkerProcesses:
+            self._workerPool = MetadataExtractionWorkerPool(
+                dbPath,
+                GlobalSettings.NumMetadataWorkerProcesses,
+                GlobalSettings.MetadataWorkerTimeoutInSeconds,
+                GlobalSettings.MetadataWorkerMaxHeapSize,
+                GlobalSettings.MetadataWorkerMaxFilesPerProcess,
+                GlobalSettings.MetadataWorkerMaxRetries,
+                self._logger)
+
+        # Set up the registration journal of the incoming folder and tell the
+        # post-registration hook where to find it
+        self._journal = None
+        if cachePath is not None and GlobalSettings.UseRegistrationJournal:
+            journalFolder = os.path.join(cachePath, "journals",
+                                         self._incoming.getName())
+            self._journal = RegistrationJournal(journalFolder, self._logger)
+            transaction.getRegistrationContext().getPersistentMap().put(
+                "registrationJournal", journalFolder)
+
+        # Set up the pool of thumbnail rendering threads (only the streaming
+        # MIP can be rendered before the datasets are stored)
+        self._renderPool = None
+        if GlobalSettings.UseStreamingMIP and \
+                GlobalSettings.NumThumbnailRenderWorkers > 1:
+            self._renderPool = ThumbnailRenderPool(
+                GlobalSettings.NumThumbnailRenderWorkers, self._logger)
+
+        # Set up the queue of deferred image representations: the jobs of
+        # this transaction are staged, and queued by the post-registration
+        # hook once the registration is committed
+        self._representationQueue = None
+        if cachePath is not None and GlobalSettings.DeferImageRepresentations:
+            queueFolder = os.path.join(cachePath, "representationQueue")
+            self._representationQueue = ImageRepresentationQueue(
+                queueFolder, self._logger,
+                GlobalSettings.ImageRepresentationMaxAttempts)
+            self._representationQueue.discardStaged(self._incoming.getName())
+            persistentMap = transaction.getRegistrationContext().getPersistentMap()
+            persistentMap.put("representationQueue", queueFolder)
+            persistentMap.put("representationQueueStagingName",
+                              self._incoming.getName())
+
+        # Set up the read-ahead computation of the content checksums (also
+        # needed to confirm duplicate files)
+        self._checksums = None
+        self._collectedChecksums = {}
+        if GlobalSettings.ComputeContentChecksums or \
+                GlobalSettings.DuplicateFilePolicy is not None:
+            self._checksums = ContentChecksums(
+                GlobalSettings.NumContentChecksumThreads, self._logger)
+
+        # Set up the index of the registered files: the files of this
+        # transaction are staged, and indexed by the post-registration hook
+        # once the registration is committed
+        self._duplicateIndex = None
+        if cachePath is not None and \
+                GlobalSettings.DuplicateFilePolicy is not None:
+            if GlobalSettings.DuplicateFilePolicy not in ["warn", "skip",
+                                                          "reference"]:
+                msg = "PROCESSOR::__init__(): " + \
+                "Invalid duplicate file policy: " + \
+                str(GlobalSettings.DuplicateFilePolicy)
+                self._logger.error(msg)
+                raise Exception(msg)
+            indexFolder = os.path.join(cachePath, "duplicateFileIndex")
+            self._duplicateIndex = DuplicateFileIndex(indexFolder,
+                                                      self._logger)
+            self._duplicateIndex.discardStaged(self._incoming.getName())
+            persistentMap = transaction.getRegistrationContext().getPersistentMap()
+            persistentMap.put("duplicateFileIndex", indexFolder)
+            persistentMap.put("duplicateFileIndexStagingName",
+                              self._incoming.getName())
+
+        # Set up the zero-copy staging of the files to store: the staging
+        # folder of this transaction is removed by the post-registration hook
+        # (or when the incoming folder is registered again)
+        self._fileTransfer = None
+        self._storageStagingFolder = None
+        if GlobalSettings.ZeroCopyStagingFolder is not None:
+            self._fileTransfer = FileTransfer(
+                self._logger, GlobalSettings.StorageTransferStrategies,
+                GlobalSettings.StorageTransferProgressIntervalInBytes)
+            self._storageStagingFolder = os.path.join(
+                GlobalSettings.ZeroCopyStagingFolder, self._incoming.getName())
+            if os.path.exists(self._storageStagingFolder):
+                FileUtils.deleteDirectory(
+                    java.io.File(self._storageStagingFolder))
+            transaction.getRegistrationContext().getPersistentMap().put(
+                "storageStagingFolder", self._storageStagingFolder)
+
 
     def dictToXML(self, d):
         """Converts a dictionary into an XML string."""
@@ -62,6 +290,271 @@ class Processor:
         # Return the XML string
         return xml
 
+    def extractSeriesMetadata(self, fileName):
+        """Extract the metadata of all series in a microscopy file using
+        bio-formats. This method is also called from the worker threads of
+        the metadata extraction pool.
+
+        @param fileName Full path to the microscopy file
+        @return tuple (allSeriesMetadata, num_series)
+        """
+
+        # Try the journal of a previous attempt first
+        relativeFileName = self.getRelativePath(fileName)
+        if self._journal is not None:
+            fileSize = os.path.getsize(fileName)
+            allSeriesMetadata = self._journal.getSeriesMetadata(relativeFileName,
+                                                                fileSize)
+            if allSeriesMetadata is not None:
+                self._logger.info("PROCESSOR::extractSeriesMetadata(): " + 
+                                  "Using metadata from the journal for " + 
+                                  relativeFileName)
+                return allSeriesMetadata, len(allSeriesMetadata)
+
+        # Plain TIFF and OME-TIFF files: try to read the header directly
+        sniffedSeriesMetadata = None
+        if GlobalSettings.UseTIFFHeaderSniffer and not self._snifferDisabled:
+            start = self._timer.now()
+            sniffer = TIFFHeaderSniffer(fileName, self._logger)
+            sniffedSeriesMetadata = sniffer.sniff()
+            self._timer.record("tiff_header_sniff", start, relativeFileName)
+            if sniffedSeriesMetadata is None:
+                self._logger.info("PROCESSOR::extractSeriesMetadata(): " + 
+                                  "Using bio-formats for " + relativeFileName + 
+                                  " (" + sniffer.getReason() + ")")
+            elif not self._isSnifferCheckDue():
+                self._deferPersistSeriesMetadata(fileName, None,
+                                                 sniffedSeriesMetadata)
+                return sniffedSeriesMetadata, len(sniffedSeriesMetadata)
+
+        # Try the cache next: on a hit the file is not opened at all
+        cacheKey = None
+        if self._seriesMetadataCache is not None:
+            cacheKey = self._seriesMetadataCache.getKey(fileName)
+            allSeriesMetadata = self._seriesMetadataCache.get(cacheKey,
+                                                              fileName)
+            if allSeriesMetadata is not None:
+                self._logger.info("PROCESSOR::extractSeriesMetadata(): " + 
+                                  "Using cached metadata for " + fileName)
+                if sniffedSeriesMetadata is not None:
+                    self._verifySniffedSeriesMetadata(relativeFileName,
+                                                      sniffedSeriesMetadata,
+                                                      allSeriesMetadata)
+                self._deferPersistSeriesMetadata(fileName, None,
+                                                 allSeriesMetadata)
+                return allSeriesMetadata, len(allSeriesMetadata)
+
+        start = self._timer.now()
+        if self._workerPool is not None:
+
+            # Extract series metadata in a separate worker process
+            allSeriesMetadata = self._workerPool.extract(fileName)
+            num_series = len(allSeriesMetadata)
+
+        else:
+
+            # Instantiate a BioFormatsProcessor
+            bioFormatsProcessor = BioFormatsProcessor(fileName, self._logger)
+
+            try:
+
+                # Extract series metadata
+                bioFormatsProcessor.parse()
+
+                # Get the metadata for the series: the metadata of a series
+                # is only converted when the series is accessed
+                allSeriesMetadata = bioFormatsProcessor.getLazyMetadata()
+
+                # Get the number of series
+                num_series = bioFormatsProcessor.getNumSeries()
+
+            finally:
+
+                # Close the file
+                bioFormatsProcessor.close()
+
+        self._timer.record("bioformats_parse", start, relativeFileName)
+
+        # Consistency check of the TIFF header sniffer
+        if sniffedSeriesMetadata is not None:
+            self._verifySniffedSeriesMetadata(relativeFileName,
+                                              sniffedSeriesMetadata,
+                                              allSeriesMetadata)
+
+        # Store the metadata for the next time the file is uploaded, and
+        # record it in case this registration attempt fails (once the series
+        # were converted by the registration; see persistSeriesMetadata())
+        self._deferPersistSeriesMetadata(fileName, cacheKey, allSeriesMetadata)
+
+        return allSeriesMetadata, num_series
+
+    def _deferPersistSeriesMetadata(self, fileName, cacheKey,
+                                    allSeriesMetadata):
+        """Remember the series metadata of a file to be stored in the series
+        metadata cache (if cacheKey is not None) and in the journal by
+        persistSeriesMetadata(). Storing it right after parsing would
+        convert all series of a LazySeriesMetadata at once.
+
+        @param fileName Full path to the microscopy file
+        @param cacheKey Key in the series metadata cache, or None
+        @param allSeriesMetadata Metadata of all series of the file
+        """
+
+        if cacheKey is None and self._journal is None:
+            return
+
+        self._unpersistedLock.acquire()
+        try:
+            self._unpersistedSeriesMetadata[fileName] = (cacheKey,
+                                                         allSeriesMetadata)
+        finally:
+            self._unpersistedLock.release()
+
+    def persistSeriesMetadata(self, fileName=None):
+        """Store the series metadata remembered by
+        _deferPersistSeriesMetadata() in the series metadata cache and in the
+        journal: for one file once it has been registered (all its series
+        were converted by then), or for all remaining files (fileName None)
+        at the end of the registration, also if it failed.
+
+        @param fileName Full path to the microscopy file, or None
+        """
+
+        self._unpersistedLock.acquire()
+        try:
+            if fileName is None:
+                items = self._unpersistedSeriesMetadata.items()
+                self._unpersistedSeriesMetadata = {}
+            else:
+                entry = self._unpersistedSeriesMetadata.pop(fileName, None)
+                if entry is None:
+                    return
+                items = [(fileName, entry)]
+        finally:
+            self._unpersistedLock.release()
+
+        for fileName, (cacheKey, allSeriesMetadata) in items:
+            if cacheKey is not None:
+                self._seriesMetadataCache.put(cacheKey, allSeriesMetadata,
+                                              fileName)
+            if self._journal is not None:
+                self._journal.putSeriesMetadata(self.getRelativePath(fileName),
+                                                os.path.getsize(fileName),
+                                                allSeriesMetadata)
+
+    def _isSnifferCheckDue(self):
+        """Return True if the metadata of the file that was just sniffed
+        must also be parsed with bio-formats (first sniffed file of the
+        registration, then every VerifyTIFFHeaderSnifferInterval-th one)."""
+
+        if GlobalSettings.VerifyTIFFHeaderSniffer:
+            return True
+        interval = GlobalSettings.VerifyTIFFHeaderSnifferInterval
+        if interval <= 0:
+            return False
+
+        self._snifferLock.acquire()
+        try:
+            numSniffedFiles = self._numSniffedFiles
+            self._numSniffedFiles += 1
+        finally:
+            self._snifferLock.release()
+        return numSniffedFiles % interval == 0
+
+    def _verifySniffedSeriesMetadata(self, relativeFileName,
+                                     sniffedSeriesMetadata, allSeriesMetadata):
+        """Compare the series metadata read by the TIFF header sniffer with
+        the one parsed by bio-formats; on a mismatch, log the differences
+        and stop using the sniffer for the rest of the registration."""
+
+        differences = compare_series_metadata(sniffedSeriesMetadata,
+                                              allSeriesMetadata)
+        if len(differences) == 0:
+            return
+
+        for difference in differences:
+            self._logger.error("PROCESSOR::extractSeriesMetadata(): " + 
+                               "TIFF header sniffer mismatch for " + 
+                               relativeFileName + ": " + difference)
+        self._snifferDisabled = True
+        self._logger.error("PROCESSOR::extractSeriesMetadata(): " + 
+                           "TIFF header sniffer disabled for the rest of " + 
+                           "the registration.")
+
+    def prefetchSeriesMetadata(self, propertiesFile):
+        """Start extracting the series metadata of all MicroscopyFile nodes
+        without children in a bounded pool of worker threads. The results are
+        collected (in registration order) by getSeriesMetadata().
+
+        @param propertiesFile Full path to the properties XML file
+        """
+
+        # Collect the full paths of the files to process (streaming through
+        # the properties file and dropping the nodes once inspected)
+        fileNames = []
+        depth = 0
+        for event, node in self._iterparse(propertiesFile):
+            if event == "start":
+                depth += 1
+                continue
+            if depth == 3 and node.tag == "MicroscopyFile" and len(node) == 0:
+                relativeFileName = node.attrib.get("relativeFileName")
+                fileNames.append(os.path.join(self._incoming.getAbsolutePath(),
+                                              relativeFileName))
+            if depth > 1:
+                node.clear()
+            depth -= 1
+
+        # Nothing to gain from a pool for a single file
+        numWorkers = min(int(GlobalSettings.NumMetadataExtractionWorkers),
+                         len(fileNames))
+        if numWorkers < 2:
+            return
+
+        # Log
+        self._logger.info("PROCESSOR::prefetchSeriesMetadata(): " + 
+                          "Extracting metadata from " + str(len(fileNames)) + 
+                          " files with " + str(numWorkers) + " workers.")
+
+        # Submit all files; the pool will shut down after the last task
+        pool = Executors.newFixedThreadPool(numWorkers)
+        try:
+            for fileName in fileNames:
+                if not fileName in self._pendingSeriesMetadata:
+                    self._pendingSeriesMetadata[fileName] = pool.submit(
+                        _SeriesMetadataExtractionTask(self, fileName))
+        finally:
+            pool.shutdown()
+
+    def getSeriesMetadata(self, fileName):
+        """Return the series metadata for a microscopy file, either by
+        waiting for its extraction in the metadata extraction pool to
+        complete, or by extracting it right away.
+
+        @param fileName Full path to the microscopy file
+        @return tuple (allSeriesMetadata, num_series)
+        """
+
+        future = self._pendingSeriesMetadata.pop(fileName, None)
+        if future is None:
+            return self.extractSeriesMetadata(fileName)
+
+        try:
+            return future.get()
+        except ExecutionException, e:
+            msg = "PROCESSOR::getSeriesMetadata(): " + \
+            "Could not extract metadata from file " + fileName + ": " + \
+            str(e.getCause())
+            self._logger.error(msg)
+            raise Exception(msg)
+
+    def cancelPendingSeriesMetadata(self):
+        """Cancel all metadata extractions that were not collected."""
+
+        for future in self._pendingSeriesMetadata.values():
+            future.cancel(True)
+        self._pendingSeriesMetadata = {}
+
     def getCustomTimeStamp(self):
         """Create an univocal time stamp based on the current date and time
         (works around incomplete API of Jython 2.5)."""
@@ -69,6 +562,38 @@ class Processor:
         t = datetime.now()
         return t.strftime("%y%d%m%H%M%S") + unicode(t)[20:]
 
+    def _iterparse(self, propertiesFile):
+        """Stream (start, end) events from a properties file with
+        ElementTree.iterparse(), recording the time spent parsing.
+
+        @param propertiesFile Full path to the properties XML file
+        """
+
+        elapsed = 0.0
+        iterator = iter(ET.iterparse(propertiesFile, events=("start", "end")))
+        while True:
+            start = time.time()
+            try:
+                event, node = iterator.next()
+            except StopIteration:
+                break
+            elapsed += time.time() - start
+            yield event, node
+
+        self._timer.recordDuration("xml_parse", elapsed,
+                                   self.getRelativePath(propertiesFile))
+
+    def getRelativePath(self, fullPath):
+        """Return the path of a file or folder relative to the incoming folder.
+
+        @param fullPath Full path to a file or folder in the incoming folder
+        """
+
+        incomingStr = self._incoming.getAbsolutePath()
+        if fullPath.startswith(incomingStr + os.sep):
+            return fullPath[len(incomingStr) + 1:]
+        return fullPath
+
     def getSubFolders(self):
         """Return a list of subfolders of the passed incoming directory.
 
@@ -94,6 +619,17 @@ class Processor:
         if len(expId) > 60:
             expId = expId[0:60]
 
+        # Reuse the experiment if it was already retrieved or created in
+        # this transaction
+        exp = self._experimentCache.get(expId)
+        if exp is not None:
+            self._numAvoidedASCalls["getExperimentForUpdate"] += 1
+            self._logger.info("PROCESSOR::getOrCreateExperiment(): " + 
+                              "Registering to experiment with ID " + expId + 
+                              " already used in this transaction.")
+            exp.setPropertyValue("MICROSCOPY_EXPERIMENT_NAME", expName)
+            return exp
+
         # Try getting the experiment
         exp = self._transaction.getExperimentForUpdate(expId)
         if not exp:
@@ -118,6 +654,9 @@ class Processor:
             "Registering to already existing experiment with ID " + expId + "."
             self._logger.info(msg)
 
+        # Remember the experiment for the rest of the transaction
+        self._experimentCache[expId] = exp
+
         # Store the name
         exp.setPropertyValue("MICROSCOPY_EXPERIMENT_NAME", expName)
 
@@ -156,6 +695,9 @@ class Processor:
             self._logger.info("PROCESSOR::createExperiment(): " + 
                               "Created experiment with ID " + expId + ".")
 
+        # Remember the experiment for the rest of the transaction
+        self._experimentCache[expId] = exp
+
         # Store the name
         exp.setPropertyValue("MICROSCOPY_EXPERIMENT_NAME", expName)
 
@@ -282,21 +824,62 @@ class Processor:
                 attachmentFilePath = os.path.join(self._incoming.getAbsolutePath(),
                                                   f)
 
-                # Extract the file name
-                attachmentFileName = os.path.basename(attachmentFilePath)
-
-                # Read the attachment into a byte array
-                javaFile = java.io.File(attachmentFilePath)
-                byteArray = FileUtils.readFileToByteArray(javaFile)
-
-                # Add attachment
-                openBISExperiment.addAttachment(attachmentFilePath,
-                                                attachmentFileName,
-                                                "", byteArray)
+                # Add the attachment
+                self.processAttachment(attachmentFilePath, openBISExperiment)
 
         # Return the openBIS Experiment object
         return openBISExperiment
 
+    def processAttachment(self, attachmentFilePath, openBISExperiment):
+        """Add a file as an attachment to the experiment. Files larger than
+        GlobalSettings.MaxAttachmentSizeInBytes are not read into memory, but
+        moved into a MICROSCOPY_EXPERIMENT_ATTACHMENT dataset that is linked
+        to the experiment.
+
+        @param attachmentFilePath Full path to the attachment file
+        @param openBISExperiment IExperimentUpdatable experiment
+        """
+
+        # Extract the file name
+        attachmentFileName = os.path.basename(attachmentFilePath)
+
+        # Get the file size
+        attachmentSize = os.path.getsize(attachmentFilePath)
+
+        if attachmentSize > GlobalSettings.MaxAttachmentSizeInBytes:
+
+            # Store the file as a dataset (the file is moved, not buffered)
+            self._logger.info("PROCESSOR::processAttachment(): " + 
+                              "Attachment " + attachmentFileName + " (" + 
+                              str(attachmentSize) + " bytes) exceeds " + 
+                              str(GlobalSettings.MaxAttachmentSizeInBytes) + 
+                              " bytes: storing it as a dataset.")
+
+            start = time.time()
+            dataset = self._transaction.createNewDataSet("MICROSCOPY_EXPERIMENT_ATTACHMENT")
+            dataset.setExperiment(openBISExperiment)
+            self._transaction.moveFile(attachmentFilePath, dataset)
+
+            self._logger.info("PROCESSOR::processAttachment(): " + 
+                              "Moved attachment " + attachmentFileName + 
+                              " in " + ("%.3f" % (time.time() - start)) + " s.")
+            return
+
+        # Read the attachment into a byte array
+        start = time.time()
+        javaFile = java.io.File(attachmentFilePath)
+        byteArray = FileUtils.readFileToByteArray(javaFile)
+
+        self._logger.info("PROCESSOR::processAttachment(): " + 
+                          "Read attachment " + attachmentFileName + " (" + 
+                          str(attachmentSize) + " bytes) in " + 
+                          ("%.3f" % (time.time() - start)) + " s.")
+
+        # Add attachment
+        openBISExperiment.addAttachment(attachmentFilePath,
+                                        attachmentFileName,
+                                        "", byteArray)
+
     def processMicroscopyFile(self, microscopyFileNode, openBISExperiment):
         """Register the Microscopy File using the parsed properties file.
 
@@ -309,30 +892,34 @@ class Processor:
         relativeFileName = microscopyFileNode.attrib.get("relativeFileName")
         fileName = os.path.join(self._incoming.getAbsolutePath(), relativeFileName)
 
+        # Start reading the file to checksum it
+        if self._checksums is not None:
+            self._checksums.submit(fileName)
+
+        # Look for an identical file registered before
+        duplicateKey = None
+        if self._duplicateIndex is not None:
+            duplicateKey, duplicate = self.findDuplicateFile(fileName,
+                                                             relativeFileName)
+            if duplicate is not None and \
+                    GlobalSettings.DuplicateFilePolicy != "warn":
+                self.registerDuplicateFile(microscopyFileNode,
+                                           openBISExperiment, fileName,
+                                           relativeFileName, duplicate)
+                return
+
         # Check if the series metadata has been extracted already (i.e. if
         # the microscopyFileNode has at least one child), otherwise
         # process it
         if len(microscopyFileNode) == 0:
-            
-            # Instantiate a BioFormatsProcessor
-            bioFormatsProcessor = BioFormatsProcessor(fileName, self._logger)
 
-            # Extract series metadata
-            bioFormatsProcessor.parse()
-
-            # Get the metadata for the series
-            allSeriesMetadata = bioFormatsProcessor.getMetadata()
-
-            # Get the number of series
-            num_series = bioFormatsProcessor.getNumSeries()
-
-            # Close the file
-            bioFormatsProcessor.close()
+            # Get the series metadata (possibly extracted in the background)
+            allSeriesMetadata, num_series = self.getSeriesMetadata(fileName)
 
         else:
 
             # Get the metadata for all series from the (processed) settings XML 
-            allSeriesMetadata = []
+            allSeriesMetadata = SeriesMetadataTable()
             for series in microscopyFileNode:
                 allSeriesMetadata.append(series.attrib)
 
@@ -344,45 +931,54 @@ class Processor:
                           "File " + relativeFileName + " contains " + 
                            str(num_series) + " series.")
 
-        # Get the correct space where to create the sample
-        identifier = openBISExperiment.getExperimentIdentifier()
-        sample_space = identifier[1:identifier.find('/', 1)]
-        self._logger.info("Creating sample with auto-generated code in space " + sample_space)
-
         # Create a sample for the dataset
-        sample = self._transaction.createNewSampleWithGeneratedCode(sample_space,
-                                                                    "MICROSCOPY_SAMPLE_TYPE")
-
-        # Set the sample name
-        sample.setPropertyValue("MICROSCOPY_SAMPLE_NAME",
-                                relativeFileName[relativeFileName.rfind('/') + 1:])
-
-        # Set the sample description
-        sampleDescr = microscopyFileNode.attrib.get("description")
-        if sampleDescr is None:
-            sampleDescr = ""
-        sample.setPropertyValue("MICROSCOPY_SAMPLE_DESCRIPTION", sampleDescr)
-
-        # Store the sample (file) size in bytes
-        datasetSize = microscopyFileNode.attrib.get("datasetSize")
-        if datasetSize is not None:
-            sample.setPropertyValue("MICROSCOPY_SAMPLE_SIZE_IN_BYTES", datasetSize)
-
-        # Set the experiment
-        sample.setExperiment(openBISExperiment)
+        sample = self.createFileSample(microscopyFileNode, relativeFileName,
+                                       openBISExperiment)
+
+        # The image identifiers of the file are grouped by series once and
+        # shared by the configurations of all series
+        identifierIndex = ImageIdentifierIndex()
+
+        def createSingleDatasetConfig(i):
+            return MicroscopySingleDatasetConfig(allSeriesMetadata,
+                                                 self._logger, i,
+                                                 identifierIndex,
+                                                 fileName,
+                                                 self._representationQueue is None)
+
+        # Render the thumbnails of all series concurrently, before the file
+        # is moved into the dataset: this needs the configuration objects of
+        # all series up front. Otherwise, each configuration is created when
+        # its series is registered, so that the series metadata is still
+        # converted one series at a time.
+        singleDatasetConfigs = None
+        if self._renderPool is not None:
+            singleDatasetConfigs = [createSingleDatasetConfig(i)
+                                    for i in range(num_series)]
+            self.prerenderThumbnails(singleDatasetConfigs, relativeFileName)
+
+        # Store the checksums of the file
+        checksums = self.storeChecksums(sample, fileName, relativeFileName)
+
+        # Stage the file on the filesystem of the store
+        storedFileName = self.stageForStorage(fileName, relativeFileName)
 
         # Register all series in the file
         image_data_set = None
         for i in range(num_series):
 
-            # Create a configuration object
-            singleDatasetConfig = MicroscopySingleDatasetConfig(allSeriesMetadata,
-                                                                self._logger, i)
+            # Get (or create) the configuration object
+            if singleDatasetConfigs is not None:
+                singleDatasetConfig = singleDatasetConfigs[i]
+            else:
+                singleDatasetConfig = createSingleDatasetConfig(i)
 
             # Extract the metadata associated to this series and convert it to
             # XML to store it in the MICROSCOPY_IMG_CONTAINER_METADATA property
             # of the MICROSCOPY_IMG_CONTAINER_METADATA (series) dataset type
+            start = self._timer.now()
             seriesMetadataXML = self.dictToXML(allSeriesMetadata[i])
+            self._timer.record("metadata_to_xml", start, relativeFileName, i)
 
             # Log the content of the metadata
             self._logger.info("Series metadata (XML): " + str(seriesMetadataXML))
@@ -397,8 +993,11 @@ class Processor:
                                    str(fileName) + " and series 0.")
 
                 # Create an image dataset
+                start = self._timer.now()
                 dataset = self._transaction.createNewImageDataSet(singleDatasetConfig,
-                                                                  java.io.File(fileName))
+                                                                  java.io.File(storedFileName))
+                self._timer.record("createNewImageDataSet", start,
+                                   relativeFileName, i)
 
                 # Store the metadata in the MICROSCOPY_IMG_CONTAINER_METADATA property
                 dataset.setPropertyValue("MICROSCOPY_IMG_CONTAINER_METADATA", seriesMetadataXML)
@@ -410,7 +1009,9 @@ class Processor:
                 image_data_set = dataset
 
                 # Move the file
-                self._transaction.moveFile(fileName, image_data_set)
+                start = self._timer.now()
+                self._transaction.moveFile(storedFileName, image_data_set)
+                self._timer.record("moveFile", start, relativeFileName)
 
             else:
 
@@ -423,8 +1024,11 @@ class Processor:
 
                 # Create an image dataset that points to an existing one
                 # (and points to its file)
+                start = self._timer.now()
                 dataset = self._transaction.createNewImageDataSetFromDataSet(singleDatasetConfig,
                                                                              image_data_set)
+                self._timer.record("createNewImageDataSetFromDataSet", start,
+                                   relativeFileName, i)
 
                 # Store the metadata in the MICROSCOPY_IMG_CONTAINER_METADATA property
                 dataset.setPropertyValue("MICROSCOPY_IMG_CONTAINER_METADATA",
@@ -437,6 +1041,248 @@ class Processor:
             # Set the (common) sample for the series
             dataset.setSample(sample)
 
+            # Queue the generation of the image representations
+            if self._representationQueue is not None:
+                self._representationQueue.stage(self._incoming.getName(),
+                                                dataset.getDataSetCode(),
+                                                ImageRepresentationQueue.SINGLE,
+                                                os.path.basename(fileName), i,
+                                                allSeriesMetadata)
+
+        # All series were converted by now: store the metadata of the file
+        self.persistSeriesMetadata(fileName)
+
+        # Add the file to the index of the registered files
+        if self._duplicateIndex is not None and image_data_set is not None:
+            self._duplicateIndex.stage(self._incoming.getName(), duplicateKey,
+                                       checksums[0][2],
+                                       image_data_set.getDataSetCode(),
+                                       relativeFileName)
+
+
+    def createFileSample(self, microscopyFileNode, relativeFileName,
+                         openBISExperiment):
+        """Create the sample of a microscopy file.
+
+        @param microscopyFileNode An XML node corresponding to a microscopy
+        file (dataset)
+        @param relativeFileName Path of the file relative to incoming
+        @param openBISExperiment An ISample object representing an Experiment
+        @return the sample
+        """
+
+        # Get the correct space where to create the sample
+        identifier = openBISExperiment.getExperimentIdentifier()
+        sample_space = identifier[1:identifier.find('/', 1)]
+        self._logger.info("Creating sample with auto-generated code in space " + sample_space)
+
+        # Create a sample for the dataset
+        sample = self._transaction.createNewSampleWithGeneratedCode(sample_space,
+                                                                    "MICROSCOPY_SAMPLE_TYPE")
+
+        # Set the sample name
+        sample.setPropertyValue("MICROSCOPY_SAMPLE_NAME",
+                                relativeFileName[relativeFileName.rfind('/') + 1:])
+
+        # Set the sample description
+        sampleDescr = microscopyFileNode.attrib.get("description")
+        if sampleDescr is None:
+            sampleDescr = ""
+        sample.setPropertyValue("MICROSCOPY_SAMPLE_DESCRIPTION", sampleDescr)
+
+        # Store the sample (file) size in bytes
+        datasetSize = microscopyFileNode.attrib.get("datasetSize")
+        if datasetSize is not None:
+            sample.setPropertyValue("MICROSCOPY_SAMPLE_SIZE_IN_BYTES", datasetSize)
+
+        # Set the experiment
+        sample.setExperiment(openBISExperiment)
+
+        return sample
+
+
+    def findDuplicateFile(self, fileName, relativeFileName):
+        """Look for a registered file with the same content in the index of
+        the registered files. Candidates with the same size and partial hash
+        are confirmed by comparing the SHA-256 checksum of the full content
+        (from the read-ahead checksum pass).
+
+        @param fileName Full path to the microscopy file
+        @param relativeFileName Path of the file relative to incoming
+        @return tuple (key, duplicate), with the index key of the file and
+                the index entry of the duplicate (or None)
+        """
+
+        start = self._timer.now()
+        key = self._duplicateIndex.getKey(fileName)
+        candidates = self._duplicateIndex.lookup(key)
+        self._timer.record("duplicate_lookup", start, relativeFileName)
+        if len(candidates) == 0:
+            return key, None
+
+        sha256 = self.getChecksums(fileName, relativeFileName)[0][2]
+        for candidate in candidates:
+            if candidate["sha256"] != sha256:
+                continue
+
+            # Make sure that the data set was not deleted in the meanwhile
+            # (files staged in this transaction do not exist in openBIS yet)
+            if not candidate["staged"] and \
+                    self._transaction.getDataSet(candidate["dataSetCode"]) is None:
+                self._logger.info("PROCESSOR::findDuplicateFile(): " + 
+                                  "Ignoring indexed data set " + 
+                                  candidate["dataSetCode"] + 
+                                  " that no longer exists.")
+                continue
+
+            self._logger.warning("PROCESSOR::findDuplicateFile(): " + 
+                                 "File " + relativeFileName + 
+                                 " is identical to " + 
+                                 candidate["relativePath"] + 
+                                 " registered in data set " + 
+                                 candidate["dataSetCode"] + ".")
+            return key, candidate
+
+        return key, None
+
+
+    def registerDuplicateFile(self, microscopyFileNode, openBISExperiment,
+                              fileName, relativeFileName, duplicate):
+        """Apply the duplicate file policy to a file that is identical to
+        a registered one: the file is either skipped, or registered as a
+        sample that references the MICROSCOPY_IMG data set of the registered
+        file (in its MICROSCOPY_SAMPLE_DUPLICATE_OF property) without storing
+        the file again.
+
+        @param microscopyFileNode An XML node corresponding to a microscopy
+        file (dataset)
+        @param openBISExperiment An ISample object representing an Experiment
+        @param fileName Full path to the microscopy file
+        @param relativeFileName Path of the file relative to incoming
+        @param duplicate Index entry of the registered file
+        """
+
+        # The metadata of the file is not needed
+        future = self._pendingSeriesMetadata.pop(fileName, None)
+        if future is not None:
+            future.cancel(True)
+        self._collectedChecksums.pop(fileName, None)
+
+        if GlobalSettings.DuplicateFilePolicy == "skip":
+            self._logger.info("PROCESSOR::registerDuplicateFile(): " + 
+                              "Skipping " + relativeFileName + ".")
+            return
+
+        self._logger.info("PROCESSOR::registerDuplicateFile(): " + 
+                          "Registering " + relativeFileName + 
+                          " as a reference to data set " + 
+                          duplicate["dataSetCode"] + ".")
+        sample = self.createFileSample(microscopyFileNode, relativeFileName,
+                                       openBISExperiment)
+        sample.setPropertyValue("MICROSCOPY_SAMPLE_DUPLICATE_OF",
+                                duplicate["dataSetCode"])
+
+
+    def prerenderThumbnails(self, datasetConfigs, relativePath):
+        """Render the thumbnails of the given dataset configurations
+        concurrently in the thumbnail render pool (if enabled).
+
+        @param datasetConfigs List of dataset configurations of one file
+        @param relativePath Relative path of the file (for logging)
+        """
+
+        if self._renderPool is None:
+            return
+
+        algorithms = []
+        for datasetConfig in datasetConfigs:
+            algorithm = datasetConfig.getStreamingMIPAlgorithm()
+            if algorithm is not None:
+                algorithms.append(algorithm)
+
+        if len(algorithms) > 0:
+            start = self._timer.now()
+            self._renderPool.renderAll(algorithms, relativePath)
+            self._timer.record("render_thumbnails", start, relativePath)
+
+
+    def getChecksums(self, fullPath, relativePath):
+        """Return the checksums of a file or folder computed by the
+        read-ahead pass (waiting for it if needed).
+
+        @param fullPath Full path to the file or folder in incoming
+        @param relativePath Path of the file or folder relative to incoming
+        @return list of tuples (relativePath, crc32, sha256, size)
+        """
+
+        checksums = self._collectedChecksums.get(fullPath)
+        if checksums is not None:
+            return checksums
+
+        # Wait for the read-ahead pass (the overhead of the checksums for
+        # the registration)
+        start = self._timer.now()
+        checksums, numBytes, seconds = self._checksums.get(fullPath)
+        self._timer.record("checksum_wait", start, relativePath)
+        self._timer.recordDuration("checksum", seconds, relativePath,
+                                   numBytes=numBytes)
+
+        self._collectedChecksums[fullPath] = checksums
+        return checksums
+
+
+    def storeChecksums(self, sample, fullPath, relativePath):
+        """Store the checksums of a file, or of the files of a folder, if
+        enabled. The checksums of a file are stored in the
+        MICROSCOPY_SAMPLE_CHECKSUMS property of its sample; those of the
+        files of a folder are written to a sidecar manifest in the folder,
+        and the property stores the checksum of the manifest.
+
+        @param sample Sample of the file or folder
+        @param fullPath Full path to the file or folder in incoming
+        @param relativePath Path of the file or folder relative to incoming
+        @return list of tuples (relativePath, crc32, sha256, size), or None
+                if no checksums are computed
+        """
+
+        if self._checksums is None:
+            return None
+
+        checksums = self.getChecksums(fullPath, relativePath)
+        self._collectedChecksums.pop(fullPath, None)
+        if not GlobalSettings.ComputeContentChecksums:
+            return checksums
+
+        if os.path.isdir(fullPath):
+            sha256 = write_manifest(fullPath, checksums)
+            value = "sha256 " + sha256 + " " + MANIFEST_FILE_NAME + " (" + \
+                str(len(checksums)) + " files)"
+        else:
+            name, crc32, sha256, size = checksums[0]
+            value = "crc32 " + crc32 + "\nsha256 " + sha256
+        sample.setPropertyValue("MICROSCOPY_SAMPLE_CHECKSUMS", value)
+        return checksums
+
+
+    def stageForStorage(self, fullPath, relativePath):
+        """Stage a file or folder into the zero-copy staging folder (if
+        enabled) and return the path to move into the dataset.
+
+        @param fullPath Full path to the file or folder in incoming
+        @param relativePath Path of the file or folder relative to incoming
+        @return the path of the staged file or folder, or fullPath if
+                staging is disabled
+        """
+
+        if self._fileTransfer is None:
+            return fullPath
+
+        stagedPath = os.path.join(self._storageStagingFolder, relativePath)
+        start = self._timer.now()
+        self._fileTransfer.transfer(fullPath, stagedPath)
+        self._timer.record("stage_for_storage", start, relativePath)
+        return stagedPath
+
 
     def processMicroscopyCompositeFile(self, microscopyCompositeFileNode,
                                        openBISExperiment):
@@ -463,7 +1309,7 @@ class Processor:
                               "Processing " + compositeFileType)
 
         # Get the metadata for all series from the (processed) settings XML 
-        allSeriesMetadata = []
+        allSeriesMetadata = SeriesMetadataTable()
         for series in microscopyCompositeFileNode:
             allSeriesMetadata.append(series.attrib)
 
@@ -510,9 +1356,25 @@ class Processor:
         seriesIndices = microscopyCompositeFileNode.attrib.get("seriesIndices")
         seriesIndices = seriesIndices.split(",")
 
-        # Register all series in the file
-        image_data_set = None
-        for i in range(num_series):
+        # Index the folder once: the index of the file names is shared by the
+        # configurations of all series. If the folder was already indexed
+        # (e.g. in a previous attempt), the manifest is read instead of
+        # scanning the folder; otherwise the manifest is written into the
+        # folder to be stored with the dataset (if enabled).
+        start = self._timer.now()
+        fileIndex = LeicaTIFFSeriesFileIndex()
+        if not fileIndex.readManifest(fullFolder):
+            fileIndex.scan(fullFolder)
+            if GlobalSettings.WriteLeicaTIFFSeriesManifest:
+                fileIndex.writeManifest(fullFolder)
+        self._timer.record("file_index", start, relativeFolder)
+
+        # Start reading the files to checksum them (now that the folder
+        # contains its manifest)
+        if self._checksums is not None:
+            self._checksums.submit(fullFolder)
+
+        def createCompositeDatasetConfig(i):
 
             # Series number
             seriesNum = seriesIndices[i]
@@ -520,10 +1382,12 @@ class Processor:
             # Create a configuration object
             if compositeFileType == "Leica TIFF Series":
 
-                compositeDatasetConfig = LeicaTIFFSeriesCompositeDatasetConfig(allSeriesMetadata,
-                                                                               seriesIndices,
-                                                                               self._logger,
-                                                                               seriesNum)
+                return LeicaTIFFSeriesCompositeDatasetConfig(allSeriesMetadata,
+                                                             seriesIndices,
+                                                             self._logger,
+                                                             seriesNum,
+                                                             fileIndex,
+                                                             self._representationQueue is None)
             else:
                 
                 msg = "PROCESSOR::processMicroscopyCompositeFile(): " + \
@@ -531,10 +1395,41 @@ class Processor:
                 self._logger.error(msg)
                 raise Exception(msg)
 
+        # Render the thumbnails of all series concurrently, before the
+        # folder is moved into the dataset: this needs the configuration
+        # objects of all series up front. Otherwise, each configuration is
+        # created when its series is registered.
+        compositeDatasetConfigs = None
+        if self._renderPool is not None:
+            compositeDatasetConfigs = [createCompositeDatasetConfig(i)
+                                       for i in range(num_series)]
+            self.prerenderThumbnails(compositeDatasetConfigs, relativeFolder)
+
+        # Store the checksums of the files in the folder
+        self.storeChecksums(sample, fullFolder, relativeFolder)
+
+        # Stage the folder on the filesystem of the store
+        storedFolder = self.stageForStorage(fullFolder, relativeFolder)
+
+        # Register all series in the file
+        image_data_set = None
+        for i in range(num_series):
+
+            # Series number
+            seriesNum = seriesIndices[i]
+
+            # Get (or create) the configuration object
+            if compositeDatasetConfigs is not None:
+                compositeDatasetConfig = compositeDatasetConfigs[i]
+            else:
+                compositeDatasetConfig = createCompositeDatasetConfig(i)
+
             # Extract the metadata associated to this series and convert it to
             # XML to store it in the MICROSCOPY_IMG_CONTAINER_METADATA property
             # of the MICROSCOPY_IMG_CONTAINER_METADATA (series) dataset type
+            start = self._timer.now()
             seriesMetadataXML = self.dictToXML(allSeriesMetadata[i])
+            self._timer.record("metadata_to_xml", start, relativeFolder, i)
 
             # Register all series in the composite file (folder)
             if image_data_set is None:
@@ -545,8 +1440,11 @@ class Processor:
                                    str(fullFolder) + " and series " + str(seriesNum))
 
                 # Create a dataset
+                start = self._timer.now()
                 dataset = self._transaction.createNewImageDataSet(compositeDatasetConfig,
-                                                                  java.io.File(fullFolder))
+                                                                  java.io.File(storedFolder))
+                self._timer.record("createNewImageDataSet", start,
+                                   relativeFolder, i)
 
                 # Store the metadata in the MICROSCOPY_IMG_CONTAINER_METADATA property
                 # TODO: Get the store the metadata information
@@ -562,7 +1460,9 @@ class Processor:
                 image_data_set = dataset
 
                 # Move the file
-                self._transaction.moveFile(fullFolder, image_data_set)
+                start = self._timer.now()
+                self._transaction.moveFile(storedFolder, image_data_set)
+                self._timer.record("moveFile", start, relativeFolder)
 
             else:
 
@@ -573,8 +1473,11 @@ class Processor:
 
                 # Create an image dataset that points to an existing one
                 # (and points to its file)
+                start = self._timer.now()
                 dataset = self._transaction.createNewImageDataSetFromDataSet(compositeDatasetConfig,
                                                                              image_data_set)
+                self._timer.record("createNewImageDataSetFromDataSet", start,
+                                   relativeFolder, i)
 
                 # Store the metadata in the MICROSCOPY_IMG_CONTAINER_METADATA property
                 dataset.setPropertyValue("MICROSCOPY_IMG_CONTAINER_METADATA", seriesMetadataXML)
@@ -586,67 +1489,145 @@ class Processor:
             # Set the (common) sample for the series
             dataset.setSample(sample)
 
+            # Queue the generation of the image representations
+            if self._representationQueue is not None:
+                self._representationQueue.stage(self._incoming.getName(),
+                                                dataset.getDataSetCode(),
+                                                ImageRepresentationQueue.LEICA_TIFF_SERIES,
+                                                os.path.basename(fullFolder),
+                                                seriesNum, allSeriesMetadata,
+                                                seriesIndices)
+
+
+    def register(self, propertiesFile):
+        """Register the Experiments described in a properties file.
+
+        The properties file is parsed incrementally: each MicroscopyFile and
+        MicroscopyCompositeFile node is registered as soon as it (and all its
+        series) has been read, and is then discarded. Memory usage therefore
+        does not grow with the number of series in the file.
 
-    def register(self, tree):
-        """Register the Experiment using the parsed properties file.
+        @param propertiesFile Full path to the properties XML file
+        """
+
+        # Start extracting the series metadata from all files in parallel
+        self.prefetchSeriesMetadata(propertiesFile)
+
+        try:
+            self._registerExperiments(propertiesFile)
+        finally:
+            self.cancelPendingSeriesMetadata()
+
+        # Log that we are finished with the registration
+        self._logger.info("PROCESSOR::register(): " + 
+                          "Registration completed")
 
-        @param tree ElementTree parsed from the properties XML file
+    def _registerExperiments(self, propertiesFile):
+        """Register all Experiment nodes (in document order) while streaming
+        through the properties file.
+
+        @param propertiesFile Full path to the properties XML file
         """
 
-        # Get the root node (obitXML)
-        root = tree.getroot()
+        # Depth of the current node: 1 is the root node (obitXML), 2 an
+        # Experiment, 3 a MicroscopyFile or MicroscopyCompositeFile and 4
+        # a series
+        depth = 0
+        root = None
+        experimentNode = None
+        openBISExperiment = None
 
-        # Store the username
-        self._username = root.attrib.get("userName")
+        for event, node in self._iterparse(propertiesFile):
 
-        # Store the machine name
-        machinename = root.attrib.get("machineName")
-        if machinename is None:
-            machinename = ""
-        self._machinename = machinename        
+            if event == "start":
 
-        # Iterate over the children (Experiments)
-        for experimentNode in root:
+                depth += 1
 
-            # The tag of the immediate children of the root experimentNode
-            # must be Experiment
-            if experimentNode.tag != "Experiment":
-                msg = "PROCESSOR::register(): " + \
-                      "Expected Experiment node, found " + experimentNode.tag
-                self._logger.error(msg)
-                raise Exception(msg)
+                if depth == 1:
 
-            # Process an Experiment XML node and get/create an IExperimentUpdatable
-            openBISExperiment = self.processExperiment(experimentNode,
-                                                       "MICROSCOPY_EXPERIMENT")
+                    # Root node (obitXML)
+                    root = node
 
-            # Process children of the Experiment
-            for fileNode in experimentNode:
+                    # Store the username
+                    self._username = root.attrib.get("userName")
 
-                if fileNode.tag == "MicroscopyFile":
+                    # Store the machine name
+                    machinename = root.attrib.get("machineName")
+                    if machinename is None:
+                        machinename = ""
+                    self._machinename = machinename
 
-                    # Process the MicroscopyFile node
-                    self.processMicroscopyFile(fileNode, openBISExperiment)
+                elif depth == 2:
 
-                elif fileNode.tag == "MicroscopyCompositeFile":
+                    # The tag of the immediate children of the root node
+                    # must be Experiment
+                    if node.tag != "Experiment":
+                        msg = "PROCESSOR::register(): " + \
+                              "Expected Experiment node, found " + node.tag
+                        self._logger.error(msg)
+                        raise Exception(msg)
 
-                    # Process the MicroscopyCompositeFile node
-                    self.processMicroscopyCompositeFile(fileNode, openBISExperiment)
+                    # The attributes are complete at the start of the node:
+                    # process the Experiment XML node and get/create an
+                    # IExperimentUpdatable
+                    experimentNode = node
+                    openBISExperiment = self.processExperiment(experimentNode,
+                                                               "MICROSCOPY_EXPERIMENT")
 
-                    # Inform
-                    self._logger.info("Processed composite file")
+                elif depth == 3:
 
+                    if node.tag != "MicroscopyFile" and \
+                            node.tag != "MicroscopyCompositeFile":
+                        msg = "PROCESSOR::register(): " + \
+                        "Expected either MicroscopyFile or MicroscopyCompositeFile " + \
+                        "node; found instead " + node.tag + ")!"
+                        self._logger.error(msg)
+                        raise Exception(msg)
+
+                continue
+
+            # End of a node: at this point all its children are available
+            if depth == 3:
+
+                if node.tag == "MicroscopyFile":
+                    relativePath = node.attrib.get("relativeFileName")
                 else:
+                    relativePath = node.attrib.get("relativeFolder")
 
-                    msg = "PROCESSOR::register(): " + \
-                    "Expected either MicroscopyFile or MicroscopyCompositeFile " + \
-                    "node; found instead " + fileNode.tag + ")!"
-                    self._logger.error(msg)
-                    raise Exception(msg)
+                try:
 
-        # Log that we are finished with the registration
-        self._logger.info("PROCESSOR::register(): " + 
-                          "Registration completed")
+                    if node.tag == "MicroscopyFile":
+
+                        # Process the MicroscopyFile node
+                        self.processMicroscopyFile(node, openBISExperiment)
+
+                    else:
+
+                        # Process the MicroscopyCompositeFile node
+                        self.processMicroscopyCompositeFile(node, openBISExperiment)
+
+                        # Inform
+                        self._logger.info("Processed composite file")
+
+                except Exception, e:
+                    if self._journal is not None:
+                        self._journal.setOutcome(relativePath,
+                                                 RegistrationJournal.FAILED, e)
+                    raise
+
+                if self._journal is not None:
+                    self._journal.setOutcome(relativePath,
+                                             RegistrationJournal.REGISTERED)
+
+                # Discard the processed node and its series
+                experimentNode.remove(node)
+
+            elif depth == 2:
+
+                # Discard the processed Experiment node
+                root.remove(node)
+
+            depth -= 1
 
 
     def retrieveOrCreateTags(self, tagList):
@@ -667,6 +1648,14 @@ class Processor:
             if len(tag) == 0:
                 continue
 
+            # Reuse the tag (metaproject) if it was already retrieved or
+            # created in this transaction
+            metaproject = self._metaprojectCache.get((tag, self._username))
+            if metaproject is not None:
+                self._numAvoidedASCalls["getMetaproject"] += 1
+                openBISTags.append(metaproject)
+                continue
+
             # Retrieve the tag (metaproject)
             metaproject = self._transaction.getMetaproject(tag, self._username)
             if metaproject is None:
@@ -685,12 +1674,64 @@ class Processor:
                     self._logger.error(msg)
                     raise Exception(msg)
 
+            # Remember the metaproject for the rest of the transaction
+            self._metaprojectCache[(tag, self._username)] = metaproject
+
             # Add the created metaproject to the list
             openBISTags.append(metaproject)
 
         return openBISTags
 
 
+    def shardIncoming(self, userFolderName, propertiesFileList):
+        """Split the incoming folder into smaller incoming folders (shards)
+        if it exceeds the limits set in GlobalSettings. The shards are picked
+        up by the dropbox and registered in separate transactions.
+
+        @param userFolderName Name of the user subfolder of the incoming folder
+        @param propertiesFileList List of full paths to the properties files
+        @return True if the incoming folder was split, False otherwise
+        """
+
+        # The shards must be written to the incoming folder of the dropbox:
+        # during the transaction, the folder containing the incoming folder
+        # is a staging folder of openBIS, where nobody would pick them up
+        # (and openBIS would delete the original incoming folder)
+        targetFolder = GlobalSettings.ShardTargetFolder
+        if targetFolder is None:
+            self._logger.error("PROCESSOR::shardIncoming(): " + 
+                               "GlobalSettings.ShardTargetFolder is not " + 
+                               "set: registering the incoming folder " + 
+                               "without sharding.")
+            return False
+
+        sharder = IncomingFolderSharder(self._incoming.getAbsolutePath(),
+                                        userFolderName, propertiesFileList,
+                                        targetFolder,
+                                        GlobalSettings.ShardMaxFiles,
+                                        GlobalSettings.ShardMaxSizeInBytes,
+                                        self._logger)
+
+        # A single shard is just the incoming folder itself
+        numShards = sharder.countShards()
+        if numShards < 2:
+            return False
+
+        self._logger.info("PROCESSOR::shardIncoming(): " + 
+                          "Splitting incoming folder into " + 
+                          str(numShards) + " shards.")
+
+        shardNames = sharder.shard()
+
+        self._logger.info("PROCESSOR::shardIncoming(): " + 
+                          "Created shards: " + ", ".join(shardNames))
+
+        # Nothing will be registered from this incoming folder
+        if self._journal is not None:
+            self._journal.discard()
+
+        return True
+
     def run(self):
         """Run the registration."""
 
@@ -714,6 +1755,13 @@ class Processor:
             self._logger.error(msg)
             raise Exception(msg)
 
+        # Report on a previous failed attempt to register this folder
+        if self._journal is not None:
+            for relativePath, message in self._journal.getFailures():
+                self._logger.info("PROCESSOR::run(): " + 
+                                  "Retrying " + relativePath + " that failed " + 
+                                  "in a previous attempt: " + message)
+
         # Set the user folder
         userFolder = os.path.join(self._incoming.getAbsolutePath(),
                                   subFolders[0])
@@ -742,14 +1790,100 @@ class Processor:
         finally:
             f.close()
 
+        # Split a very large incoming folder into several smaller ones that
+        # are registered in separate transactions
+        if GlobalSettings.UseSharding and self.shardIncoming(subFolders[0],
+                                                             propertiesFileList):
+            return
+
         # Process (and ultimately register) all experiments
-        for propertiesFile in propertiesFileList:
-            # Log
-            self._logger.info("PROCESSOR::run(): " + 
-                              "Processing: " + propertiesFile)
+        try:
+            for propertiesFile in propertiesFileList:
+                # Log
+                self._logger.info("PROCESSOR::run(): " + 
+                                  "Processing: " + propertiesFile)
 
-            # Read the properties file into an ElementTree
-            tree = ET.parse(propertiesFile)
+                # Now register the experiment (streaming through the file)
+                self.register(propertiesFile)
+        finally:
+            # Write the stage timings (also for failed registrations)
+            if self._timingsFile is not None:
+                self._timer.write(self._timingsFile)
+
+            # Store the series metadata of the files that were not
+            # registered (e.g. because the registration failed), so that the
+            # next attempt does not parse them again
+            try:
+                self.persistSeriesMetadata()
+            except Exception, e:
+                self._logger.error("PROCESSOR::run(): " + 
+                                   "Could not store the series metadata: " + 
+                                   str(e))
+
+            # Prune the series metadata cache (also when registrations
+            # keep failing, since the entries are added while parsing)
+            if self._seriesMetadataCache is not None:
+                self._seriesMetadataCache.prune()
+
+            # Stop the bio-formats worker processes
+            if self._workerPool is not None:
+                self._workerPool.shutdown()
+                started, failures = self._workerPool.getStatistics()
+                self._logger.info("PROCESSOR::run(): " + 
+                                  "Metadata worker processes: " + 
+                                  str(started) + " started, " + 
+                                  str(failures) + " timed out or crashed.")
+
+            # Stop the thumbnail rendering threads
+            if self._renderPool is not None:
+                self._renderPool.shutdown()
+                rendered, failed, renderSeconds, wallSeconds = \
+                    self._renderPool.getStatistics()
+                self._logger.info("PROCESSOR::run(): " + 
+                                  "Thumbnails: " + str(rendered) + 
+                                  " prerendered (" + str(failed) + 
+                                  " failed) in " + ("%.2f" % wallSeconds) + 
+                                  " s (" + ("%.2f" % renderSeconds) + 
+                                  " s of rendering).")
+
+            # Stop the checksum threads
+            if self._checksums is not None:
+                self._checksums.shutdown()
+                numFiles, numBytes, seconds = self._checksums.getStatistics()
+                self._logger.info("PROCESSOR::run(): " + 
+                                  "Checksummed " + str(numFiles) + 
+                                  " files (" + str(numBytes / (1024 * 1024)) + 
+                                  " MiB) in " + ("%.2f" % seconds) + " s.")
+
+            # Report on the transfers to the zero-copy staging folder
+            if self._fileTransfer is not None:
+                statistics = self._fileTransfer.getStatistics()
+                for strategy in sorted(statistics.keys()):
+                    count, numBytes, seconds = statistics[strategy]
+                    self._logger.info("PROCESSOR::run(): " + 
+                                      "Staged for storage with " + strategy + 
+                                      ": " + str(count) + " transfers, " + 
+                                      str(numBytes / (1024 * 1024)) + 
+                                      " MiB in " + ("%.2f" % seconds) + " s.")
+
+        # Report on the entity caches
+        self._logger.info("PROCESSOR::run(): " + 
+                          "AS calls avoided by the entity caches: " + 
+                          str(self._numAvoidedASCalls["getExperimentForUpdate"]) + 
+                          " getExperimentForUpdate, " + 
+                          str(self._numAvoidedASCalls["getMetaproject"]) + 
+                          " getMetaproject.")
+
+        # Report on the queue of deferred image representations
+        if self._representationQueue is not None:
+            self._logger.info("PROCESSOR::run(): " + 
+                              "Image representations deferred; queue depth: " + 
+                              str(self._representationQueue.getDepth()) + 
+                              " data sets (before this registration).")
 
-            # Now register the experiment
-            self.register(tree)
+        # Report on the series metadata cache
+        if self._seriesMetadataCache is not None:
+            hits, misses = self._seriesMetadataCache.getStatistics()
+            self._logger.info("PROCESSOR::run(): " + 
+                              "Series metadata cache: " + str(hits) + 
+                              " hits, " + str(misses) + " misses.")
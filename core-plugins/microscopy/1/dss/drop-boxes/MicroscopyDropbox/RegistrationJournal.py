@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import xml.etree.ElementTree as ET
+from SeriesMetadataCache import read_series_metadata_entry
+from SeriesMetadataCache import write_series_metadata_entry
+
+
+class RegistrationJournal:
+    """Journal of the registration of one incoming folder. It records the
+    series metadata extracted from each microscopy file and the outcome of
+    the registration of each file, so that a failed registration can be
+    retried without extracting the metadata of all files again.
+
+    The journal is a folder containing one XML file per microscopy file
+    with its series metadata (in the same MicroscopyFileSeries form used
+    in the properties files), and an append-only outcomes.txt file with
+    one tab-separated line (outcome, relative file name, message) per
+    event. For the outcomes, the last line for a file wins."""
+
+    # Outcome of a file that was registered in the current attempt
+    REGISTERED = "registered"
+
+    # Outcome of a file whose registration failed
+    FAILED = "failed"
+
+    # Folder containing the journal
+    _journalFolder = ""
+
+    # Logger
+    _logger = None
+
+    def __init__(self, journalFolder, logger):
+        """Constructor.
+
+        @param journalFolder Folder containing the journal (created if it
+                             does not exist)
+        @param logger logger object
+        """
+
+        self._journalFolder = journalFolder
+        self._logger = logger
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self._journalFolder):
+            os.makedirs(self._journalFolder)
+
+        # Load the outcomes of previous attempts
+        self._outcomes = {}
+        outcomesFile = self._getOutcomesFileName()
+        if os.path.exists(outcomesFile):
+            f = open(outcomesFile, "r")
+            try:
+                for line in f:
+                    parts = line.decode("UTF-8").rstrip("\r\n").split("\t", 2)
+                    if len(parts) == 3:
+                        self._outcomes[parts[1]] = (parts[0], parts[2])
+            finally:
+                f.close()
+
+    def getSeriesMetadata(self, relativeFileName, size):
+        """Return the series metadata recorded for a file, or None.
+
+        @param relativeFileName Path of the file relative to the incoming folder
+        @param size Current size of the file in bytes
+        """
+
+        entryFile = self._getEntryFileName(relativeFileName)
+        if not os.path.exists(entryFile):
+            return None
+
+        try:
+            root = ET.parse(entryFile).getroot()
+        except Exception, e:
+            self._logger.error("REGISTRATIONJOURNAL::getSeriesMetadata(): " +
+                               "Discarding invalid entry " + entryFile +
+                               ": " + str(e))
+            return None
+
+        # Make sure the file was not replaced in the meanwhile
+        if root.attrib.get("relativeFileName") != relativeFileName or \
+                root.attrib.get("size") != str(size):
+            return None
+
+        return read_series_metadata_entry(root)
+
+    def putSeriesMetadata(self, relativeFileName, size, allSeriesMetadata):
+        """Record the series metadata extracted from a file.
+
+        @param relativeFileName Path of the file relative to the incoming folder
+        @param size Size of the file in bytes
+        @param allSeriesMetadata List of metadata attributes per series
+        """
+
+        # A crash while writing never leaves a truncated entry behind (it
+        # would be trusted by the next attempt, since the size matches)
+        write_series_metadata_entry(
+            self._getEntryFileName(relativeFileName),
+            "RegistrationJournalEntry",
+            {"relativeFileName": relativeFileName, "size": str(size)},
+            allSeriesMetadata)
+
+    def getOutcome(self, relativeFileName):
+        """Return the last recorded (outcome, message) for a file, or None."""
+
+        return self._outcomes.get(relativeFileName)
+
+    def getFailures(self):
+        """Return the list of (relativeFileName, message) of all files whose
+        last recorded outcome is a failure."""
+
+        failures = []
+        for relativeFileName, (outcome, message) in self._outcomes.iteritems():
+            if outcome == self.FAILED:
+                failures.append((relativeFileName, message))
+        failures.sort()
+        return failures
+
+    def setOutcome(self, relativeFileName, outcome, message=""):
+        """Record the outcome of the registration of a file.
+
+        @param relativeFileName Path of the file relative to the incoming folder
+        @param outcome One of REGISTERED, FAILED
+        @param message Optional message (e.g. the error)
+        """
+
+        # Keep each event on one line
+        if not isinstance(message, basestring):
+            message = str(message)
+        message = " ".join(message.split())
+
+        self._lock.acquire()
+        try:
+            self._outcomes[relativeFileName] = (outcome, message)
+            f = open(self._getOutcomesFileName(), "a")
+            try:
+                line = outcome + "\t" + relativeFileName + "\t" + message + "\n"
+                f.write(line.encode("UTF-8"))
+            finally:
+                f.close()
+        finally:
+            self._lock.release()
+
+    def discard(self):
+        """Delete the journal (e.g. once the registration was committed)."""
+
+        if os.path.exists(self._journalFolder):
+            shutil.rmtree(self._journalFolder)
+
+    def _getEntryFileName(self, relativeFileName):
+        """Return the full path of the file storing the entry for a file."""
+
+        name = hashlib.sha1(relativeFileName.encode("UTF-8")).hexdigest() + ".xml"
+        return os.path.join(self._journalFolder, name)
+
+    def _getOutcomesFileName(self):
+        """Return the full path of the outcomes file."""
+
+        return os.path.join(self._journalFolder, "outcomes.txt")
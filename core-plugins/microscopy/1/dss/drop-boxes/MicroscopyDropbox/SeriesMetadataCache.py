@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import hashlib
+import os
+import threading
+import xml.etree.ElementTree as ET
+from SeriesMetadataTable import SeriesMetadataTable
+
+
+def content_fingerprint(filePath, blockSize=1048576):
+    """Compute a path-independent fingerprint of the content of a file.
+
+    The fingerprint is the SHA-1 digest of the file size and of three
+    blocks of blockSize bytes sampled at the beginning, in the middle and
+    at the end of the file. This is enough to tell apart different vendor
+    files (their headers and trailers differ) without reading multi-GB
+    files completely.
+
+    @param filePath Full path to the file
+    @param blockSize Size in bytes of each of the sampled blocks
+    @return tuple (fingerprint, size in bytes)
+    """
+
+    size = os.path.getsize(filePath)
+
+    sha1 = hashlib.sha1()
+    sha1.update(str(size))
+
+    f = open(filePath, "rb")
+    try:
+        if size <= 3 * blockSize:
+            sha1.update(f.read())
+        else:
+            for offset in [0, (size - blockSize) / 2, size - blockSize]:
+                f.seek(offset)
+                sha1.update(f.read(blockSize))
+    finally:
+        f.close()
+
+    return sha1.hexdigest(), size
+
+
+def write_series_metadata_entry(entryFile, tag, attributes,
+                                allSeriesMetadata):
+    """Write the series metadata of a file to an XML entry file: a root node
+    with the given tag and attributes, and one MicroscopyFileSeries child
+    (as in the properties files) per series.
+
+    The entry is written to a temporary file first and then renamed, so
+    that readers (including a later registration attempt after a crash)
+    never see a partially written entry.
+
+    @param entryFile Full path to the entry file
+    @param tag Tag of the root node
+    @param attributes Dictionary of attributes of the root node
+    @param allSeriesMetadata List of metadata attributes per series
+    """
+
+    root = ET.Element(tag)
+    for k, v in attributes.iteritems():
+        root.set(k, v)
+    for seriesMetadata in allSeriesMetadata:
+        series = ET.SubElement(root, "MicroscopyFileSeries")
+        for k, v in seriesMetadata.iteritems():
+            series.set(k, v)
+
+    tmpFile = entryFile + "." + str(threading.currentThread().getName()) + ".tmp"
+    f = open(tmpFile, "wb")
+    try:
+        f.write(ET.tostring(root, encoding="UTF-8"))
+    finally:
+        f.close()
+    if os.path.exists(entryFile):
+        os.remove(entryFile)
+    os.rename(tmpFile, entryFile)
+
+
+def read_series_metadata_entry(root):
+    """Return the series metadata stored in the root node of an entry
+    written by write_series_metadata_entry()."""
+
+    return SeriesMetadataTable([series.attrib for series in root])
+
+
+class SeriesMetadataCache:
+    """Persistent cache of the series metadata extracted by the
+    BioFormatsProcessor. Entries are keyed by (content fingerprint, file
+    size, bio-formats version) and stored as one XML file each (with the
+    same MicroscopyFileSeries nodes used in the properties files) in the
+    cache folder. Least recently used entries are evicted by prune().
+
+    The fingerprint only samples the content of large files, so two
+    different files of the same size with identical sampled blocks (e.g.
+    acquisitions with fixed headers) share a key. A hit is therefore only
+    accepted if the name and modification time of the file also match those
+    recorded with the entry (the file was uploaded again), so that such
+    files never get each other's metadata."""
+
+    # Folder where the entries are stored
+    _cacheFolder = ""
+
+    # Maximum number of entries to keep
+    _maxEntries = 0
+
+    # Maximum total size in bytes of the entries to keep
+    _maxSizeInBytes = 0
+
+    # Logger
+    _logger = None
+
+    def __init__(self, cacheFolder, bioformatsVersion, logger,
+                 maxEntries=10000, maxSizeInBytes=536870912):
+        """Constructor.
+
+        @param cacheFolder Folder where the entries are stored (created if
+                           it does not exist)
+        @param bioformatsVersion Version of the bio-formats library that
+                           extracts the metadata (part of the key)
+        @param logger logger object
+        @param maxEntries Maximum number of entries to keep
+        @param maxSizeInBytes Maximum total size in bytes of the entries
+        """
+
+        self._cacheFolder = cacheFolder
+        self._bioformatsVersion = bioformatsVersion
+        self._logger = logger
+        self._maxEntries = maxEntries
+        self._maxSizeInBytes = maxSizeInBytes
+
+        # Counters (the cache is used from the metadata extraction workers)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        if not os.path.exists(self._cacheFolder):
+            os.makedirs(self._cacheFolder)
+
+    def getKey(self, fileName):
+        """Return the cache key for a microscopy file.
+
+        @param fileName Full path to the microscopy file
+        @return tuple (fingerprint, size, bioformatsVersion)
+        """
+
+        fingerprint, size = content_fingerprint(fileName)
+        return fingerprint, str(size), self._bioformatsVersion
+
+    def get(self, key, fileName):
+        """Return the list of series metadata stored for the key, or None.
+
+        @param key Key as returned by getKey()
+        @param fileName Full path to the microscopy file (its name and
+                        modification time confirm the hit)
+        """
+
+        entryFile = self._getEntryFileName(key)
+
+        allSeriesMetadata = None
+        if os.path.exists(entryFile):
+            try:
+                root = ET.parse(entryFile).getroot()
+                if self._getEntryKey(root) == key and \
+                        self._getEntryConfirmation(root) == \
+                        self._getConfirmation(fileName):
+                    allSeriesMetadata = read_series_metadata_entry(root)
+            except Exception, e:
+                self._logger.error("SERIESMETADATACACHE::get(): " +
+                                   "Discarding invalid entry " + entryFile +
+                                   ": " + str(e))
+
+        self._lock.acquire()
+        try:
+            if allSeriesMetadata is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        finally:
+            self._lock.release()
+
+        # Mark the entry as recently used
+        if allSeriesMetadata is not None:
+            try:
+                os.utime(entryFile, None)
+            except OSError:
+                pass
+
+        return allSeriesMetadata
+
+    def put(self, key, allSeriesMetadata, fileName):
+        """Store the list of series metadata for the key.
+
+        @param key Key as returned by getKey()
+        @param allSeriesMetadata List of metadata attributes per series as
+                                 returned by BioFormatsProcessor.getMetadata()
+        @param fileName Full path to the microscopy file
+        """
+
+        name, mtime = self._getConfirmation(fileName)
+        attributes = {"fingerprint": key[0], "size": key[1],
+                      "bioformatsVersion": key[2], "fileName": name,
+                      "mtime": mtime}
+
+        # Concurrent readers never see a partially written entry
+        entryFile = self._getEntryFileName(key)
+        try:
+            write_series_metadata_entry(entryFile, "SeriesMetadataCacheEntry",
+                                        attributes, allSeriesMetadata)
+        except (IOError, OSError), e:
+            self._logger.error("SERIESMETADATACACHE::put(): " +
+                               "Could not store entry " + entryFile +
+                               ": " + str(e))
+
+    def prune(self):
+        """Evict the least recently used entries until both the number of
+        entries and their total size are within the configured limits."""
+
+        entries = []
+        totalSize = 0
+        for name in os.listdir(self._cacheFolder):
+            entryFile = os.path.join(self._cacheFolder, name)
+            try:
+                stat = os.stat(entryFile)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entryFile))
+            totalSize += stat.st_size
+
+        # Oldest first
+        entries.sort()
+
+        numEvicted = 0
+        while len(entries) > 0 and (len(entries) > self._maxEntries or
+                                    totalSize > self._maxSizeInBytes):
+            mtime, size, entryFile = entries.pop(0)
+            try:
+                os.remove(entryFile)
+            except OSError:
+                continue
+            totalSize -= size
+            numEvicted += 1
+
+        if numEvicted > 0:
+            self._logger.info("SERIESMETADATACACHE::prune(): " +
+                              "Evicted " + str(numEvicted) + " entries.")
+
+    def getStatistics(self):
+        """Return the number of cache hits and misses as a tuple."""
+
+        return self._hits, self._misses
+
+    def _getEntryFileName(self, key):
+        """Return the full path of the file storing the entry for a key."""
+
+        name = hashlib.sha1("|".join(key)).hexdigest() + ".xml"
+        return os.path.join(self._cacheFolder, name)
+
+    def _getEntryKey(self, root):
+        """Return the key stored in the root node of an entry."""
+
+        return root.attrib.get("fingerprint"), root.attrib.get("size"), \
+            root.attrib.get("bioformatsVersion")
+
+    def _getConfirmation(self, fileName):
+        """Return the name and modification time (in whole seconds) of a
+        file, which must match those of the entry for a hit."""
+
+        return os.path.basename(fileName), \
+            str(int(os.path.getmtime(fileName)))
+
+    def _getEntryConfirmation(self, root):
+        """Return the file name and modification time stored in the root
+        node of an entry."""
+
+        return root.attrib.get("fileName"), root.attrib.get("mtime")
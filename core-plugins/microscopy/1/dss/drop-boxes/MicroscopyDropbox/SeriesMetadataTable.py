@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+
+class SeriesMetadataRow:
+    """Read-only, dict-like view of the metadata of one series in a
+    SeriesMetadataTable."""
+
+    def __init__(self, table, values):
+        """Constructor.
+
+        @param table SeriesMetadataTable the row belongs to
+        @param values List of values, one per column of the table (None for
+                      missing attributes)
+        """
+
+        self._table = table
+        self._values = values
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        """Return the value of an attribute, or default if it is missing."""
+
+        column = self._table._columns.get(key)
+        if column is None or column >= len(self._values):
+            return default
+        value = self._values[column]
+        if value is None:
+            return default
+        return value
+
+    def iteritems(self):
+        """Iterate over the (key, value) pairs of the series."""
+
+        keys = self._table._keys
+        for column in range(len(self._values)):
+            value = self._values[column]
+            if value is not None:
+                yield keys[column], value
+
+    def items(self):
+        return list(self.iteritems())
+
+    def keys(self):
+        return [key for key, value in self.iteritems()]
+
+    def values(self):
+        return [value for key, value in self.iteritems()]
+
+    def copy(self):
+        """Return the metadata of the series as a (new) dictionary."""
+
+        return dict(self.iteritems())
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
+class SeriesMetadataTable:
+    """Compact, columnar container for the metadata of all series in a file.
+
+    All series of a file share the same attribute names (sizeX, channelName0,
+    channelColor0, ...), and many values repeat (data type, voxel sizes,
+    colors). Instead of one dictionary per series, the table keeps one shared
+    table of keys and one list of values per series, with all values
+    interned. The table behaves like a list of read-only dictionaries, so it
+    can be used wherever a list of series attribute dictionaries is expected.
+    """
+
+    def __init__(self, allSeriesMetadata=None):
+        """Constructor.
+
+        @param allSeriesMetadata Optional list of dictionaries (or other
+                                 mappings with iteritems()) of series
+                                 metadata attributes to append.
+        """
+
+        # Shared key table: list of keys and map from key to column
+        self._keys = []
+        self._columns = {}
+
+        # Pool of interned values
+        self._pool = {}
+
+        # List of value lists, one per series
+        self._rows = []
+
+        if allSeriesMetadata is not None:
+            for seriesMetadata in allSeriesMetadata:
+                self.append(seriesMetadata)
+
+    def append(self, seriesMetadata):
+        """Append the metadata of a series.
+
+        @param seriesMetadata Dictionary (or other mapping with iteritems())
+                              of metadata attributes.
+        """
+
+        self.appendItems(seriesMetadata.iteritems())
+
+    def appendItems(self, items):
+        """Append the metadata of a series from (key, value) pairs.
+
+        @param items Iterable of (key, value) pairs.
+        """
+
+        values = [None] * len(self._keys)
+        for key, value in items:
+            column = self._columns.get(key)
+            if column is None:
+                column = len(self._keys)
+                self._keys.append(key)
+                self._columns[key] = column
+            if column >= len(values):
+                values.extend([None] * (column + 1 - len(values)))
+            values[column] = self._pool.setdefault(value, value)
+        self._rows.append(values)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        return SeriesMetadataRow(self, self._rows[i])
+
+    def __iter__(self):
+        for values in self._rows:
+            yield SeriesMetadataRow(self, values)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import threading
+import time
+
+
+def to_json(d):
+    """Serialize a flat dictionary (with string, numeric, boolean or None
+    values) to a JSON object string. The json module is not available in
+    Jython 2.5."""
+
+    items = []
+    keys = d.keys()
+    keys.sort()
+    for k in keys:
+        items.append(_json_value(k) + ": " + _json_value(d[k]))
+    return "{" + ", ".join(items) + "}"
+
+
+def _json_value(v):
+    """Serialize a single value to JSON."""
+
+    if v is None:
+        return "null"
+    if v is True:
+        return "true"
+    if v is False:
+        return "false"
+    if isinstance(v, float):
+        return "%.6f" % v
+    if isinstance(v, (int, long)):
+        return str(v)
+    if not isinstance(v, basestring):
+        v = str(v)
+    out = []
+    for c in v:
+        if c == '"':
+            out.append('\\"')
+        elif c == '\\':
+            out.append('\\\\')
+        elif c == '\n':
+            out.append('\\n')
+        elif c == '\r':
+            out.append('\\r')
+        elif c == '\t':
+            out.append('\\t')
+        elif ord(c) < 32:
+            out.append('\\u%04x' % ord(c))
+        else:
+            out.append(c)
+    return '"' + "".join(out) + '"'
+
+
+def _throughput(numBytes, seconds):
+    """Return the throughput in MB/s."""
+
+    return numBytes / max(seconds, 1e-9) / 1e6
+
+
+class StageTimer:
+    """Collects the time spent in the stages of the registration of one
+    transaction (per file and per series), and writes them as JSON lines
+    followed by one summary line per stage."""
+
+    # Identifier of the transaction (name of the incoming folder)
+    _transactionId = ""
+
+    # Logger
+    _logger = None
+
+    def __init__(self, transactionId, logger):
+        """Constructor.
+
+        @param transactionId Identifier of the transaction
+        @param logger logger object
+        """
+
+        self._transactionId = transactionId
+        self._logger = logger
+
+        # Stages are also timed in the metadata extraction workers
+        self._lock = threading.Lock()
+        self._records = []
+
+    def now(self):
+        """Return the current time, to be passed to record() later."""
+
+        return time.time()
+
+    def record(self, stage, startTime, fileName="", series=-1, numBytes=-1):
+        """Record the time elapsed since startTime for a stage.
+
+        @param stage Name of the stage
+        @param startTime Time returned by now() when the stage started
+        @param fileName File (relative to the incoming folder) being processed
+        @param series Index of the series being processed, or -1
+        @param numBytes Number of bytes processed by the stage, or -1
+        """
+
+        self.recordDuration(stage, time.time() - startTime, fileName, series,
+                            numBytes)
+
+    def recordDuration(self, stage, duration, fileName="", series=-1,
+                       numBytes=-1):
+        """Record the duration in seconds of a stage.
+
+        @param stage Name of the stage
+        @param duration Duration in seconds
+        @param fileName File (relative to the incoming folder) being processed
+        @param series Index of the series being processed, or -1
+        @param numBytes Number of bytes processed by the stage, or -1 (the
+                        throughput is reported for stages with bytes)
+        """
+
+        self._lock.acquire()
+        try:
+            self._records.append((stage, duration, fileName, series,
+                                  numBytes))
+        finally:
+            self._lock.release()
+
+    def getSummary(self):
+        """Return a dictionary mapping each stage to a tuple (count, total
+        seconds, maximum seconds, total bytes); total bytes is -1 for stages
+        recorded without bytes."""
+
+        summary = {}
+        self._lock.acquire()
+        try:
+            for stage, duration, fileName, series, numBytes in self._records:
+                count, total, maximum, totalBytes = summary.get(
+                    stage, (0, 0.0, 0.0, -1))
+                if numBytes >= 0:
+                    totalBytes = max(totalBytes, 0) + numBytes
+                summary[stage] = (count + 1, total + duration,
+                                  max(maximum, duration), totalBytes)
+        finally:
+            self._lock.release()
+        return summary
+
+    def write(self, timingsFile):
+        """Append all records and the per-stage summary of the transaction
+        to a JSON lines file, and log the summary.
+
+        @param timingsFile Full path to the JSON lines file
+        """
+
+        summary = self.getSummary()
+        stages = summary.keys()
+        stages.sort()
+
+        lines = []
+        self._lock.acquire()
+        try:
+            for stage, duration, fileName, series, numBytes in self._records:
+                record = {"type": "stage",
+                          "transaction": self._transactionId,
+                          "stage": stage,
+                          "seconds": duration,
+                          "file": fileName}
+                if series >= 0:
+                    record["series"] = series
+                if numBytes >= 0:
+                    record["bytes"] = numBytes
+                    record["mbPerSecond"] = _throughput(numBytes, duration)
+                lines.append(to_json(record))
+        finally:
+            self._lock.release()
+
+        for stage in stages:
+            count, total, maximum, totalBytes = summary[stage]
+            record = {"type": "summary",
+                      "transaction": self._transactionId,
+                      "stage": stage,
+                      "count": count,
+                      "totalSeconds": total,
+                      "maxSeconds": maximum}
+            msg = "STAGETIMER::write(): " + stage + ": " + str(count) + \
+                  " x, total " + ("%.3f" % total) + " s, max " + \
+                  ("%.3f" % maximum) + " s"
+            if totalBytes >= 0:
+                record["totalBytes"] = totalBytes
+                record["mbPerSecond"] = _throughput(totalBytes, total)
+                msg += ", " + ("%.1f" % record["mbPerSecond"]) + " MB/s"
+            lines.append(to_json(record))
+            self._logger.info(msg + ".")
+
+        try:
+            f = open(timingsFile, "a")
+            try:
+                for line in lines:
+                    f.write(line.encode("UTF-8") + "\n")
+            finally:
+                f.close()
+        except IOError, e:
+            self._logger.error("STAGETIMER::write(): " +
+                               "Could not write timings to " + timingsFile +
+                               ": " + str(e))
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+'''
+Created on Oct 18, 2026
+
+@author: agent
+'''
+
+import os
+from ch.systemsx.cisd.openbis.dss.etl.dto.api.impl import MaximumIntensityProjectionGenerationAlgorithm
+from java.lang import Throwable
+from java.util import ArrayList
+from MaximumIntensityProjector import MaximumIntensityProjector
+
+
+class StreamingMaximumIntensityProjectionGenerationAlgorithm(MaximumIntensityProjectionGenerationAlgorithm):
+    '''
+    MaximumIntensityProjectionGenerationAlgorithm that creates the
+    representative thumbnail with the MaximumIntensityProjector, streaming
+    the planes of each channel into a running maximum (memory bounded by one
+    plane per channel) instead of going through the generic openBIS code.
+
+    The planes are read from a plane source created at generation time by
+    planeSourceFactory(information, resolvePath). If no factory is set, or
+    if the streaming projection fails, the parent implementation is used.
+
+    The thumbnail can also be rendered in advance by prerender() (e.g. by a
+    ThumbnailRenderPool, concurrently for all series of a file, while the
+    files are still in the incoming folder): generateImages() then returns
+    the prerendered thumbnail.
+    '''
+
+    def __init__(self, datasetTypeCode, width, height, filename,
+                 planeSourceFactory=None, colors=None, logger=None,
+                 numThreads=1):
+        """
+        Constructor
+
+        @param planeSourceFactory Function (information, resolvePath) that
+                                  returns the plane source (see
+                                  MaximumIntensityProjector.project()), or
+                                  None to use the parent implementation
+        @param colors Map from channel index to (R, G, B) tuple
+        @param logger Logger object
+        @param numThreads Number of threads to project the channels
+        """
+
+        # Call the parent base constructor
+        MaximumIntensityProjectionGenerationAlgorithm.__init__(self,
+            datasetTypeCode, width, height, filename)
+
+        self._width = width
+        self._height = height
+        self._planeSourceFactory = planeSourceFactory
+        self._colors = colors
+        if self._colors is None:
+            self._colors = {}
+        self._logger = logger
+        self._numThreads = numThreads
+        self._prerenderedImage = None
+
+
+    def generateImages(self, information, thumbnailDatasets, imageProvider):
+        """
+        Overrides the parent generateImages method to stream the planes
+        through the MaximumIntensityProjector.
+        """
+
+        if self._prerenderedImage is not None:
+            images = ArrayList()
+            images.add(self._prerenderedImage)
+            return images
+
+        if self._planeSourceFactory is not None:
+            try:
+                planeSource = self._planeSourceFactory(information,
+                                                       self.resolvePath)
+                images = ArrayList()
+                images.add(self._createThumbnail(planeSource))
+                return images
+
+            except (Exception, Throwable), e:
+                if self._logger is not None:
+                    self._logger.warning("STREAMINGMAXIMUMINTENSITYPROJECTION" +
+                                         "GENERATIONALGORITHM::generateImages(): " +
+                                         "streaming projection failed (" +
+                                         str(e) + "); using the default one.")
+
+        return MaximumIntensityProjectionGenerationAlgorithm.generateImages(
+            self, information, thumbnailDatasets, imageProvider)
+
+
+    def canPrerender(self):
+        """
+        Return True if the thumbnail can be rendered by prerender().
+        """
+
+        return self._planeSourceFactory is not None
+
+
+    def prerender(self):
+        """
+        Render the thumbnail from the files at their current (incoming)
+        location, so that generateImages() returns it.
+        """
+
+        planeSource = self._planeSourceFactory(None,
+                                               lambda path, information: path)
+        self._prerenderedImage = self._createThumbnail(planeSource)
+
+
+    def _createThumbnail(self, planeSource):
+        """
+        Project the planes of the plane source into the thumbnail.
+        """
+
+        projector = MaximumIntensityProjector(self._logger, self._numThreads)
+        return projector.createThumbnail(planeSource, self._colors,
+                                         self._width, self._height,
+                                         self.selectPlanes)
+
+
+    def selectPlanes(self, planes):
+        """
+        Return the subset of the plane keys of a channel that is projected.
+        The default implementation projects all planes.
+        """
+
+        return planes
+
+
+    def resolvePath(self, path, information):
+        """
+        Return the current location of a file or folder that was registered
+        from path: at generation time it may have been moved into the
+        incoming directory of the dataset.
+        """
+
+        if os.path.exists(path):
+            return path
+
+        incomingDirectory = information.getIncomingDirectory()
+        if incomingDirectory is not None:
+            incomingDirectory = incomingDirectory.getAbsolutePath()
+            if os.path.basename(incomingDirectory) == os.path.basename(path):
+                return incomingDirectory
+            candidate = os.path.join(incomingDirectory, os.path.basename(path))
+            if os.path.exists(candidate):
+                return candidate
+
+        raise Exception("Could not find " + path)
@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import jarray
+import os
+import struct
+import xml.etree.ElementTree as ET
+from java.io import RandomAccessFile
+from java.nio.channels.FileChannel import MapMode
+from SeriesMetadataTable import SeriesMetadataTable
+
+
+# TIFF tags used by the sniffer
+_NEW_SUBFILE_TYPE = 254
+_IMAGE_WIDTH = 256
+_IMAGE_LENGTH = 257
+_BITS_PER_SAMPLE = 258
+_IMAGE_DESCRIPTION = 270
+_SAMPLES_PER_PIXEL = 277
+_X_RESOLUTION = 282
+_Y_RESOLUTION = 283
+_RESOLUTION_UNIT = 296
+_SAMPLE_FORMAT = 339
+
+# Tags that are decoded (all others are only checked for presence)
+_DECODED_TAGS = [_NEW_SUBFILE_TYPE, _IMAGE_WIDTH, _IMAGE_LENGTH,
+                 _BITS_PER_SAMPLE, _IMAGE_DESCRIPTION, _SAMPLES_PER_PIXEL,
+                 _X_RESOLUTION, _Y_RESOLUTION, _RESOLUTION_UNIT,
+                 _SAMPLE_FORMAT]
+
+# Tags at or above this value are private (vendor) tags: files containing
+# them (LSM, STK, FluoView, ...) are left to bio-formats
+_FIRST_PRIVATE_TAG = 32768
+
+# TIFF field types: (size in bytes, struct format)
+_FIELD_TYPES = {1: (1, "B"), 2: (1, "s"), 3: (2, "H"), 4: (4, "I"),
+                5: (8, "II"), 6: (1, "b"), 7: (1, "B"), 8: (2, "h"),
+                9: (4, "i"), 10: (8, "ii"), 11: (4, "f"), 12: (8, "d"),
+                13: (4, "I")}
+
+# Maximum number of IFDs that are walked before giving up
+_MAX_NUM_IFDS = 1000000
+
+# Default channel colors (R, G, B, A) when the file does not define them
+_DEFAULT_CHANNEL_COLORS = [(255.0, 0.0, 0.0, 255.0),
+                           (0.0, 255.0, 0.0, 255.0),
+                           (0.0, 0.0, 255.0, 255.0),
+                           (255.0, 255.0, 255.0, 255.0)]
+
+# Conversion factors from OME length units to micrometers
+_UNITS_TO_MICROMETERS = {u"µm": 1.0, u"μm": 1.0, "um": 1.0,
+                         "nm": 0.001, "mm": 1000.0, "cm": 10000.0,
+                         "m": 1000000.0}
+
+
+def java_double_string(value):
+    """Format a float the way java.lang.Double.toString() does, so that the
+    sniffed values match those returned by the Java MicroscopyReader."""
+
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value == 0.0:
+        return "0.0"
+    if 1e-3 <= abs(value) < 1e7:
+        s = repr(value)
+        if "." not in s and "e" not in s:
+            s += ".0"
+        return s
+    mantissa, exponent = ("%.16e" % value).split("e")
+    mantissa = repr(float(mantissa))
+    return mantissa + "E" + str(int(exponent))
+
+
+def compare_series_metadata(sniffed, parsed):
+    """Compare the series metadata read by the sniffer with the one parsed
+    by bio-formats. Only the attributes set by the sniffer are compared.
+
+    @param sniffed List of metadata attributes per series (sniffer)
+    @param parsed List of metadata attributes per series (bio-formats)
+    @return list of strings describing the differences (empty if none)
+    """
+
+    differences = []
+    if len(sniffed) != len(parsed):
+        differences.append("number of series: " + str(len(sniffed)) +
+                           " != " + str(len(parsed)))
+        return differences
+
+    for i in range(len(sniffed)):
+        parsedSeries = parsed[i]
+        for key, value in sniffed[i].iteritems():
+            parsedValue = parsedSeries.get(key)
+            if parsedValue != value:
+                differences.append("series " + str(i) + ", " + key + ": " +
+                                   repr(value) + " != " + repr(parsedValue))
+    return differences
+
+
+class MappedFile:
+    """Read-only access to a file through memory-mapped windows (java.nio),
+    so that only the pages holding the header and the IFDs are read."""
+
+    # Size of the mapped windows
+    WINDOW_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, filePath):
+        """Constructor.
+
+        @param filePath Full path to the file
+        """
+
+        self._file = RandomAccessFile(filePath, "r")
+        self._channel = self._file.getChannel()
+        self._size = self._channel.size()
+        self._window = None
+        self._windowStart = 0
+        self._windowEnd = 0
+
+    def size(self):
+        """Return the size of the file in bytes."""
+
+        return self._size
+
+    def read(self, offset, length):
+        """Return length bytes starting at offset as a string (shorter if
+        the end of the file is reached)."""
+
+        length = max(0, min(length, self._size - offset))
+        if length == 0:
+            return ""
+        if offset < self._windowStart or offset + length > self._windowEnd:
+            windowLength = min(max(length, self.WINDOW_SIZE),
+                               self._size - offset)
+            self._window = self._channel.map(MapMode.READ_ONLY, offset,
+                                             windowLength)
+            self._windowStart = offset
+            self._windowEnd = offset + windowLength
+
+        data = jarray.zeros(length, "b")
+        self._window.position(offset - self._windowStart)
+        self._window.get(data)
+        return data.tostring()
+
+    def close(self):
+        """Release the file."""
+
+        self._window = None
+        self._channel.close()
+        self._file.close()
+
+
+class TIFFHeaderSniffer:
+    """Fast path for the extraction of the series metadata from plain TIFF
+    and single-file OME-TIFF files: the metadata is read directly from the
+    TIFF header (IFDs and OME-XML description) instead of opening the file
+    with bio-formats.
+
+    The returned attributes use the same keys (and value formats) as
+    BioFormatsProcessor.getMetadata(). Files that the sniffer does not
+    fully understand (BigTIFF, vendor TIFF variants with private tags,
+    ImageJ hyperstacks, multi-file OME-TIFF, pyramids, unsupported pixel
+    types, ...) are rejected, and must be processed with bio-formats."""
+
+    # Extensions of the files that are sniffed
+    EXTENSIONS = (".tif", ".tiff")
+
+    def __init__(self, filePath, logger):
+        """Constructor.
+
+        @param filePath Full path to the file
+        @param logger Logger object
+        """
+
+        self._filePath = filePath
+        self._logger = logger
+        self._file = None
+        self._byteOrder = "<"
+        self._reason = ""
+
+    def getReason(self):
+        """Return why the last call to sniff() rejected the file."""
+
+        return self._reason
+
+    def sniff(self):
+        """Read the series metadata from the file header.
+
+        @return SeriesMetadataTable, or None if the file must be processed
+                with bio-formats (see getReason()).
+        """
+
+        if not self._filePath.lower().endswith(self.EXTENSIONS):
+            return self._reject("not a TIFF file")
+
+        try:
+            self._file = MappedFile(self._filePath)
+        except Exception, e:
+            return self._reject("could not open file: " + str(e))
+
+        try:
+            try:
+                return self._sniff()
+            except Exception, e:
+                return self._reject("could not read header: " + str(e))
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _sniff(self):
+        """Read the header, the first IFD and (for plain TIFF) the other
+        IFDs."""
+
+        header = self._file.read(0, 8)
+        if len(header) < 8:
+            return self._reject("file too short")
+        if header[:2] == "II":
+            self._byteOrder = "<"
+        elif header[:2] == "MM":
+            self._byteOrder = ">"
+        else:
+            return self._reject("not a TIFF file")
+
+        magic, offset = struct.unpack(self._byteOrder + "HI", header[2:8])
+        if magic != 42:
+            return self._reject("not a classic TIFF file (magic " +
+                                str(magic) + ")")
+
+        firstIFD, offset = self._readIFD(offset)
+        if firstIFD is None:
+            return None
+
+        description = firstIFD.get(_IMAGE_DESCRIPTION)
+        if description is not None and "<OME" in description:
+            return self._fromOMEXML(description)
+
+        if description is not None and description.startswith("ImageJ="):
+            return self._reject("ImageJ TIFF")
+
+        # Plain TIFF: all IFDs must be planes of the same size
+        numIFDs = 1
+        visited = {}
+        while offset != 0:
+            if offset in visited or numIFDs >= _MAX_NUM_IFDS:
+                return self._reject("invalid IFD chain")
+            visited[offset] = True
+            ifd, offset = self._readIFD(offset)
+            if ifd is None:
+                return None
+            if ifd.get(_IMAGE_WIDTH) != firstIFD.get(_IMAGE_WIDTH) or \
+                    ifd.get(_IMAGE_LENGTH) != firstIFD.get(_IMAGE_LENGTH):
+                return self._reject("planes of different size")
+            numIFDs += 1
+
+        return self._fromPlainTIFF(firstIFD, numIFDs)
+
+    def _readIFD(self, offset):
+        """Read an IFD.
+
+        @return tuple (map from tag to value for the decoded tags, offset of
+                the next IFD), or (None, 0) if the file is rejected.
+        """
+
+        data = self._file.read(offset, 2)
+        if len(data) < 2:
+            self._reject("IFD offset out of range")
+            return None, 0
+        numEntries = struct.unpack(self._byteOrder + "H", data)[0]
+
+        data = self._file.read(offset + 2, 12 * numEntries + 4)
+        if len(data) < 12 * numEntries + 4:
+            self._reject("truncated IFD")
+            return None, 0
+
+        ifd = {}
+        for i in range(numEntries):
+            entry = data[12 * i:12 * (i + 1)]
+            tag, fieldType, count = struct.unpack(self._byteOrder + "HHI",
+                                                  entry[:8])
+            if tag >= _FIRST_PRIVATE_TAG:
+                self._reject("private TIFF tag " + str(tag))
+                return None, 0
+            if tag not in _DECODED_TAGS:
+                continue
+            if fieldType not in _FIELD_TYPES:
+                self._reject("unknown field type " + str(fieldType))
+                return None, 0
+
+            size, fmt = _FIELD_TYPES[fieldType]
+            if size * count <= 4:
+                raw = entry[8:8 + size * count]
+            else:
+                valueOffset = struct.unpack(self._byteOrder + "I",
+                                            entry[8:12])[0]
+                raw = self._file.read(valueOffset, size * count)
+                if len(raw) < size * count:
+                    self._reject("tag value out of range")
+                    return None, 0
+
+            if fmt == "s":
+                ifd[tag] = raw.rstrip("\0")
+            else:
+                values = struct.unpack(self._byteOrder + fmt * count, raw)
+                if len(values) == 1:
+                    values = values[0]
+                ifd[tag] = values
+
+        nextOffset = struct.unpack(self._byteOrder + "I",
+                                   data[12 * numEntries:])[0]
+
+        if ifd.get(_NEW_SUBFILE_TYPE, 0) & 1:
+            self._reject("reduced-resolution images")
+            return None, 0
+
+        return ifd, nextOffset
+
+    def _fromPlainTIFF(self, ifd, numIFDs):
+        """Build the metadata of the single series of a plain TIFF file. As
+        for the MinimalTiffReader of bio-formats, the IFDs are time points
+        (sizeZ = 1, sizeT = number of IFDs)."""
+
+        samplesPerPixel = ifd.get(_SAMPLES_PER_PIXEL, 1)
+        bitsPerSample = ifd.get(_BITS_PER_SAMPLE, 1)
+        if type(bitsPerSample) == tuple:
+            bitsPerSample = bitsPerSample[0]
+        sampleFormat = ifd.get(_SAMPLE_FORMAT, 1)
+        if type(sampleFormat) == tuple:
+            sampleFormat = sampleFormat[0]
+
+        datatype = self._getDatatype(sampleFormat, bitsPerSample)
+        if datatype is None:
+            return None
+
+        metadata = [("numSeries", "0"),
+                    ("name", os.path.basename(self._filePath)),
+                    ("sizeX", str(ifd.get(_IMAGE_WIDTH))),
+                    ("sizeY", str(ifd.get(_IMAGE_LENGTH))),
+                    ("sizeZ", "1"),
+                    ("sizeC", str(samplesPerPixel)),
+                    ("sizeT", str(numIFDs)),
+                    ("datatype", datatype),
+                    ("isSigned", str(datatype == "float").lower()),
+                    ("isLittleEndian", str(self._byteOrder == "<").lower()),
+                    ("isThumbnail", "false")]
+
+        # Voxel size in micrometers from the resolution tags
+        voxelX = self._getVoxelSize(ifd, _X_RESOLUTION)
+        voxelY = self._getVoxelSize(ifd, _Y_RESOLUTION)
+        if voxelX is not None and voxelY is not None:
+            metadata.append(("voxelX", java_double_string(voxelX)))
+            metadata.append(("voxelY", java_double_string(voxelY)))
+
+        for c in range(samplesPerPixel):
+            metadata.append(("channelName" + str(c), "CHANNEL_" + str(c)))
+            metadata.append(("channelColor" + str(c),
+                             self._getDefaultChannelColor(c)))
+
+        table = SeriesMetadataTable()
+        table.appendItems(metadata)
+        return table
+
+    def _fromOMEXML(self, description):
+        """Build the metadata of all series from the OME-XML description."""
+
+        try:
+            root = ET.fromstring(description)
+        except Exception, e:
+            return self._reject("invalid OME-XML: " + str(e))
+
+        fileName = os.path.basename(self._filePath)
+        table = SeriesMetadataTable()
+        numSeries = 0
+        for image in root:
+            if self._localName(image) != "Image":
+                continue
+
+            pixels = None
+            acquisitionDate = None
+            for child in image:
+                if self._localName(child) == "Pixels":
+                    pixels = child
+                elif self._localName(child) == "AcquisitionDate":
+                    acquisitionDate = child.text
+            if pixels is None:
+                return self._reject("OME-XML image without pixels")
+
+            datatype = self._getOMEDatatype(pixels.attrib.get("Type"))
+            if datatype is None:
+                return None
+
+            bigEndian = pixels.attrib.get("BigEndian")
+            if bigEndian is None:
+                isLittleEndian = self._byteOrder == "<"
+            else:
+                isLittleEndian = bigEndian.lower() != "true"
+
+            metadata = [("numSeries", str(numSeries)),
+                        ("name", image.attrib.get("Name", fileName)),
+                        ("sizeX", pixels.attrib.get("SizeX")),
+                        ("sizeY", pixels.attrib.get("SizeY")),
+                        ("sizeZ", pixels.attrib.get("SizeZ")),
+                        ("sizeC", pixels.attrib.get("SizeC")),
+                        ("sizeT", pixels.attrib.get("SizeT")),
+                        ("datatype", datatype),
+                        ("isSigned", str(datatype == "float").lower()),
+                        ("isLittleEndian", str(isLittleEndian).lower()),
+                        ("isThumbnail", "false")]
+
+            if acquisitionDate is not None:
+                metadata.append(("acquisitionDate", acquisitionDate))
+
+            for axis in ["X", "Y", "Z"]:
+                value = pixels.attrib.get("PhysicalSize" + axis)
+                if value is None:
+                    continue
+                unit = pixels.attrib.get("PhysicalSize" + axis + "Unit",
+                                         u"µm")
+                factor = _UNITS_TO_MICROMETERS.get(unit)
+                if factor is None:
+                    return self._reject("unsupported unit " + repr(unit))
+                metadata.append(("voxel" + axis,
+                                 java_double_string(float(value) * factor)))
+
+            c = 0
+            for child in pixels:
+                localName = self._localName(child)
+                if localName == "TiffData":
+                    if not self._isInThisFile(child, fileName):
+                        return self._reject("multi-file OME-TIFF")
+                    continue
+                if localName != "Channel":
+                    continue
+                if int(child.attrib.get("SamplesPerPixel", "1")) != 1:
+                    return self._reject("interleaved (RGB) channels")
+
+                name = child.attrib.get("Name")
+                if name is None:
+                    name = "CHANNEL_" + str(c)
+                metadata.append(("channelName" + str(c), name))
+
+                color = child.attrib.get("Color")
+                if color is None:
+                    color = self._getDefaultChannelColor(c)
+                else:
+                    color = self._getChannelColor(int(color))
+                metadata.append(("channelColor" + str(c), color))
+
+                for attr, key in [("ExcitationWavelength", "exWavelength"),
+                                  ("EmissionWavelength", "emWavelength")]:
+                    value = child.attrib.get(attr)
+                    if value is not None:
+                        metadata.append((key + str(c),
+                                         java_double_string(value)))
+                c += 1
+
+            if c != int(pixels.attrib.get("SizeC")):
+                return self._reject("channels do not match SizeC")
+
+            table.appendItems(metadata)
+            numSeries += 1
+
+        if numSeries == 0:
+            return self._reject("OME-XML without images")
+        return table
+
+    def _isInThisFile(self, tiffData, fileName):
+        """Check that a TiffData element does not refer to another file."""
+
+        for child in tiffData:
+            if self._localName(child) == "UUID":
+                other = child.attrib.get("FileName")
+                if other is not None and other != fileName:
+                    return False
+        return True
+
+    def _getDatatype(self, sampleFormat, bitsPerSample):
+        """Map the TIFF sample format and bit depth to the data type names
+        used by MicroscopyReader."""
+
+        if sampleFormat == 1 and bitsPerSample == 8:
+            return "uint8"
+        if sampleFormat == 1 and bitsPerSample == 16:
+            return "uint16"
+        if sampleFormat == 3 and bitsPerSample == 32:
+            return "float"
+        return self._reject("unsupported pixel type (format " +
+                            str(sampleFormat) + ", " + str(bitsPerSample) +
+                            " bits)")
+
+    def _getOMEDatatype(self, pixelType):
+        """Map the OME pixel type to the data type names used by
+        MicroscopyReader."""
+
+        if pixelType in ["uint8", "uint16", "float"]:
+            return pixelType
+        return self._reject("unsupported pixel type " + str(pixelType))
+
+    def _getVoxelSize(self, ifd, tag):
+        """Return the pixel size in micrometers from a resolution tag, or
+        None if it is not defined in a physical unit."""
+
+        resolution = ifd.get(tag)
+        unit = ifd.get(_RESOLUTION_UNIT, 2)
+        if resolution is None or resolution[0] == 0 or resolution[1] == 0:
+            return None
+        pixelsPerUnit = float(resolution[0]) / float(resolution[1])
+        if unit == 2:
+            return 25400.0 / pixelsPerUnit
+        if unit == 3:
+            return 10000.0 / pixelsPerUnit
+        return None
+
+    def _getChannelColor(self, color):
+        """Convert an OME color (signed 32-bit RGBA integer) to the
+        'R,G,B,A' string used by MicroscopyReader."""
+
+        color = color & 0xFFFFFFFF
+        components = [(color >> 24) & 0xFF, (color >> 16) & 0xFF,
+                      (color >> 8) & 0xFF, color & 0xFF]
+        return ",".join([java_double_string(x) for x in components])
+
+    def _getDefaultChannelColor(self, c):
+        """Return the default color of channel c."""
+
+        color = _DEFAULT_CHANNEL_COLORS[c % len(_DEFAULT_CHANNEL_COLORS)]
+        return ",".join([java_double_string(x) for x in color])
+
+    def _localName(self, element):
+        """Return the tag of an element without namespace."""
+
+        return element.tag.split("}")[-1]
+
+    def _reject(self, reason):
+        """Store the reason why the file is left to bio-formats."""
+
+        self._reason = reason
+        return None
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import time
+from java.util.concurrent import Callable
+from java.util.concurrent import ExecutionException
+from java.util.concurrent import Executors
+
+
+class _RenderTask(Callable):
+    """Prerender the thumbnail of one image generation algorithm."""
+
+    def __init__(self, algorithm):
+        self._algorithm = algorithm
+
+    def call(self):
+        start = time.time()
+        self._algorithm.prerender()
+        return time.time() - start
+
+
+class ThumbnailRenderPool:
+    """Bounded pool of threads that render the representative images
+    (thumbnails) of all series of a microscopy file concurrently, before the
+    file is moved into its dataset. The rendered thumbnails are kept by the
+    image generation algorithms (see
+    StreamingMaximumIntensityProjectionGenerationAlgorithm.prerender()) and
+    handed to openBIS when the datasets are stored. A thumbnail that fails
+    to render is generated again by its algorithm at storage time."""
+
+    def __init__(self, numWorkers, logger):
+        """Constructor.
+
+        @param numWorkers Maximum number of thumbnails rendered at the same
+                          time
+        @param logger Logger object
+        """
+
+        self._logger = logger
+
+        # The threads are started by the first call to renderAll()
+        self._numWorkers = max(1, int(numWorkers))
+        self._executor = None
+
+        # Statistics
+        self._numRendered = 0
+        self._numFailed = 0
+        self._renderSeconds = 0.0
+        self._wallSeconds = 0.0
+
+    def renderAll(self, algorithms, label):
+        """Render the thumbnails of all algorithms and wait for them.
+
+        @param algorithms List of image generation algorithms that support
+                          prerender()
+        @param label Name of the file (for logging)
+        """
+
+        if self._executor is None:
+            self._executor = Executors.newFixedThreadPool(self._numWorkers)
+
+        start = time.time()
+        futures = [(algorithm, self._executor.submit(_RenderTask(algorithm)))
+                   for algorithm in algorithms]
+
+        renderSeconds = 0.0
+        for algorithm, future in futures:
+            try:
+                renderSeconds += future.get()
+                self._numRendered += 1
+            except ExecutionException, e:
+                self._numFailed += 1
+                self._logger.warning("THUMBNAILRENDERPOOL::renderAll(): " +
+                                     "Could not prerender a thumbnail of " +
+                                     label + ": " + str(e.getCause()))
+
+        wallSeconds = time.time() - start
+        self._renderSeconds += renderSeconds
+        self._wallSeconds += wallSeconds
+        self._logger.info("THUMBNAILRENDERPOOL::renderAll(): " +
+                          "Rendered " + str(len(algorithms)) +
+                          " thumbnails of " + label + " in " +
+                          ("%.2f" % wallSeconds) + " s (" +
+                          ("%.2f" % renderSeconds) + " s of rendering).")
+
+    def getStatistics(self):
+        """Return the number of rendered and failed thumbnails, and the
+        total rendering and wall time in seconds."""
+
+        return self._numRendered, self._numFailed, self._renderSeconds, \
+            self._wallSeconds
+
+    def shutdown(self):
+        """Stop the threads of the pool (if they were started)."""
+
+        if self._executor is not None:
+            self._executor.shutdownNow()
+            self._executor = None
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Benchmark of the storage transfer strategies of FileTransfer (rename, hard
+link, reflink and buffered copy) on a generated folder of N files of S MiB.
+Each strategy is run on its own, so the ones that are not supported by the
+filesystem (or by the pair of filesystems) are reported as failed. Run with
+jython (see ReadMe.txt):
+
+    jython BenchmarkFileTransfer.py -d /path/on/incoming/filesystem
+    jython BenchmarkFileTransfer.py -d /incoming/tmp -o /store/staging -n 8 -s 1024
+"""
+
+import logging
+import optparse
+import os
+import shutil
+import tempfile
+import time
+
+from BenchmarkUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from FileTransfer import FileTransfer
+from FileTransfer import get_device
+from FileTransfer import COPY, HARDLINK, REFLINK, RENAME
+
+
+def create_folder(folder, numFiles, sizeInMiB):
+    """Create numFiles files of sizeInMiB MiB of (incompressible) data."""
+
+    os.makedirs(folder)
+    block = os.urandom(1024 * 1024)
+    for i in range(numFiles):
+        f = open(os.path.join(folder, "image_%04d.tif" % i), "wb")
+        try:
+            for j in range(sizeInMiB):
+                f.write(block)
+        finally:
+            f.close()
+
+
+def main():
+
+    parser = optparse.OptionParser()
+    parser.add_option("-d", dest="sourceDir", default=None,
+                      help="folder where the source data is generated " +
+                      "(default: system temporary folder)")
+    parser.add_option("-o", dest="targetDir", default=None,
+                      help="folder where the data is transferred to " +
+                      "(default: same as -d)")
+    parser.add_option("-n", dest="numFiles", type="int", default=4,
+                      help="number of files")
+    parser.add_option("-s", dest="sizeInMiB", type="int", default=256,
+                      help="size of each file in MiB")
+    (options, args) = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("BenchmarkFileTransfer")
+
+    sourceRoot = tempfile.mkdtemp(prefix="transfer_", dir=options.sourceDir)
+    targetParent = options.targetDir
+    if targetParent is None:
+        targetParent = options.sourceDir
+    targetRoot = tempfile.mkdtemp(prefix="transfer_", dir=targetParent)
+
+    try:
+        source = os.path.join(sourceRoot, "series")
+        create_folder(source, options.numFiles, options.sizeInMiB)
+        numMB = options.numFiles * options.sizeInMiB * 1024 * 1024 / 1e6
+        print "%d files x %d MiB, same device: %s" % \
+            (options.numFiles, options.sizeInMiB,
+             get_device(sourceRoot) == get_device(targetRoot))
+
+        for strategy in [RENAME, HARDLINK, REFLINK, COPY]:
+            target = os.path.join(targetRoot, strategy)
+            fileTransfer = FileTransfer(logger, [strategy])
+            start = time.time()
+            try:
+                fileTransfer.transfer(source, target)
+            except Exception, e:
+                print "%-10s failed: %s" % (strategy, str(e))
+                continue
+            seconds = max(time.time() - start, 1e-9)
+            print "%-10s %10.3f s %10.1f MB/s" % \
+                (strategy, seconds, numMB / seconds)
+
+            # Restore the source (rename) or drop the transferred copy
+            if strategy == RENAME:
+                os.rename(target, source)
+            else:
+                shutil.rmtree(target)
+    finally:
+        shutil.rmtree(sourceRoot, True)
+        shutil.rmtree(targetRoot, True)
+
+
+if __name__ == "__main__":
+    main()
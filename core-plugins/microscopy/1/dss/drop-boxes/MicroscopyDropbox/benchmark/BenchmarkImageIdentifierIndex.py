@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Microbenchmark of the selection of the image identifiers of one series in
+MicroscopySingleDatasetConfig.extractImagesMetadata(): openBIS passes all
+identifiers of the file to the configuration of every series. Compares
+filtering the whole list for every series (as before) with one
+ImageIdentifierIndex shared by all configurations. Run with jython (see
+ReadMe.txt):
+
+    jython BenchmarkImageIdentifierIndex.py              # default suite
+    jython BenchmarkImageIdentifierIndex.py -s 1000 -p 30
+"""
+
+import optparse
+
+from BenchmarkUtils import add_dropbox_to_path
+from BenchmarkUtils import best_of
+
+add_dropbox_to_path()
+
+from ImageIdentifierIndex import ImageIdentifierIndex
+
+
+# Default suite: (series, planes per series)
+DEFAULT_SUITE = [(1, 100),
+                 (10, 100),
+                 (100, 30),
+                 (1000, 30)]
+
+
+class SyntheticImageIdentifier:
+    """Stand-in for ImageIdentifier with the fields read by the config."""
+
+    def __init__(self, seriesIndex, timeSeriesIndex, focalPlaneIndex,
+                 colorChannelIndex):
+        self.seriesIndex = seriesIndex
+        self.timeSeriesIndex = timeSeriesIndex
+        self.focalPlaneIndex = focalPlaneIndex
+        self.colorChannelIndex = colorChannelIndex
+
+
+def image_identifiers(numSeries, numPlanes, numChannels=3):
+    """Return synthetic image identifiers for a multi-series file."""
+
+    ids = []
+    for s in range(numSeries):
+        for z in range(numPlanes):
+            for c in range(numChannels):
+                ids.append(SyntheticImageIdentifier(s, 0, z, c))
+    return ids
+
+
+def filter_per_series(ids, numSeries):
+    """Iterate all identifiers for every series."""
+
+    for seriesNum in range(numSeries):
+        entries = []
+        for id in ids:
+            series = int(id.seriesIndex)
+            if series != seriesNum:
+                continue
+            entries.append((id, series, int(id.timeSeriesIndex),
+                            int(id.focalPlaneIndex),
+                            int(id.colorChannelIndex)))
+
+
+def shared_index(ids, numSeries):
+    """Group the identifiers once and take one group for every series."""
+
+    identifierIndex = ImageIdentifierIndex()
+    for seriesNum in range(numSeries):
+        identifierIndex.take("file.lif", ids, seriesNum)
+
+
+def main():
+
+    parser = optparse.OptionParser()
+    parser.add_option("-s", "--series", dest="series", type="int",
+                      help="number of series")
+    parser.add_option("-p", "--planes", dest="planes", type="int",
+                      default=30, help="number of planes per series")
+    parser.add_option("-r", "--repetitions", dest="repetitions", type="int",
+                      default=3, help="number of repetitions (best is kept)")
+    (options, args) = parser.parse_args()
+
+    if options.series is not None:
+        suite = [(options.series, options.planes)]
+    else:
+        suite = DEFAULT_SUITE
+
+    for numSeries, numPlanes in suite:
+        ids = image_identifiers(numSeries, numPlanes)
+        filtered = best_of(options.repetitions, filter_per_series, ids,
+                           numSeries)
+        index = best_of(options.repetitions, shared_index, ids, numSeries)
+        print "%5d series x %7d identifiers: filter %8.3f s, index %8.3f s " \
+            "(x%.1f)" % (numSeries, len(ids), filtered, index,
+                         filtered / max(index, 1e-9))
+
+
+if __name__ == "__main__":
+    main()
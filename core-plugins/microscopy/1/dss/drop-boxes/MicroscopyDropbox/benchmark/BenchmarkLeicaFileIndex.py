@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Benchmark of the file name parsing done for the registration of a Leica TIFF
+Series folder: openBIS calls extractImagesMetadata() for every file of the
+folder on the configuration of every series, i.e. series x files times.
+Compares matching the regular expression on every call (as before) with one
+LeicaTIFFSeriesFileIndex shared by all configurations. Run with jython (see
+ReadMe.txt):
+
+    jython BenchmarkLeicaFileIndex.py                   # default suite
+    jython BenchmarkLeicaFileIndex.py -s 20 -t 10 -z 50 -c 3
+"""
+
+import optparse
+
+from BenchmarkUtils import add_dropbox_to_path
+from BenchmarkUtils import best_of
+
+add_dropbox_to_path()
+
+from LeicaTIFFSeriesFileIndex import LeicaTIFFSeriesFileIndex
+
+
+# Default suite: (series, timepoints, planes, channels)
+DEFAULT_SUITE = [(1, 1, 50, 3),
+                 (10, 1, 50, 3),
+                 (50, 5, 20, 2),
+                 (100, 1, 100, 4)]
+
+
+def file_names(numSeries, numTimepoints, numPlanes, numChannels):
+    """Return synthetic Leica TIFF Series file names."""
+
+    names = []
+    for s in range(numSeries):
+        for t in range(numTimepoints):
+            for z in range(numPlanes):
+                for c in range(numChannels):
+                    names.append("Position_Series%03d_t%03d_z%03d_ch%02d.tif" %
+                                 (s, t, z, c))
+    return names
+
+
+def regex_per_call(names, numSeries):
+    """Match the regular expression for every file and every series."""
+
+    parser = LeicaTIFFSeriesFileIndex()
+    for seriesNum in range(numSeries):
+        for name in names:
+            entry = parser.parse(name)
+            if entry[1] != seriesNum:
+                continue
+
+
+def shared_index(names, numSeries):
+    """Index the file names once and look them up for every series."""
+
+    fileIndex = LeicaTIFFSeriesFileIndex()
+    for name in names:
+        fileIndex.lookup(name)
+    for seriesNum in range(numSeries):
+        for name in names:
+            entry = fileIndex.lookup(name)
+            if entry[1] != seriesNum:
+                continue
+
+
+def main():
+
+    parser = optparse.OptionParser()
+    parser.add_option("-s", "--series", dest="series", type="int",
+                      help="number of series")
+    parser.add_option("-t", "--timepoints", dest="timepoints", type="int",
+                      default=1, help="number of timepoints per series")
+    parser.add_option("-z", "--planes", dest="planes", type="int",
+                      default=50, help="number of planes per timepoint")
+    parser.add_option("-c", "--channels", dest="channels", type="int",
+                      default=3, help="number of channels")
+    parser.add_option("-r", "--repetitions", dest="repetitions", type="int",
+                      default=3, help="number of repetitions (best is kept)")
+    (options, args) = parser.parse_args()
+
+    if options.series is not None:
+        suite = [(options.series, options.timepoints, options.planes,
+                  options.channels)]
+    else:
+        suite = DEFAULT_SUITE
+
+    for numSeries, numTimepoints, numPlanes, numChannels in suite:
+        names = file_names(numSeries, numTimepoints, numPlanes, numChannels)
+        regex = best_of(options.repetitions, regex_per_call, names, numSeries)
+        index = best_of(options.repetitions, shared_index, names, numSeries)
+        print "%4d series x %7d files: regex %8.3f s, index %8.3f s " \
+            "(x%.1f)" % (numSeries, len(names), regex, index,
+                         regex / max(index, 1e-9))
+
+
+if __name__ == "__main__":
+    main()
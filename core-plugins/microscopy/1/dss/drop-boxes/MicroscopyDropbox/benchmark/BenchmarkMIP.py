@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Benchmark of the plane-streaming MaximumIntensityProjector on synthetic
+16-bit planes generated on the fly (so that the planes are never all in
+memory at the same time). Reports planes/s, MB/s and peak heap usage for
+1 to N projection threads. Run with jython (see ReadMe.txt):
+
+    jython BenchmarkMIP.py                        # default suite
+    jython BenchmarkMIP.py -x 2048 -y 2048 -z 200 -c 4 -t 8
+"""
+
+import logging
+import optparse
+from ij.process import ShortProcessor
+
+from BenchmarkUtils import add_dropbox_to_path
+from BenchmarkUtils import measure
+
+add_dropbox_to_path()
+
+from MaximumIntensityProjector import MaximumIntensityProjector
+
+
+# Default suite: (sizeX, sizeY, sizeZ, sizeC)
+DEFAULT_SUITE = [(512, 512, 100, 3),
+                 (1024, 1024, 100, 3),
+                 (2048, 2048, 50, 4)]
+
+
+class SyntheticPlaneSource:
+    """Plane source that generates sizeZ planes of sizeX x sizeY 16-bit
+    pixels per channel."""
+
+    def __init__(self, sizeX, sizeY, sizeZ, sizeC):
+        self._sizeX = sizeX
+        self._sizeY = sizeY
+        self._sizeZ = sizeZ
+        self._sizeC = sizeC
+
+    def getChannels(self):
+        return range(self._sizeC)
+
+    def getPlanes(self, channel):
+        return range(self._sizeZ)
+
+    def open(self, channel):
+
+        def openPlane(z):
+            plane = ShortProcessor(self._sizeX, self._sizeY)
+            plane.setValue(100 * (channel + 1) + z)
+            plane.fill()
+            return plane
+
+        return openPlane, lambda: None
+
+
+def main():
+
+    parser = optparse.OptionParser()
+    parser.add_option("-x", dest="sizeX", type="int", help="plane width")
+    parser.add_option("-y", dest="sizeY", type="int", default=1024,
+                      help="plane height")
+    parser.add_option("-z", dest="sizeZ", type="int", default=100,
+                      help="number of planes per channel")
+    parser.add_option("-c", dest="sizeC", type="int", default=3,
+                      help="number of channels")
+    parser.add_option("-t", "--threads", dest="threads", type="int",
+                      default=4, help="maximum number of threads")
+    (options, args) = parser.parse_args()
+
+    if options.sizeX is not None:
+        suite = [(options.sizeX, options.sizeY, options.sizeZ, options.sizeC)]
+    else:
+        suite = DEFAULT_SUITE
+
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("BenchmarkMIP")
+    colors = {0: (255, 0, 0), 1: (0, 255, 0), 2: (0, 0, 255)}
+
+    for sizeX, sizeY, sizeZ, sizeC in suite:
+        planeSource = SyntheticPlaneSource(sizeX, sizeY, sizeZ, sizeC)
+        numThreads = 1
+        while numThreads <= options.threads:
+            projector = MaximumIntensityProjector(logger, numThreads)
+            result, stats = measure(projector.createThumbnail, planeSource,
+                                    colors, 256, 256)
+            numPlanes, numBytes = projector.getStatistics()[:2]
+            seconds = max(stats["wallSeconds"], 1e-9)
+            print "%4dx%-4d z=%-4d c=%d threads=%-2d %8.3f s %9.1f planes/s " \
+                "%8.1f MB/s %10d B peak heap" % \
+                (sizeX, sizeY, sizeZ, sizeC, numThreads, seconds,
+                 numPlanes / seconds, numBytes / seconds / 1e6,
+                 stats["peakHeapBytes"])
+            numThreads *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Offline benchmark of Processor.run() on synthetic incoming folders, using
+a FakeTransaction instead of a live openBIS. Run with jython (see ReadMe.txt):
+
+    jython BenchmarkProcessor.py                  # default suite
+    jython BenchmarkProcessor.py -e 2 -f 50 -s 4  # one configuration
+"""
+
+import logging
+import optparse
+import os
+import shutil
+import tempfile
+
+from BenchmarkUtils import add_dropbox_to_path
+from BenchmarkUtils import measure
+from BenchmarkUtils import report
+
+dropboxFolder = add_dropbox_to_path()
+
+from FakeTransaction import FakeTransaction
+from SyntheticData import generate_incoming
+from Processor import Processor
+from StageTimer import to_json
+
+
+# Default suite: (experiments, files per experiment, series per file)
+DEFAULT_SUITE = [(1, 10, 1),
+                 (1, 100, 1),
+                 (10, 10, 10),
+                 (1, 10, 1000)]
+
+
+def run_configuration(numExperiments, numFiles, numSeries, options, logger):
+    """Generate an incoming folder, register it with the Processor and
+    return the measured statistics."""
+
+    workFolder = tempfile.mkdtemp(prefix="microscopy_benchmark_")
+    try:
+        incomingFolder = os.path.join(workFolder, "incoming", "bench")
+        generate_incoming(incomingFolder, numExperiments, numFiles, numSeries,
+                          options.fileSize,
+                          withSeriesMetadata=not options.noSeriesMetadata)
+
+        transaction = FakeTransaction(incomingFolder,
+                                      os.path.join(workFolder, "store"))
+
+        cachePath = None
+        if options.cache:
+            cachePath = os.path.join(workFolder, "cache")
+
+        processor = Processor(transaction, logger, cachePath,
+                              os.path.join(workFolder, "timings.jsonl"),
+                              dropboxFolder)
+        result, stats = measure(processor.run)
+
+        stats["experiments"] = numExperiments
+        stats["files"] = numFiles
+        stats["series"] = numSeries
+        stats["datasets"] = len(transaction.datasets)
+        for method, count in transaction.calls.iteritems():
+            stats["calls." + method] = count
+
+        return stats
+
+    finally:
+        if options.keep:
+            print "Kept " + workFolder
+        else:
+            shutil.rmtree(workFolder)
+
+
+def main():
+
+    parser = optparse.OptionParser()
+    parser.add_option("-e", "--experiments", dest="experiments", type="int",
+                      help="number of experiments")
+    parser.add_option("-f", "--files", dest="files", type="int",
+                      help="number of files per experiment")
+    parser.add_option("-s", "--series", dest="series", type="int",
+                      help="number of series per file")
+    parser.add_option("-b", "--file-size", dest="fileSize", type="int",
+                      default=1024, help="size in bytes of each data file")
+    parser.add_option("--no-series-metadata", dest="noSeriesMetadata",
+                      action="store_true", default=False,
+                      help="omit the series metadata from the properties "
+                      "files (requires real microscopy files)")
+    parser.add_option("--cache", dest="cache", action="store_true",
+                      default=False,
+                      help="enable the series metadata cache and journal")
+    parser.add_option("--json", dest="json", action="store_true",
+                      default=False, help="print results as JSON lines")
+    parser.add_option("--keep", dest="keep", action="store_true",
+                      default=False, help="keep the generated folders")
+    (options, args) = parser.parse_args()
+
+    if options.experiments is not None:
+        suite = [(options.experiments, options.files or 1,
+                  options.series or 1)]
+    else:
+        suite = DEFAULT_SUITE
+
+    # Keep the Processor quiet: only errors are logged (to stderr)
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("Microscopy")
+
+    for numExperiments, numFiles, numSeries in suite:
+        stats = run_configuration(numExperiments, numFiles, numSeries,
+                                  options, logger)
+        if options.json:
+            print to_json(stats)
+        else:
+            report("%d exp x %d files x %d series" %
+                   (numExperiments, numFiles, numSeries), stats)
+
+
+if __name__ == "__main__":
+    main()
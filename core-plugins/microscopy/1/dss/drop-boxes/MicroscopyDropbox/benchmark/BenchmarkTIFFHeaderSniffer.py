@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+
+Consistency check and benchmark of the TIFF header sniffer against the
+Java MicroscopyReader (bio-formats). For every file, the series metadata
+read by the sniffer is compared with the one returned by
+BioFormatsProcessor.getMetadata(), and the time of both is reported. The
+script exits with status 1 if any attribute differs. Run with jython (see
+ReadMe.txt):
+
+    jython BenchmarkTIFFHeaderSniffer.py file1.ome.tif file2.tif ...
+    jython BenchmarkTIFFHeaderSniffer.py --synthetic    # generated files
+"""
+
+import logging
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+
+from BenchmarkUtils import add_dropbox_to_path
+from BenchmarkUtils import best_of
+
+add_dropbox_to_path()
+
+from BioFormatsProcessor import BioFormatsProcessor
+from SyntheticData import write_tiff
+from TIFFHeaderSniffer import TIFFHeaderSniffer
+from TIFFHeaderSniffer import compare_series_metadata
+
+
+# Synthetic files: (sizeX, sizeY, sizeZ, sizeC, sizeT, ome)
+SYNTHETIC_SUITE = [(64, 64, 1, 1, 1, False),
+                   (512, 512, 20, 1, 1, False),
+                   (64, 64, 1, 1, 1, True),
+                   (512, 512, 20, 3, 1, True),
+                   (256, 256, 10, 2, 10, True)]
+
+
+def sniff(fileName, logger):
+    """Read the series metadata with the TIFF header sniffer."""
+
+    return TIFFHeaderSniffer(fileName, logger).sniff()
+
+
+def parse(fileName, logger):
+    """Read the series metadata with bio-formats."""
+
+    bioFormatsProcessor = BioFormatsProcessor(fileName, logger)
+    try:
+        bioFormatsProcessor.parse()
+        return bioFormatsProcessor.getMetadata()
+    finally:
+        bioFormatsProcessor.close()
+
+
+def check_file(fileName, repetitions, logger):
+    """Compare and time sniffer and bio-formats on one file.
+
+    @return True if the metadata is consistent (or the sniffer rejected the
+            file).
+    """
+
+    sniffer = TIFFHeaderSniffer(fileName, logger)
+    sniffed = sniffer.sniff()
+    if sniffed is None:
+        print "%-50s rejected (%s)" % (os.path.basename(fileName),
+                                       sniffer.getReason())
+        return True
+
+    differences = compare_series_metadata(sniffed, parse(fileName, logger))
+    sniffTime = best_of(repetitions, sniff, fileName, logger)
+    parseTime = best_of(repetitions, parse, fileName, logger)
+    print "%-50s sniffer %8.4f s, bio-formats %8.4f s (x%.1f), %d " \
+        "difference(s)" % (os.path.basename(fileName), sniffTime, parseTime,
+                           parseTime / max(sniffTime, 1e-9), len(differences))
+    for difference in differences:
+        print "    " + difference
+    return len(differences) == 0
+
+
+def main():
+
+    parser = optparse.OptionParser(usage="%prog [options] [file ...]")
+    parser.add_option("--synthetic", dest="synthetic", action="store_true",
+                      default=False, help="check generated TIFF and "
+                      "OME-TIFF files")
+    parser.add_option("-r", "--repetitions", dest="repetitions", type="int",
+                      default=3, help="number of repetitions (best is kept)")
+    (options, fileNames) = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("Microscopy")
+
+    workFolder = None
+    if options.synthetic:
+        workFolder = tempfile.mkdtemp(prefix="microscopy_sniffer_")
+        for sizeX, sizeY, sizeZ, sizeC, sizeT, ome in SYNTHETIC_SUITE:
+            name = "synthetic_%dx%dx%dx%dx%d" % (sizeX, sizeY, sizeZ, sizeC,
+                                                  sizeT)
+            if ome:
+                name += ".ome"
+            fileName = os.path.join(workFolder, name + ".tif")
+            write_tiff(fileName, sizeX, sizeY, sizeZ, sizeC, sizeT, ome)
+            fileNames.append(fileName)
+
+    if len(fileNames) == 0:
+        parser.error("no files to check")
+
+    consistent = True
+    try:
+        for fileName in fileNames:
+            if not check_file(fileName, options.repetitions, logger):
+                consistent = False
+    finally:
+        if workFolder is not None:
+            shutil.rmtree(workFolder)
+
+    if not consistent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
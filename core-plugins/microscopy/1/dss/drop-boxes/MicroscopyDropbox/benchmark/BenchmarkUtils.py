@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import sys
+import time
+from java.lang import System
+from java.lang import Thread
+from java.lang.management import ManagementFactory
+from java.lang.management import MemoryType
+
+
+def add_dropbox_to_path():
+    """Make the dropbox modules importable from the benchmark scripts.
+
+    @return full path to the dropbox folder
+    """
+
+    benchmarkFolder = os.path.dirname(os.path.abspath(sys.argv[0]))
+    dropboxFolder = os.path.dirname(benchmarkFolder)
+    if dropboxFolder not in sys.path:
+        sys.path.insert(0, dropboxFolder)
+    return dropboxFolder
+
+
+def _reset_peak_heap_usage():
+    """Reset the peak usage of all heap memory pools."""
+
+    for pool in ManagementFactory.getMemoryPoolMXBeans():
+        if pool.getType() == MemoryType.HEAP:
+            pool.resetPeakUsage()
+
+
+def _get_peak_heap_usage():
+    """Return the sum of the peak usage in bytes of all heap memory pools."""
+
+    peak = 0
+    for pool in ManagementFactory.getMemoryPoolMXBeans():
+        if pool.getType() == MemoryType.HEAP:
+            peak += pool.getPeakUsage().getUsed()
+    return peak
+
+
+def _get_allocated_bytes():
+    """Return the number of bytes allocated so far by the current thread,
+    or -1 if the JVM does not support measuring it."""
+
+    try:
+        threadBean = ManagementFactory.getThreadMXBean()
+        return threadBean.getThreadAllocatedBytes(Thread.currentThread().getId())
+    except Exception:
+        return -1
+
+
+def measure(function, *args):
+    """Call function(*args) and measure wall time, bytes allocated by the
+    calling thread and peak heap usage.
+
+    @return tuple (result, {"wallSeconds", "allocatedBytes", "peakHeapBytes"})
+    """
+
+    System.gc()
+    _reset_peak_heap_usage()
+    allocatedBefore = _get_allocated_bytes()
+
+    start = time.time()
+    result = function(*args)
+    wallSeconds = time.time() - start
+
+    allocatedAfter = _get_allocated_bytes()
+    allocatedBytes = -1
+    if allocatedBefore >= 0 and allocatedAfter >= 0:
+        allocatedBytes = allocatedAfter - allocatedBefore
+
+    return result, {"wallSeconds": wallSeconds,
+                    "allocatedBytes": allocatedBytes,
+                    "peakHeapBytes": _get_peak_heap_usage()}
+
+
+def best_of(repetitions, function, *args):
+    """Call function(*args) repetitions times and return the shortest wall
+    time in seconds."""
+
+    best = None
+    for i in range(repetitions):
+        start = time.time()
+        function(*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def report(label, stats):
+    """Print one line with the measured statistics."""
+
+    print "%-40s %10.3f s %12d B allocated %12d B peak heap" % \
+        (label, stats["wallSeconds"], stats["allocatedBytes"],
+         stats["peakHeapBytes"])
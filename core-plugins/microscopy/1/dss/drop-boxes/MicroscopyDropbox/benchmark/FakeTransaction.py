@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import java.io.File
+
+
+class FakeEntity:
+    """Stand-in for the experiments, samples, datasets and metaprojects
+    returned by an openBIS dropbox transaction."""
+
+    def __init__(self, kind, code, entityType=""):
+
+        self.kind = kind
+        self.code = code
+        self.entityType = entityType
+        self.properties = {}
+        self.attachments = []
+        self.entities = []
+        self.experiment = None
+        self.sample = None
+
+    def setPropertyValue(self, key, value):
+        self.properties[key] = value
+
+    def getPropertyValue(self, key):
+        return self.properties.get(key)
+
+    def getExperimentIdentifier(self):
+        return self.code
+
+    def addAttachment(self, filePath, title, description, content):
+        self.attachments.append((title, len(content)))
+
+    def addEntity(self, entity):
+        self.entities.append(entity)
+
+    def setExperiment(self, experiment):
+        self.experiment = experiment
+
+    def setSample(self, sample):
+        self.sample = sample
+
+    def __str__(self):
+        return self.kind + ":" + self.code
+
+
+class FakePersistentMap:
+    """Stand-in for the persistent map of the registration context."""
+
+    def __init__(self):
+        self._map = {}
+
+    def put(self, key, value):
+        self._map[key] = value
+
+    def get(self, key):
+        return self._map.get(key)
+
+
+class FakeRegistrationContext:
+    """Stand-in for the registration context of a transaction."""
+
+    def __init__(self):
+        self._persistentMap = FakePersistentMap()
+
+    def getPersistentMap(self):
+        return self._persistentMap
+
+
+class FakeTransaction:
+    """Local stand-in for the openBIS dropbox transaction, to run the
+    Processor without a live openBIS. Entities are kept in memory, and
+    moveFile() renames the files into a fake store folder. The number of
+    calls per method is counted."""
+
+    def __init__(self, incomingFolder, storeFolder, existingExperiments=None):
+        """Constructor.
+
+        @param incomingFolder Full path to the incoming folder
+        @param storeFolder Folder where moveFile() moves the data
+        @param existingExperiments Optional list of experiment identifiers
+                                   that exist already
+        """
+
+        self._incoming = java.io.File(incomingFolder)
+        self._storeFolder = storeFolder
+        self._context = FakeRegistrationContext()
+        self._experiments = {}
+        self._metaprojects = {}
+        self._counter = 0
+        self.samples = []
+        self.datasets = []
+        self.calls = {}
+
+        if existingExperiments is not None:
+            for expId in existingExperiments:
+                self._experiments[expId] = FakeEntity("experiment", expId)
+
+        if not os.path.exists(self._storeFolder):
+            os.makedirs(self._storeFolder)
+
+    def getIncoming(self):
+        return self._incoming
+
+    def getRegistrationContext(self):
+        return self._context
+
+    def getExperimentForUpdate(self, expId):
+        self._count("getExperimentForUpdate")
+        return self._experiments.get(expId)
+
+    def createNewExperiment(self, expId, expType):
+        self._count("createNewExperiment")
+        experiment = FakeEntity("experiment", expId, expType)
+        self._experiments[expId] = experiment
+        return experiment
+
+    def getMetaproject(self, name, userName):
+        self._count("getMetaproject")
+        return self._metaprojects.get((name, userName))
+
+    def createNewMetaproject(self, name, description, userName):
+        self._count("createNewMetaproject")
+        metaproject = FakeEntity("metaproject", name)
+        self._metaprojects[(name, userName)] = metaproject
+        return metaproject
+
+    def createNewSampleWithGeneratedCode(self, space, sampleType):
+        self._count("createNewSampleWithGeneratedCode")
+        sample = FakeEntity("sample", "/" + space + "/M" + self._nextCode(),
+                            sampleType)
+        self.samples.append(sample)
+        return sample
+
+    def createNewDataSet(self, dataSetType):
+        self._count("createNewDataSet")
+        return self._newDataSet(dataSetType)
+
+    def createNewImageDataSet(self, config, incomingFile):
+        self._count("createNewImageDataSet")
+        return self._newDataSet("MICROSCOPY_IMG_CONTAINER")
+
+    def createNewImageDataSetFromDataSet(self, config, dataSet):
+        self._count("createNewImageDataSetFromDataSet")
+        return self._newDataSet("MICROSCOPY_IMG_CONTAINER")
+
+    def moveFile(self, src, dataSet):
+        self._count("moveFile")
+        dst = os.path.join(self._storeFolder, dataSet.code)
+        if not os.path.exists(dst):
+            os.makedirs(dst)
+        os.rename(src, os.path.join(dst, os.path.basename(src)))
+        return dst
+
+    def _newDataSet(self, dataSetType):
+        dataSet = FakeEntity("dataset", "DS" + self._nextCode(), dataSetType)
+        self.datasets.append(dataSet)
+        return dataSet
+
+    def _nextCode(self):
+        self._counter += 1
+        return "%08d" % self._counter
+
+    def _count(self, method):
+        self.calls[method] = self.calls.get(method, 0) + 1
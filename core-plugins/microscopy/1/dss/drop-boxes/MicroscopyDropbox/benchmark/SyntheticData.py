@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import struct
+import xml.etree.ElementTree as ET
+
+
+def series_metadata(seriesIndex, numChannels=3, sizeX=1024, sizeY=1024,
+                    sizeZ=10, sizeT=1):
+    """Return synthetic series metadata with the same keys returned by
+    BioFormatsProcessor.getMetadata()."""
+
+    metadata = {"name": "Series_" + str(seriesIndex),
+                "numSeries": str(seriesIndex),
+                "sizeX": str(sizeX),
+                "sizeY": str(sizeY),
+                "sizeZ": str(sizeZ),
+                "sizeC": str(numChannels),
+                "sizeT": str(sizeT),
+                "voxelX": "0.1",
+                "voxelY": "0.1",
+                "voxelZ": "0.5",
+                "datatype": "uint16"}
+    colors = ["255.0,0.0,0.0,255.0", "0.0,255.0,0.0,255.0",
+              "0.0,0.0,255.0,255.0", "255.0,255.0,255.0,255.0"]
+    for c in range(numChannels):
+        metadata["channelName" + str(c)] = "Channel_" + str(c)
+        metadata["channelColor" + str(c)] = colors[c % len(colors)]
+    return metadata
+
+
+def generate_incoming(incomingFolder, numExperiments, numFiles, numSeries,
+                      fileSizeInBytes=1024, userName="bench",
+                      withSeriesMetadata=True, tags="bench,synthetic"):
+    """Generate a synthetic incoming folder as exported by the Annotation
+    Tool: a user subfolder with a data_structure.ois file pointing to one
+    properties (obitXML) file per experiment, and numFiles data files per
+    experiment with numSeries series each.
+
+    @param incomingFolder Full path to the incoming folder to create
+    @param numExperiments Number of experiments
+    @param numFiles Number of microscopy files per experiment
+    @param numSeries Number of series per file
+    @param fileSizeInBytes Size of each (dummy) data file
+    @param userName Name of the user subfolder
+    @param withSeriesMetadata If True, the series metadata is added to the
+                              properties files as MicroscopyFileSeries nodes
+                              (as the Annotation Tool does) so that no file
+                              needs to be parsed; if False, the MicroscopyFile
+                              nodes have no children and the data files must
+                              be real microscopy files
+    @param tags Comma-separated list of tags for all experiments
+    @return list of the properties files (relative to incomingFolder)
+    """
+
+    userFolder = os.path.join(incomingFolder, userName)
+    if not os.path.exists(userFolder):
+        os.makedirs(userFolder)
+
+    block = "\0" * min(fileSizeInBytes, 1048576)
+
+    propertiesFiles = []
+    for e in range(numExperiments):
+
+        expCode = "BENCH_EXP_" + str(e)
+        expFolder = os.path.join(userFolder, expCode)
+        if not os.path.exists(expFolder):
+            os.makedirs(expFolder)
+
+        root = ET.Element("obitXML")
+        root.set("userName", userName)
+        root.set("machineName", "Synthetic")
+
+        experiment = ET.SubElement(root, "Experiment")
+        experiment.set("name", expCode)
+        experiment.set("openBISIdentifier", "/BENCH/BENCH/" + expCode)
+        experiment.set("description", "Synthetic experiment " + str(e))
+        experiment.set("version", "1")
+        experiment.set("tags", tags)
+
+        for f in range(numFiles):
+
+            relativeFileName = userName + "/" + expCode + "/file_" + \
+                str(f) + ".tif"
+
+            # Write the dummy data file
+            out = open(os.path.join(incomingFolder, relativeFileName), "wb")
+            try:
+                written = 0
+                while written < fileSizeInBytes:
+                    chunk = block[:fileSizeInBytes - written]
+                    out.write(chunk)
+                    written += len(chunk)
+            finally:
+                out.close()
+
+            fileNode = ET.SubElement(experiment, "MicroscopyFile")
+            fileNode.set("relativeFileName", relativeFileName)
+            fileNode.set("description", "")
+            fileNode.set("datasetSize", str(fileSizeInBytes))
+
+            if withSeriesMetadata:
+                for s in range(numSeries):
+                    ET.SubElement(fileNode, "MicroscopyFileSeries",
+                                  series_metadata(s))
+
+        relativePropertiesFile = userName + "/" + expCode + "_properties.oix"
+        ET.ElementTree(root).write(os.path.join(incomingFolder,
+                                                relativePropertiesFile),
+                                   encoding="UTF-8")
+        propertiesFiles.append(relativePropertiesFile)
+
+    f = open(os.path.join(userFolder, "data_structure.ois"), "w")
+    try:
+        for relativePropertiesFile in propertiesFiles:
+            f.write(relativePropertiesFile + "\n")
+    finally:
+        f.close()
+
+    return propertiesFiles
+
+
+def write_tiff(filePath, sizeX=64, sizeY=64, sizeZ=1, sizeC=1, sizeT=1,
+               ome=True, channelNames=None):
+    """Write an uncompressed, little-endian, 16-bit TIFF file with one IFD
+    (strip) per plane. If ome is True, the first IFD carries an OME-XML
+    description (single-file OME-TIFF); otherwise it is a plain TIFF with
+    sizeZ * sizeC * sizeT planes.
+
+    @param filePath Full path to the file to write
+    @param channelNames Optional list of channel names (OME-TIFF only)
+    """
+
+    numPlanes = sizeZ * sizeC * sizeT
+    planeSize = sizeX * sizeY * 2
+
+    description = None
+    if ome:
+        fileName = os.path.basename(filePath)
+        omeRoot = ET.Element("OME")
+        omeRoot.set("xmlns", "http://www.openmicroscopy.org/Schemas/OME/2016-06")
+        image = ET.SubElement(omeRoot, "Image", {"ID": "Image:0",
+                                                 "Name": fileName})
+        pixels = ET.SubElement(image, "Pixels", {
+            "ID": "Pixels:0", "DimensionOrder": "XYZCT", "Type": "uint16",
+            "BigEndian": "false", "SizeX": str(sizeX), "SizeY": str(sizeY),
+            "SizeZ": str(sizeZ), "SizeC": str(sizeC), "SizeT": str(sizeT),
+            "PhysicalSizeX": "0.1", "PhysicalSizeY": "0.1",
+            "PhysicalSizeZ": "0.5"})
+        colors = [-16776961, 16711935, 65535, -1]
+        for c in range(sizeC):
+            name = "Channel_" + str(c)
+            if channelNames is not None:
+                name = channelNames[c]
+            ET.SubElement(pixels, "Channel", {
+                "ID": "Channel:0:" + str(c), "Name": name,
+                "SamplesPerPixel": "1",
+                "Color": str(colors[c % len(colors)])})
+        ET.SubElement(pixels, "TiffData", {"IFD": "0",
+                                           "PlaneCount": str(numPlanes)})
+        description = ET.tostring(omeRoot, encoding="UTF-8") + "\0"
+
+    # Layout: header, description, pixel data, IFDs
+    descriptionOffset = 8
+    dataOffset = descriptionOffset
+    if description is not None:
+        dataOffset += len(description)
+    ifdOffset = dataOffset + numPlanes * planeSize
+
+    out = open(filePath, "wb")
+    try:
+        out.write(struct.pack("<2sHI", "II", 42, ifdOffset))
+        if description is not None:
+            out.write(description)
+
+        plane = "\0" * planeSize
+        for p in range(numPlanes):
+            out.write(plane)
+
+        offset = ifdOffset
+        for p in range(numPlanes):
+            entries = [(256, 4, 1, sizeX),
+                       (257, 4, 1, sizeY),
+                       (258, 3, 1, 16),
+                       (259, 3, 1, 1),
+                       (262, 3, 1, 1),
+                       (273, 4, 1, dataOffset + p * planeSize),
+                       (277, 3, 1, 1),
+                       (278, 4, 1, sizeY),
+                       (279, 4, 1, planeSize)]
+            if p == 0 and description is not None:
+                entries.append((270, 2, len(description), descriptionOffset))
+            entries.sort()
+
+            offset += 2 + 12 * len(entries) + 4
+            nextOffset = 0
+            if p < numPlanes - 1:
+                nextOffset = offset
+
+            out.write(struct.pack("<H", len(entries)))
+            for tag, fieldType, count, value in entries:
+                if fieldType == 3:
+                    out.write(struct.pack("<HHIHH", tag, fieldType, count,
+                                          value, 0))
+                else:
+                    out.write(struct.pack("<HHII", tag, fieldType, count,
+                                          value))
+            out.write(struct.pack("<I", nextOffset))
+    finally:
+        out.close()
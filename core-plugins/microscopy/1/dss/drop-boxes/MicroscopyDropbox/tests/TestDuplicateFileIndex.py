@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from TestUtils import QuietLogger
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from DuplicateFileIndex import DuplicateFileIndex
+
+
+class TestDuplicateFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="duplicate_index_")
+        self.indexFolder = os.path.join(self.folder, "index")
+        self.fileName = os.path.join(self.folder, "image.lif")
+        f = open(self.fileName, "wb")
+        try:
+            f.write("microscopy data")
+        finally:
+            f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testKeyIsPathIndependent(self):
+        index = DuplicateFileIndex(self.indexFolder, QuietLogger())
+        copy = os.path.join(self.folder, "copy.lif")
+        shutil.copy(self.fileName, copy)
+        self.assertEqual(index.getKey(self.fileName), index.getKey(copy))
+
+    def testStagedFilesAreFoundByTheSameInstance(self):
+        index = DuplicateFileIndex(self.indexFolder, QuietLogger())
+        key = index.getKey(self.fileName)
+        self.assertEqual(index.lookup(key), [])
+
+        index.stage("incoming", key, "sha", "DS1", u"user/image.lif")
+        self.assertEqual(index.lookup(key),
+                         [{"sha256": "sha", "dataSetCode": "DS1",
+                           "relativePath": u"user/image.lif",
+                           "staged": True}])
+        self.assertEqual(DuplicateFileIndex(self.indexFolder,
+                                            QuietLogger()).lookup(key), [])
+
+    def testCommitStaged(self):
+        index = DuplicateFileIndex(self.indexFolder, QuietLogger())
+        key = index.getKey(self.fileName)
+        index.stage("incoming", key, "sha", "DS1", u"user/imäge.lif")
+        index.stage("incoming", key, "sha", "DS2", u"other/image.lif")
+
+        other = DuplicateFileIndex(self.indexFolder, QuietLogger())
+        self.assertEqual(other.commitStaged("incoming"), 2)
+        self.assertEqual(other.commitStaged("incoming"), 0)
+        self.assertEqual(other.lookup(key),
+                         [{"sha256": "sha", "dataSetCode": "DS1",
+                           "relativePath": u"user/imäge.lif",
+                           "staged": False},
+                          {"sha256": "sha", "dataSetCode": "DS2",
+                           "relativePath": u"other/image.lif",
+                           "staged": False}])
+
+    def testDiscardStaged(self):
+        index = DuplicateFileIndex(self.indexFolder, QuietLogger())
+        key = index.getKey(self.fileName)
+        index.stage("incoming", key, "sha", "DS1", u"user/image.lif")
+        index.discardStaged("incoming")
+
+        other = DuplicateFileIndex(self.indexFolder, QuietLogger())
+        self.assertEqual(other.commitStaged("incoming"), 0)
+        self.assertEqual(other.lookup(key), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
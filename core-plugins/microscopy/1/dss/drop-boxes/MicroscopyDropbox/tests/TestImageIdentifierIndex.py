@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import unittest
+
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from ImageIdentifierIndex import ImageIdentifierIndex
+
+
+class FakeImageIdentifier:
+    """Stands in for the openBIS ImageIdentifier."""
+
+    def __init__(self, series, timepoint, plane, channel):
+        self.seriesIndex = series
+        self.timeSeriesIndex = timepoint
+        self.focalPlaneIndex = plane
+        self.colorChannelIndex = channel
+
+
+class CountingImageIdentifierIndex(ImageIdentifierIndex):
+    """Counts the calls to group()."""
+
+    def __init__(self):
+        ImageIdentifierIndex.__init__(self)
+        self.numGroupCalls = 0
+
+    def group(self, imageIdentifiers):
+        self.numGroupCalls += 1
+        return ImageIdentifierIndex.group(self, imageIdentifiers)
+
+
+def make_identifiers(numSeries, numPlanes):
+    """Return the identifiers of a file, in file order."""
+
+    return [FakeImageIdentifier(s, 0, z, 0)
+            for s in range(numSeries) for z in range(numPlanes)]
+
+
+class TestImageIdentifierIndex(unittest.TestCase):
+
+    def testTake(self):
+        identifiers = make_identifiers(3, 2)
+        index = ImageIdentifierIndex()
+        entries = index.take("file.lif", identifiers, 1)
+        self.assertEqual([entry[0] for entry in entries], identifiers[2:4])
+        self.assertEqual([entry[1:] for entry in entries],
+                         [(1, 0, 0, 0), (1, 0, 1, 0)])
+
+    def testTakeGroupsOnce(self):
+        identifiers = make_identifiers(2, 2)
+        index = CountingImageIdentifierIndex()
+        index.take("file.lif", identifiers, 0)
+        self.assertEqual(len(index.take("file.lif", identifiers, 1)), 2)
+        self.assertEqual(index.numGroupCalls, 1)
+
+    def testTakeReleasesFile(self):
+        identifiers = make_identifiers(2, 1)
+        index = ImageIdentifierIndex()
+        index.take("file.lif", identifiers, 0)
+        index.take("file.lif", identifiers, 1)
+        self.assertEqual(index._groups, {})
+
+    def testTakeSameSeriesAgain(self):
+        identifiers = make_identifiers(2, 2)
+        index = ImageIdentifierIndex()
+        first = index.take("file.lif", identifiers, 0)
+        second = index.take("file.lif", identifiers, 0)
+        self.assertEqual(first, second)
+
+    def testTakeUnknownSeries(self):
+        index = ImageIdentifierIndex()
+        self.assertEqual(index.take("file.lif", make_identifiers(1, 1), 5),
+                         [])
+
+
+if __name__ == "__main__":
+    unittest.main()
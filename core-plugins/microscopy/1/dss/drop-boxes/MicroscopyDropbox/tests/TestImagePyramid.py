@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import unittest
+
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from ImagePyramid import image_size
+from ImagePyramid import merge_resolutions
+from ImagePyramid import pyramid_resolutions
+
+
+class TestImagePyramid(unittest.TestCase):
+
+    def testPyramidResolutions(self):
+        self.assertEqual(pyramid_resolutions(4096, 2048),
+                         ["2048x1024", "1024x512", "512x256", "256x128"])
+
+    def testPyramidResolutionsRoundUp(self):
+        self.assertEqual(pyramid_resolutions(1001, 999, minSize=128),
+                         ["501x500", "251x250"])
+
+    def testPyramidResolutionsMaxSize(self):
+        self.assertEqual(pyramid_resolutions(16384, 16384, maxSize=4096,
+                                             maxLevels=3),
+                         ["4096x4096", "2048x2048", "1024x1024"])
+
+    def testPyramidResolutionsMaxLevels(self):
+        self.assertEqual(pyramid_resolutions(8192, 8192, maxLevels=2),
+                         ["4096x4096", "2048x2048"])
+
+    def testPyramidResolutionsSmallImage(self):
+        self.assertEqual(pyramid_resolutions(200, 200), [])
+
+    def testImageSize(self):
+        self.assertEqual(image_size([{"sizeX": "100", "sizeY": "50"},
+                                     {"sizeX": "80", "sizeY": "120"},
+                                     {}]),
+                         (100, 120))
+
+    def testMergeResolutions(self):
+        self.assertEqual(merge_resolutions(["256x256", "1024x1024"],
+                                           ["512x512", "256x256"]),
+                         ["1024x1024", "512x512", "256x256"])
+
+
+if __name__ == "__main__":
+    unittest.main()
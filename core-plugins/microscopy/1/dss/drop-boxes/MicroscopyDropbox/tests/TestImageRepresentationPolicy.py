@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import unittest
+
+from TestUtils import QuietLogger
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from ImageRepresentationPolicy import ImageRepresentationPolicy
+
+
+def make_policy(resolutions=None, minImageSize=512,
+                maxBytesPerDataset=1024 * 1024 * 1024,
+                pyramidMinImageSize=100000):
+    """Return a policy with small pyramid settings."""
+
+    if resolutions is None:
+        resolutions = ["64x64", "256x256", "1024x1024"]
+    return ImageRepresentationPolicy(resolutions, minImageSize,
+                                     maxBytesPerDataset, pyramidMinImageSize,
+                                     128, 4096, 8, QuietLogger())
+
+
+def make_series(sizeX, sizeY, sizeZ=1, sizeC=1, sizeT=1, datatype="uint16"):
+    """Return the metadata of a series."""
+
+    return {"sizeX": str(sizeX), "sizeY": str(sizeY), "sizeZ": str(sizeZ),
+            "sizeC": str(sizeC), "sizeT": str(sizeT), "datatype": datatype}
+
+
+class TestImageRepresentationPolicy(unittest.TestCase):
+
+    def testDownscalingResolutions(self):
+        policy = make_policy()
+        self.assertEqual(policy.chooseResolutions([make_series(512, 512)]),
+                         ["256x256", "64x64"])
+
+    def testLargestSeries(self):
+        policy = make_policy()
+        self.assertEqual(policy.chooseResolutions([make_series(512, 512),
+                                                   make_series(2048, 2048)]),
+                         ["1024x1024", "256x256", "64x64"])
+
+    def testImageTooSmall(self):
+        policy = make_policy()
+        self.assertEqual(policy.chooseResolutions([make_series(400, 300)]),
+                         [])
+
+    def testUnknownSize(self):
+        policy = make_policy()
+        self.assertEqual(policy.chooseResolutions([make_series(2048, 0)]),
+                         [])
+        self.assertEqual(policy.chooseResolutions([{"sizeY": "2048"}]), [])
+
+    def testByteBudget(self):
+        # 256x256 and 64x64 of 10 uint16 planes: 1310720 + 81920 bytes
+        policy = make_policy(maxBytesPerDataset=1400000)
+        series = make_series(2048, 2048, sizeZ=10)
+        self.assertEqual(policy.chooseResolutions([series]),
+                         ["256x256", "64x64"])
+
+    def testPyramidLevels(self):
+        policy = make_policy(resolutions=["256x256"], pyramidMinImageSize=2048)
+        self.assertEqual(policy.chooseResolutions([make_series(2048, 1024)]),
+                         ["1024x512", "512x256", "256x256", "256x128"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from TestUtils import QuietLogger
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from ImageRepresentationQueue import ImageRepresentationQueue
+
+
+class TestImageRepresentationQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="representation_queue_")
+        self.queue = ImageRepresentationQueue(self.folder, QuietLogger(), 2)
+        self.allSeriesMetadata = [{"sizeX": "512", "sizeY": "256"},
+                                  {"sizeX": "128", "sizeY": "128"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def stage(self, stagingName, dataSetCode, seriesIndices=None):
+        self.queue.stage(stagingName, dataSetCode,
+                         ImageRepresentationQueue.SINGLE, "user/image.lif", 1,
+                         self.allSeriesMetadata, seriesIndices)
+
+    def testStagedJobsCannotBeClaimed(self):
+        self.stage("incoming", "DS1")
+        self.assertTrue(self.queue.isStaged("DS1"))
+        self.assertEqual(self.queue.claim("DS1"), None)
+        self.assertEqual(self.queue.getDepth(), 0)
+
+    def testCommitAndClaim(self):
+        self.stage("incoming", "DS1", [0, 1])
+        self.stage("incoming", "DS2")
+        self.assertEqual(self.queue.commitStaged("incoming"), 2)
+        self.assertFalse(self.queue.isStaged("DS1"))
+        self.assertEqual(self.queue.getDepth(), 2)
+
+        job = self.queue.claim("DS1")
+        self.assertEqual(job["dataSetCode"], "DS1")
+        self.assertEqual(job["kind"], ImageRepresentationQueue.SINGLE)
+        self.assertEqual(job["relativePath"], "user/image.lif")
+        self.assertEqual(job["seriesNum"], 1)
+        self.assertEqual(job["seriesIndices"], [0, 1])
+        self.assertEqual(job["allSeriesMetadata"][1].copy(),
+                         self.allSeriesMetadata[1])
+        self.assertEqual(self.queue.claim("DS1"), None)
+        self.assertEqual(self.queue.getDepth(), 1)
+
+        self.queue.complete(job)
+        statistics = self.queue.getStatistics()
+        self.assertEqual(statistics["pending"], 1)
+        self.assertEqual(statistics["processing"], 0)
+        self.assertEqual(statistics["completedLastPeriod"], 1)
+
+    def testOnlyTheSeriesOfTheDataSetIsStored(self):
+        self.stage("incoming", "DS1")
+        self.queue.commitStaged("incoming")
+        f = open(os.path.join(self.folder, "pending", "DS1.xml"), "r")
+        try:
+            self.assertEqual(f.read().count("<MicroscopyFileSeries"), 1)
+        finally:
+            f.close()
+
+        allSeriesMetadata = self.queue.claim("DS1")["allSeriesMetadata"]
+        self.assertEqual(len(allSeriesMetadata), 2)
+        self.assertEqual(allSeriesMetadata[0].copy(), {})
+        self.assertEqual(allSeriesMetadata[1].copy(),
+                         self.allSeriesMetadata[1])
+
+    def testLeicaTIFFSeriesPosition(self):
+        self.queue.stage("incoming", "DS1",
+                         ImageRepresentationQueue.LEICA_TIFF_SERIES,
+                         "series", 30, self.allSeriesMetadata, [22, 30])
+        self.queue.commitStaged("incoming")
+        job = self.queue.claim("DS1")
+        self.assertEqual(job["seriesNum"], 30)
+        self.assertEqual(job["seriesIndices"], [22, 30])
+        self.assertEqual(job["allSeriesMetadata"][1].copy(),
+                         self.allSeriesMetadata[1])
+
+    def testAllSeriesOfTheFile(self):
+        self.queue.stage("incoming", "DS1", ImageRepresentationQueue.SINGLE,
+                         "user/image.lif", -1, self.allSeriesMetadata)
+        self.queue.commitStaged("incoming")
+        self.assertEqual([m.copy() for m in
+                          self.queue.claim("DS1")["allSeriesMetadata"]],
+                         self.allSeriesMetadata)
+
+    def testClaimedJobs(self):
+        self.stage("incoming", "DS1")
+        self.queue.commitStaged("incoming")
+        self.assertEqual(self.queue.getClaimed(), [])
+        self.queue.claim("DS1")
+
+        claimed = self.queue.getClaimed()
+        self.assertEqual([job["dataSetCode"] for job in claimed], ["DS1"])
+        self.assertTrue(self.queue.complete(claimed[0]))
+        self.assertFalse(self.queue.complete(claimed[0]))
+        self.assertEqual(self.queue.getClaimed(), [])
+
+    def testDiscardStaged(self):
+        self.stage("incoming", "DS1")
+        self.queue.discardStaged("incoming")
+        self.assertFalse(self.queue.isStaged("DS1"))
+        self.assertEqual(self.queue.commitStaged("incoming"), 0)
+
+    def testFail(self):
+        self.stage("incoming", "DS1")
+        self.queue.commitStaged("incoming")
+
+        self.assertTrue(self.queue.fail(self.queue.claim("DS1"), "error 1"))
+        self.assertEqual(self.queue.getDepth(), 1)
+        self.assertFalse(self.queue.fail(self.queue.claim("DS1"), "error 2"))
+        self.assertEqual(self.queue.getDepth(), 0)
+        self.assertEqual(self.queue.claim("DS1"), None)
+        self.assertEqual(self.queue.getStatistics()["failed"], 1)
+
+    def testRequeueStale(self):
+        self.stage("incoming", "DS1")
+        self.queue.commitStaged("incoming")
+        self.queue.claim("DS1")
+        self.assertEqual(self.queue.requeueStale(3600), 0)
+        self.assertEqual(self.queue.requeueStale(-1), 1)
+        self.assertEqual(self.queue.getDepth(), 1)
+
+    def testOrphanedJobs(self):
+        self.stage("incoming", "DS1")
+        self.stage("incoming", "DS2")
+        self.queue.commitStaged("incoming")
+        self.stage("rolled_back", "DS3")
+
+        old = time.time() - 2 * ImageRepresentationQueue.ORPHAN_AGE
+        for jobFile in [os.path.join(self.folder, "pending", "DS2.xml"),
+                        os.path.join(self.folder, "staged", "rolled_back",
+                                     "DS3.xml")]:
+            os.utime(jobFile, (old, old))
+
+        self.assertEqual(self.queue.getOrphaned(), ["DS2", "DS3"])
+        self.queue.writeStatistics()
+        f = open(os.path.join(self.folder, "statistics.txt"), "r")
+        try:
+            lines = f.read().splitlines()
+        finally:
+            f.close()
+        self.assertTrue("staged=1" in lines)
+        self.assertTrue("pending=2" in lines)
+        self.assertTrue("orphaned=2" in lines)
+        self.assertTrue("orphanedDataSets=DS2,DS3" in lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from LeicaTIFFSeriesFileIndex import LeicaTIFFSeriesFileIndex
+
+
+class TestLeicaTIFFSeriesFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="leica_index_")
+        os.makedirs(os.path.join(self.folder, "sub"))
+        for name in ["exp_Series002_t01_z003_ch00.tif",
+                     "exp_s1_z000_ch01.TIFF",
+                     "exp_z001_ch00.tif",
+                     os.path.join("sub", "exp_Series002_t00_z000_ch00.tif"),
+                     "notes.txt"]:
+            f = open(os.path.join(self.folder, name), "wb")
+            try:
+                f.write("x" * len(name))
+            finally:
+                f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testParse(self):
+        index = LeicaTIFFSeriesFileIndex()
+        self.assertEqual(index.parse("exp_Series002_t01_z003_ch00.tif"),
+                         ("exp", 2, 1, 3, 0))
+        self.assertEqual(index.parse("exp_s1_z000_ch01.TIFF"),
+                         ("exp", 1, 0, 0, 1))
+        self.assertEqual(index.parse("exp_z001_ch00.tif"),
+                         ("exp", 0, 0, 1, 0))
+        self.assertEqual(index.parse("notes.txt"), None)
+        self.assertEqual(index.parse("exp_ch00.tif"), None)
+
+    def testScan(self):
+        index = LeicaTIFFSeriesFileIndex(self.folder)
+        self.assertEqual(len(index.getFiles()), 5)
+        self.assertEqual(index.getSeriesIndices(), [0, 1, 2])
+        self.assertEqual(index.getPlaneCount(2), 2)
+        self.assertEqual(index.lookup("/any/path/exp_s1_z000_ch01.TIFF"),
+                         ("exp", 1, 0, 0, 1))
+        planes = index.getSeriesPlanes(2)
+        planes.sort()
+        self.assertEqual(planes,
+                         [("exp_Series002_t01_z003_ch00.tif", 31, 1, 3, 0),
+                          ("sub/exp_Series002_t00_z000_ch00.tif", 35, 0, 0,
+                           0)])
+
+    def testManifestRoundTrip(self):
+        scanned = LeicaTIFFSeriesFileIndex(self.folder)
+        scanned.writeManifest(self.folder)
+
+        index = LeicaTIFFSeriesFileIndex()
+        self.assertTrue(index.readManifest(self.folder))
+        self.assertEqual(index.getFolder(), self.folder)
+        self.assertEqual(index.getFiles(), scanned.getFiles())
+        self.assertEqual(index.getSeriesIndices(),
+                         scanned.getSeriesIndices())
+        self.assertEqual(index.getSizeInBytes(), scanned.getSizeInBytes())
+        for relativePath, size in scanned.getFiles():
+            self.assertEqual(index.lookup(relativePath),
+                             scanned.lookup(relativePath))
+
+        # A new scan ignores the manifest itself
+        self.assertEqual(len(LeicaTIFFSeriesFileIndex(
+            self.folder).getFiles()), 5)
+
+    def testManifestIsNotParsedAgain(self):
+        LeicaTIFFSeriesFileIndex(self.folder).writeManifest(self.folder)
+
+        index = LeicaTIFFSeriesFileIndex()
+        index.parse = None
+        self.assertTrue(index.readManifest(self.folder))
+        self.assertEqual(index.lookup("exp_z001_ch00.tif"),
+                         ("exp", 0, 0, 1, 0))
+        self.assertEqual(index.lookup("notes.txt"), None)
+
+    def testOldManifest(self):
+        f = open(os.path.join(self.folder,
+                              LeicaTIFFSeriesFileIndex.MANIFEST_FILE_NAME),
+                 "w")
+        try:
+            f.write("# LeicaTIFFSeriesFileIndex 1\n")
+        finally:
+            f.close()
+        self.assertFalse(LeicaTIFFSeriesFileIndex().readManifest(self.folder))
+
+    def testNoManifest(self):
+        self.assertFalse(LeicaTIFFSeriesFileIndex().readManifest(self.folder))
+
+
+if __name__ == "__main__":
+    unittest.main()
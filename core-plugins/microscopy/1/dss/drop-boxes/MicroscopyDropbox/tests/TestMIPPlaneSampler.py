@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import unittest
+
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from MIPPlaneSampler import MIPPlaneSampler
+
+
+def make_planes(numTimepoints, numPlanes, numChannels, size=100):
+    """Return the (key, size, timepoint, plane, channel) entries of a
+    series, in channel-major order."""
+
+    planes = []
+    for c in range(numChannels):
+        for t in range(numTimepoints):
+            for z in range(numPlanes):
+                planes.append(((t, z, c), size, t, z, c))
+    return planes
+
+
+class TestMIPPlaneSampler(unittest.TestCase):
+
+    def testUnknownStrategy(self):
+        self.assertRaises(Exception, MIPPlaneSampler, "random")
+
+    def testAll(self):
+        planes = make_planes(3, 4, 2)
+        self.assertEqual(MIPPlaneSampler().select(planes), planes)
+
+    def testEmpty(self):
+        sampler = MIPPlaneSampler(MIPPlaneSampler.EVERY_NTH, 2)
+        self.assertEqual(sampler.select([]), [])
+
+    def testFirstTimepoint(self):
+        planes = make_planes(3, 4, 2)
+        sampler = MIPPlaneSampler(MIPPlaneSampler.FIRST_TIMEPOINT)
+        selected = sampler.select(planes)
+        self.assertEqual(len(selected), 8)
+        for entry in selected:
+            self.assertEqual(entry[2], 0)
+
+    def testEveryNth(self):
+        planes = make_planes(1, 5, 2)
+        sampler = MIPPlaneSampler(MIPPlaneSampler.EVERY_NTH, 2)
+        selected = [entry[0] for entry in sampler.select(planes)]
+        self.assertEqual(selected, [(0, 0, 0), (0, 2, 0), (0, 4, 0),
+                                    (0, 0, 1), (0, 2, 1), (0, 4, 1)])
+
+    def testEveryNthSortsByTimepointAndPlane(self):
+        planes = make_planes(2, 2, 1)
+        planes.reverse()
+        sampler = MIPPlaneSampler(MIPPlaneSampler.EVERY_NTH, 1)
+        selected = [entry[0] for entry in sampler.select(planes)]
+        self.assertEqual(selected, [(0, 0, 0), (0, 1, 0), (1, 0, 0),
+                                    (1, 1, 0)])
+
+    def testByteBudget(self):
+        planes = make_planes(1, 10, 2, size=100)
+        sampler = MIPPlaneSampler(MIPPlaneSampler.BYTE_BUDGET,
+                                  byteBudget=600)
+        selected = [entry[0] for entry in sampler.select(planes)]
+        self.assertEqual(selected, [(0, 0, 0), (0, 3, 0), (0, 6, 0),
+                                    (0, 0, 1), (0, 3, 1), (0, 6, 1)])
+
+    def testByteBudgetKeepsOnePlanePerChannel(self):
+        planes = make_planes(1, 10, 3, size=100)
+        sampler = MIPPlaneSampler(MIPPlaneSampler.BYTE_BUDGET, byteBudget=0)
+        selected = sampler.select(planes)
+        self.assertEqual([entry[4] for entry in selected], [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import unittest
+
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from SeriesMetadataTable import SeriesMetadataTable
+
+
+class TestSeriesMetadataTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = SeriesMetadataTable([
+            {"sizeX": "512", "datatype": "uint16"},
+            {"sizeX": "256", "channelName0": "DAPI"}])
+
+    def testLength(self):
+        self.assertEqual(len(self.table), 2)
+        self.assertEqual(len(list(self.table)), 2)
+
+    def testRows(self):
+        self.assertEqual(self.table[0].copy(),
+                         {"sizeX": "512", "datatype": "uint16"})
+        self.assertEqual(self.table[1].copy(),
+                         {"sizeX": "256", "channelName0": "DAPI"})
+
+    def testMissingAttributes(self):
+        row = self.table[0]
+        self.assertEqual(row.get("channelName0"), None)
+        self.assertEqual(row.get("channelName0", "CHANNEL_0"), "CHANNEL_0")
+        self.assertFalse("channelName0" in row)
+        self.assertRaises(KeyError, row.__getitem__, "channelName0")
+
+    def testDictInterface(self):
+        row = self.table[1]
+        self.assertEqual(row["channelName0"], "DAPI")
+        self.assertTrue("sizeX" in row)
+        self.assertEqual(len(row), 2)
+        keys = list(row)
+        keys.sort()
+        self.assertEqual(keys, ["channelName0", "sizeX"])
+
+    def testAppendItemsKeepsOrder(self):
+        self.table.appendItems([("numSeries", "2"), ("sizeX", "128")])
+        self.assertEqual(self.table[2].items(),
+                         [("sizeX", "128"), ("numSeries", "2")])
+
+    def testValuesAreInterned(self):
+        table = SeriesMetadataTable()
+        table.append({"datatype": "".join(["uint", "16"])})
+        table.append({"datatype": "".join(["uint", "1", "6"])})
+        self.assertTrue(table[0]["datatype"] is table[1]["datatype"])
+
+
+if __name__ == "__main__":
+    unittest.main()
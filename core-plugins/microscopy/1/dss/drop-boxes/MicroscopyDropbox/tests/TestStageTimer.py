@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from TestUtils import QuietLogger
+from TestUtils import add_dropbox_to_path
+
+add_dropbox_to_path()
+
+from StageTimer import StageTimer
+from StageTimer import to_json
+
+
+class TestStageTimer(unittest.TestCase):
+
+    def testToJson(self):
+        self.assertEqual(to_json({"b": 1, "a": "x", "c": None, "d": True,
+                                  "e": False, "f": 0.5}),
+                         '{"a": "x", "b": 1, "c": null, "d": true, ' +
+                         '"e": false, "f": 0.500000}')
+
+    def testToJsonEscapes(self):
+        self.assertEqual(to_json({"file": 'a"b\\c\nd\te\x01'}),
+                         '{"file": "a\\"b\\\\c\\nd\\te\\u0001"}')
+
+    def testToJsonEmpty(self):
+        self.assertEqual(to_json({}), "{}")
+
+    def testSummary(self):
+        timer = StageTimer("incoming", QuietLogger())
+        timer.recordDuration("parse", 1.0, "a.lif")
+        timer.recordDuration("parse", 3.0, "b.lif")
+        timer.recordDuration("checksum", 2.0, "a.lif", numBytes=1000)
+        timer.recordDuration("checksum", 2.0, "b.lif", numBytes=3000)
+        self.assertEqual(timer.getSummary(),
+                         {"parse": (2, 4.0, 3.0, -1),
+                          "checksum": (2, 4.0, 2.0, 4000)})
+
+    def testWrite(self):
+        folder = tempfile.mkdtemp(prefix="stage_timer_")
+        try:
+            timingsFile = os.path.join(folder, "timings.jsonl")
+            timer = StageTimer("incoming", QuietLogger())
+            timer.recordDuration("checksum", 2.0, "a.lif", 1, 4000000)
+            timer.write(timingsFile)
+
+            f = open(timingsFile, "r")
+            try:
+                lines = f.read().splitlines()
+            finally:
+                f.close()
+            self.assertEqual(lines, [
+                '{"bytes": 4000000, "file": "a.lif", ' +
+                '"mbPerSecond": 2.000000, "seconds": 2.000000, ' +
+                '"series": 1, "stage": "checksum", ' +
+                '"transaction": "incoming", "type": "stage"}',
+                '{"count": 1, "maxSeconds": 2.000000, ' +
+                '"mbPerSecond": 2.000000, "stage": "checksum", ' +
+                '"totalBytes": 4000000, "totalSeconds": 2.000000, ' +
+                '"transaction": "incoming", "type": "summary"}'])
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on Oct 18, 2026
+
+@author: agent
+"""
+
+import os
+import sys
+
+
+def add_dropbox_to_path():
+    """Make the dropbox modules importable from the tests.
+
+    @return full path to the dropbox folder
+    """
+
+    testsFolder = os.path.dirname(os.path.abspath(__file__))
+    dropboxFolder = os.path.dirname(testsFolder)
+    if dropboxFolder not in sys.path:
+        sys.path.insert(0, dropboxFolder)
+    return dropboxFolder
+
+
+class QuietLogger:
+    """Logger that keeps the messages instead of writing them."""
+
+    def __init__(self):
+        self.messages = []
+
+    def _log(self, level, msg):
+        self.messages.append((level, msg))
+
+    def debug(self, msg):
+        self._log("DEBUG", msg)
+
+    def info(self, msg):
+        self._log("INFO", msg)
+
+    def warning(self, msg):
+        self._log("WARNING", msg)
+
+    def error(self, msg):
+        self._log("ERROR", msg)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+'''
+Maintenance task script that provides the image configuration of the
+MICROSCOPY_IMG data sets registered by the MicroscopyDropbox without image
+representations (see GlobalSettings.DeferImageRepresentations). The
+configuration is rebuilt from the job queued by the dropbox; the job stays
+claimed until the representations are found stored in openBIS.
+
+@author: agent
+'''
+
+import logging
+import os
+import sys
+import time
+from java.lang import Throwable
+from ch.systemsx.cisd.openbis.dss.generic.shared import ServiceProvider
+
+# Path to the dropbox (__file__ does not work (reliably) in Jython)
+dbPath = "../core-plugins/microscopy/1/dss/drop-boxes/MicroscopyDropbox"
+if dbPath not in sys.path:
+    sys.path.append(dbPath)
+
+from GlobalSettings import GlobalSettings
+from ImageRepresentationQueue import ImageRepresentationQueue
+from LeicaTIFFSeriesCompositeDatasetConfig import LeicaTIFFSeriesCompositeDatasetConfig
+from LeicaTIFFSeriesFileIndex import LeicaTIFFSeriesFileIndex
+from MicroscopySingleDatasetConfig import MicroscopySingleDatasetConfig
+
+# Data set types (see plugin.properties)
+IMAGE_DATA_SET_TYPE = "MICROSCOPY_IMG"
+THUMBNAIL_DATA_SET_TYPE = "MICROSCOPY_IMG_THUMBNAIL"
+
+# Jobs claimed for longer than this without their representations being
+# stored (e.g. the rendering was stopped by a restart of the DSS) are
+# returned to the queue
+STALE_JOB_TIMEOUT_IN_SECONDS = 3600
+
+# Time to wait for the job of a data set whose registration is committed but
+# whose job is still staged (the post-registration hook of the dropbox moves
+# it to the pending jobs right after the commit)
+STAGED_JOB_WAIT_IN_SECONDS = 120
+
+
+def _getLogger():
+    """Log to the log file of the dropbox."""
+
+    logPath = os.path.join(dbPath, "logs")
+    if not os.path.exists(logPath):
+        os.makedirs(logPath)
+    logging.basicConfig(filename=os.path.join(logPath, "log.txt"),
+                        level=logging.DEBUG,
+                        format='%(asctime)-15s %(levelname)s: %(message)s')
+    return logging.getLogger("Microscopy")
+
+
+def _getContainerDataSets(dataSetCode):
+    """Return the data sets of the container of a data set (the contained
+    data sets if the data set is the container itself)."""
+
+    dataSet = ServiceProvider.getOpenBISService().tryGetDataSet(dataSetCode)
+    if dataSet is None:
+        return []
+    if dataSet.isContainer():
+        return list(dataSet.getContainedDataSets())
+
+    dataSets = [dataSet]
+    for container in dataSet.getContainerDataSets():
+        dataSets.extend(container.getContainedDataSets())
+    return dataSets
+
+
+def _hasRepresentations(dataSetCode):
+    """Return True if the thumbnail data set of a data set is stored."""
+
+    for dataSet in _getContainerDataSets(dataSetCode):
+        if dataSet.getDataSetType().getCode() == THUMBNAIL_DATA_SET_TYPE:
+            return True
+    return False
+
+
+def _getStoredFolder(job):
+    """Return the full path of the folder of a Leica TIFF Series job in the
+    store, or None if it cannot be found."""
+
+    storeRoot = ServiceProvider.getConfigProvider().getStoreRoot()
+    for dataSet in _getContainerDataSets(job["dataSetCode"]):
+        if dataSet.getDataSetType().getCode() != IMAGE_DATA_SET_TYPE:
+            continue
+        physicalDataSet = dataSet.tryGetAsDataSet()
+        if physicalDataSet is None:
+            continue
+        folder = os.path.join(storeRoot.getAbsolutePath(),
+                              physicalDataSet.getShareId(),
+                              physicalDataSet.getLocation(), "original",
+                              job["relativePath"])
+        if os.path.isdir(folder):
+            return folder
+    return None
+
+
+def _getLeicaFileIndex(job, logger):
+    """Rebuild the file index of a Leica TIFF Series job from the manifest
+    stored in its folder (or by scanning the folder), so that MIPSampling
+    and the streaming MIP can be applied.
+
+    @return LeicaTIFFSeriesFileIndex, or None if the folder was not found
+    """
+
+    folder = None
+    try:
+        folder = _getStoredFolder(job)
+    except (Exception, Throwable), e:
+        logger.warning("CREATE_IMAGE_REPRESENTATIONS::_getLeicaFileIndex(): " +
+                       "Could not locate " + job["dataSetCode"] + ": " +
+                       str(e))
+
+    if folder is None:
+        logger.warning("CREATE_IMAGE_REPRESENTATIONS::_getLeicaFileIndex(): " +
+                       "Folder of " + job["dataSetCode"] + " not found: " +
+                       "MIPSampling and the streaming MIP are ignored.")
+        return None
+
+    fileIndex = LeicaTIFFSeriesFileIndex()
+    if not fileIndex.readManifest(folder):
+        logger.info("CREATE_IMAGE_REPRESENTATIONS::_getLeicaFileIndex(): " +
+                    "No manifest in " + folder + "; scanning the folder.")
+        fileIndex.scan(folder)
+    return fileIndex
+
+
+def _createConfig(job, logger):
+    """Rebuild the image configuration (with image representations) of the
+    data set of a queued job."""
+
+    if job["kind"] == ImageRepresentationQueue.LEICA_TIFF_SERIES:
+        return LeicaTIFFSeriesCompositeDatasetConfig(job["allSeriesMetadata"],
+                                                     job["seriesIndices"],
+                                                     logger,
+                                                     job["seriesNum"],
+                                                     _getLeicaFileIndex(job,
+                                                                        logger),
+                                                     True)
+
+    return MicroscopySingleDatasetConfig(job["allSeriesMetadata"], logger,
+                                         job["seriesNum"], None, None, True)
+
+
+def _completeStored(queue, logger):
+    """Complete the claimed jobs whose representations are stored."""
+
+    for job in queue.getClaimed():
+        try:
+            stored = _hasRepresentations(job["dataSetCode"])
+        except (Exception, Throwable), e:
+            logger.warning("CREATE_IMAGE_REPRESENTATIONS::_completeStored(): " +
+                           "Could not check " + job["dataSetCode"] + ": " +
+                           str(e))
+            continue
+        if stored:
+            queue.complete(job)
+
+
+def _claim(queue, dataSetCode):
+    """Claim the job of a data set, waiting for it if it is still staged.
+
+    @return the job, or None if the data set has no queued job
+    """
+
+    start = time.time()
+    while True:
+        job = queue.claim(dataSetCode)
+        if job is not None or not queue.isStaged(dataSetCode):
+            return job
+        if time.time() - start > STAGED_JOB_WAIT_IN_SECONDS:
+            raise Exception("The image representations of " + dataSetCode +
+                            " are still staged after " +
+                            str(STAGED_JOB_WAIT_IN_SECONDS) + " s.")
+        time.sleep(1)
+
+
+def getImageConfig(dataSetCode):
+    """Return the image configuration of a MICROSCOPY_IMG data set, or None
+    if the data set has no queued job (e.g. it was registered with its image
+    representations, or it failed
+    GlobalSettings.ImageRepresentationMaxAttempts times).
+
+    The maintenance task only asks for data sets without representations:
+    if the job of the data set is still claimed, the representations of the
+    previous attempt were not stored, and the attempt is counted as failed.
+
+    @param dataSetCode Code of the data set
+    """
+
+    logger = _getLogger()
+    queue = ImageRepresentationQueue(
+        os.path.join(dbPath, "cache", "representationQueue"), logger,
+        GlobalSettings.ImageRepresentationMaxAttempts)
+    _completeStored(queue, logger)
+    queue.requeueStale(STALE_JOB_TIMEOUT_IN_SECONDS)
+
+    for job in queue.getClaimed():
+        if job["dataSetCode"] == dataSetCode:
+            queue.fail(job, "The image representations were not stored.")
+
+    try:
+        job = _claim(queue, dataSetCode)
+    except Exception:
+        queue.writeStatistics()
+        raise
+    if job is None:
+        queue.writeStatistics()
+        return None
+
+    try:
+        config = _createConfig(job, logger)
+    except Exception, e:
+        queue.fail(job, str(e))
+        queue.writeStatistics()
+        raise
+
+    statistics = queue.writeStatistics()
+    logger.info("CREATE_IMAGE_REPRESENTATIONS::getImageConfig(): " +
+                "Generating the image representations of " + dataSetCode +
+                " (queue depth: " + str(statistics["pending"]) + ", " +
+                ("%.1f" % statistics["ratePerHour"]) + " data sets/hour).")
+    if statistics["orphaned"] > 0:
+        logger.warning("CREATE_IMAGE_REPRESENTATIONS::getImageConfig(): " +
+                       str(statistics["orphaned"]) + " queued data sets " +
+                       "were not processed for more than " +
+                       str(ImageRepresentationQueue.ORPHAN_AGE) + " s: " +
+                       statistics["orphanedDataSets"])
+    return config
@@ -21,6 +21,13 @@ from ch.ethz.scu.obit.common.server.longrunning import LRCache
 import uuid
 from threading import Thread
 
+# Manifest written by the MicroscopyDropbox into Leica TIFF Series folders
+# (see LeicaTIFFSeriesFileIndex)
+MANIFEST_FILE_NAME = ".leica_tiff_series_manifest.txt"
+# (format versions 1 and 2: the relative path is the first column)
+MANIFEST_HEADERS = {"# LeicaTIFFSeriesFileIndex 1": 6,
+                    "# LeicaTIFFSeriesFileIndex 2": 7}
+
 
 def touch(full_file):
     """Touches a file.
@@ -453,6 +460,19 @@ class Mover():
         # Info
         self._logger.info("Copying directory " + source + " to " + dstDir)
 
+        # If the folder has a manifest (Leica TIFF Series), copy the files
+        # listed there instead of listing the directory tree
+        files = self._readManifest(source)
+        if files is not None:
+            for relativePath in files:
+                subDir = os.path.dirname(relativePath)
+                if subDir != "" and \
+                    not os.path.isdir(os.path.join(dstSubDir, subDir)):
+                    self._createDir(os.path.join(dstSubDir, subDir))
+                self._copyFile(os.path.join(source, relativePath),
+                               os.path.join(dstSubDir, subDir))
+            return
+
         # Now copy recursively (by preserving NFSv4 ACLs)
         files = os.listdir(source)
         for f in files:
@@ -463,6 +483,34 @@ class Mover():
                 self._copyFile(fullPath, dstSubDir)
 
 
+    def _readManifest(self, folder):
+        """Return the list of relative file paths from the manifest written
+        by the dropbox into Leica TIFF Series folders, or None if the folder
+        has no (valid) manifest.
+        """
+
+        manifestFile = os.path.join(folder, MANIFEST_FILE_NAME)
+        if not os.path.exists(manifestFile):
+            return None
+
+        files = []
+        f = open(manifestFile, "r")
+        try:
+            numColumns = MANIFEST_HEADERS.get(f.readline().rstrip("\r\n"))
+            if numColumns is None:
+                return None
+            for line in f:
+                parts = line.decode("UTF-8").rstrip("\r\n").split("\t")
+                if len(parts) != numColumns:
+                    return None
+                files.append(parts[0].replace("/", os.sep))
+        finally:
+            f.close()
+
+        self._logger.info("Using manifest of folder " + folder)
+        return files
+
+
     def _createDir(self, dirFullPath):
         """Creates the passed directory (with full path).
         """